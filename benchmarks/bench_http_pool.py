@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark: pooled keep-alive transport vs. one socket per request.
+
+Usage:
+    python3 benchmarks/bench_http_pool.py [--requests 2000]
+
+Runs entirely offline against a local stub server and prints
+requests/sec for:
+- urllib:   legacy urllib.request.urlopen path (new socket each call)
+- no-reuse: ConnectionPool(maxsize=0), new socket each call
+- pooled:   default ConnectionPool, keep-alive reuse
+"""
+
+import argparse
+import json
+import pathlib
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "lib" / "python"))
+
+from api_client import ArrClient, ConnectionPool  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+ENDPOINT = "/api/v3/system/status"
+
+
+def bench_urllib(url: str, n: int) -> float:
+    headers = {"X-Api-Key": "bench", "Accept": "application/json"}
+    start = time.perf_counter()
+    for _ in range(n):
+        req = urllib.request.Request(f"{url}{ENDPOINT}", headers=headers)
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            json.loads(resp.read())
+    return n / (time.perf_counter() - start)
+
+
+def bench_client(client: ArrClient, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        if client.get_json(ENDPOINT) is None:
+            raise RuntimeError("stub request failed")
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with StubServer({ENDPOINT: {"version": "4.0.0.0", "appName": "Sonarr"}}) as srv:
+        results = {
+            "urllib": bench_urllib(srv.url, args.requests),
+            "no-reuse": bench_client(
+                ArrClient(srv.url, "bench", pool=ConnectionPool(maxsize=0)), args.requests
+            ),
+            "pooled": bench_client(ArrClient(srv.url, "bench"), args.requests),
+        }
+
+    for name, rps in results.items():
+        print(f"{name:>10}: {rps:8.0f} req/s")
+    print(f"   speedup: {results['pooled'] / results['urllib']:.2f}x vs urllib")
+
+
+if __name__ == "__main__":
+    main()
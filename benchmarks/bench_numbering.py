@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: gap-report number extraction and gap detection.
+
+Usage:
+    python3 benchmarks/bench_numbering.py [--series 2000] [--books 150]
+
+Compares the previous per-filename three-regex extractor plus expanded
+gap lists against numbering.extract_series_numbers / find_gap_ranges on
+synthetic series, and checks both agree on integer results.
+"""
+
+import argparse
+import pathlib
+import random
+import re
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "lib" / "python"))
+
+from numbering import extract_series_numbers, find_gap_ranges  # noqa: E402
+
+# Previous implementation, kept here as the baseline
+VOL_CH_MAX = 2000
+FALLBACK_MAX = 400
+YEAR_LOWER, YEAR_UPPER = 1900, 2100
+vol_re = re.compile(r"(?:^|[^A-Za-z0-9])(v|vol|volume)\s*0*(\d+)", re.IGNORECASE)
+ch_re = re.compile(r"(?:^|[^A-Za-z0-9])(ch|chapter)\s*0*(\d+)", re.IGNORECASE)
+num_re = re.compile(r"(?:^|[^A-Za-z0-9])0*(\d+)(?![0-9])")
+
+
+def legacy_extract_numbers(name: str) -> List[int]:
+    for rx, limit in ((vol_re, VOL_CH_MAX), (ch_re, VOL_CH_MAX)):
+        hits: List[int] = []
+        for m in rx.finditer(name):
+            try:
+                n = int(m.group(2))
+                if 0 < n <= limit:
+                    hits.append(n)
+            except Exception:
+                continue
+        if hits:
+            return sorted(set(hits))
+    nums: List[int] = []
+    for m in num_re.finditer(name):
+        try:
+            n = int(m.group(1))
+        except Exception:
+            continue
+        if YEAR_LOWER <= n <= YEAR_UPPER:
+            continue
+        if 0 < n <= FALLBACK_MAX:
+            nums.append(n)
+    return sorted(set(nums))
+
+
+def legacy_find_gaps(nums: List[int]):
+    gaps = []
+    for a, b in zip(nums, nums[1:]):
+        if b - a > 1:
+            gaps.extend(range(a + 1, b))
+    return gaps
+
+
+def legacy_series(names: List[str]):
+    nums = []
+    for n in names:
+        nums.extend(legacy_extract_numbers(n))
+    nums = sorted(set(nums))
+    return nums, legacy_find_gaps(nums)
+
+
+def batched_series(names: List[str]):
+    nums = extract_series_numbers(names)
+    return nums, find_gap_ranges(nums)
+
+
+def make_library(series: int, books: int, seed: int = 7) -> List[List[str]]:
+    rng = random.Random(seed)
+    styles = [
+        "{t} v{n:02d} (2019) (Digital) (1r0n).cbz",
+        "{t} Vol. {n} [Group].cbz",
+        "{t} - Chapter {n:03d}.cbz",
+        "{t} ch {n}.cbz",
+        "{t} {n:03d} (2021).cbz",
+    ]
+    library = []
+    for i in range(series):
+        style = rng.choice(styles)
+        title = f"Series Title {i}"
+        names = [style.format(t=title, n=n) for n in range(1, books + 1) if rng.random() > 0.05]
+        library.append(names)
+    return library
+
+
+def timed(fn, library) -> float:
+    start = time.perf_counter()
+    for names in library:
+        fn(names)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--series", type=int, default=2000)
+    parser.add_argument("--books", type=int, default=150)
+    args = parser.parse_args()
+
+    library = make_library(args.series, args.books)
+    total = sum(len(names) for names in library)
+
+    for names in library:
+        old_nums, _ = legacy_series(names)
+        new_nums, _ = batched_series(names)
+        if old_nums != [n for n in new_nums if isinstance(n, int)]:
+            raise SystemExit(f"mismatch for {names[0]!r}")
+
+    legacy = timed(legacy_series, library)
+    batched = timed(batched_series, library)
+    print(f"filenames: {total}")
+    print(f"   legacy: {legacy:6.3f}s  ({total / legacy:10.0f} names/s)")
+    print(f"  batched: {batched:6.3f}s  ({total / batched:10.0f} names/s)")
+    print(f"  speedup: {legacy / batched:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
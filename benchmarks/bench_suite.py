@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: api_client and the report scripts against fake services.
+
+Usage:
+    python3 benchmarks/bench_suite.py [--latency-ms 5] [--series 300] [--books 80]
+                                      [--output results.json] [--baseline old.json]
+
+Starts in-process fake Sonarr, Radarr, SABnzbd and Komga servers (see
+fake_services.py), drives ArrClient, SabClient and KomgaClient plus
+scripts/validate-services.py and scripts/komga-gap-report.py against
+them, and prints one JSON document with, per scenario:
+
+    requests     HTTP requests (or script runs) measured
+    seconds      wall time of the scenario
+    rps          requests (runs) per second
+    p50_ms/p99_ms latency of one request (one script run)
+    peak_rss_kb  peak resident set size; for in-process scenarios this is
+                 the suite's own high-water mark so far (fake servers
+                 included), for scripts that of the child process
+
+With --baseline, scenarios whose throughput dropped or whose p99 grew by
+more than --tolerance (default 25%) are listed on stderr and the exit
+status is 1. Runs entirely offline.
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "lib" / "python"))
+
+from api_client import (  # noqa: E402
+    ArrClient,
+    ConnectionPool,
+    KomgaClient,
+    RequestHook,
+    RequestTrace,
+    SabClient,
+)
+from fake_services import FakeStack  # noqa: E402
+
+
+class _Recorder(RequestHook):
+    """Collects the total latency of every request a client makes."""
+
+    def __init__(self):
+        self.samples: List[float] = []
+
+    def after_request(self, trace: RequestTrace) -> None:
+        self.samples.append(trace.total)
+
+
+def _rss_kb(usage: resource.struct_rusage) -> int:
+    # ru_maxrss is bytes on macOS, KiB elsewhere
+    return usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def _result(samples: List[float], seconds: float, rss_kb: int, **extra: Any) -> Dict[str, Any]:
+    return {
+        "requests": len(samples),
+        "seconds": round(seconds, 4),
+        "rps": round(len(samples) / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(_percentile(samples, 0.50) * 1000, 3) if samples else None,
+        "p99_ms": round(_percentile(samples, 0.99) * 1000, 3) if samples else None,
+        "peak_rss_kb": rss_kb,
+        **extra,
+    }
+
+
+def measure(run: Callable[[List[RequestHook]], Any]) -> Dict[str, Any]:
+    """Time `run(hooks)` in-process; latencies come from the request hook."""
+    recorder = _Recorder()
+    started = time.perf_counter()
+    items = run([recorder])
+    seconds = time.perf_counter() - started
+    extra = {"items": items} if isinstance(items, int) else {}
+    return _result(recorder.samples, seconds, _rss_kb(resource.getrusage(resource.RUSAGE_SELF)), **extra)
+
+
+# Runs a script as __main__ and reports its peak RSS on exit. A forked child
+# inherits the parent's ru_maxrss on Linux, so VmHWM (reset by exec) is used
+# where available.
+_RSS_WRAPPER = """
+import atexit, runpy, sys
+def _report():
+    try:
+        with open("/proc/self/status") as f:
+            kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+    except (OSError, StopIteration):
+        import resource
+        kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        kb = kb // 1024 if sys.platform == "darwin" else kb
+    sys.stderr.write(f"\\n{MARKER}{kb}\\n")
+atexit.register(_report)
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+_RSS_MARKER = "BENCH_PEAK_RSS_KB="
+
+
+def run_script(args: List[str], env: Dict[str, str], runs: int) -> Dict[str, Any]:
+    """Run a script `runs` times; latency is one run, RSS the largest run's peak."""
+    wrapper = _RSS_WRAPPER.replace("{MARKER}", _RSS_MARKER)
+    samples = []
+    peak = 0
+    started = time.perf_counter()
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-c", wrapper, *args],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        samples.append(time.perf_counter() - t0)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{args[0]} exited with {proc.returncode}: {proc.stderr.strip()}")
+        for line in proc.stderr.splitlines():
+            if line.startswith(_RSS_MARKER):
+                peak = max(peak, int(line[len(_RSS_MARKER):]))
+    return _result(samples, time.perf_counter() - started, peak)
+
+
+def client_scenarios(stack: FakeStack, n: int) -> Dict[str, Callable[[List[RequestHook]], Any]]:
+    key = FakeStack.API_KEY
+    urls = stack.urls
+
+    def arr_status(hooks):
+        sonarr = ArrClient(urls["sonarr"], key, hooks=hooks)
+        for _ in range(n):
+            if sonarr.get_json("/api/v3/system/status") is None:
+                raise RuntimeError("status request failed")
+
+    def arr_series_list(hooks):
+        sonarr = ArrClient(urls["sonarr"], key, hooks=hooks)
+        return sum(len(sonarr.get_json("/api/v3/series") or []) for _ in range(max(1, n // 20)))
+
+    def arr_history_pages(hooks):
+        radarr = ArrClient(urls["radarr"], key, hooks=hooks)
+        return sum(1 for _ in radarr.iter_records("/api/v3/history", page_size=250))
+
+    def sab_queue_full(hooks):
+        sab = SabClient(urls["sabnzbd"], key, hooks=hooks)
+        return sum(
+            len(sab.call_json("mode=queue&output=json")["queue"]["slots"]) for _ in range(max(1, n // 20))
+        )
+
+    def komga_books_concurrent(hooks):
+        pool = ConnectionPool(maxsize=8)
+        komga = KomgaClient(urls["komga"], FakeStack.KOMGA_USER, FakeStack.KOMGA_PASS, pool=pool, hooks=hooks)
+        series = [s["id"] for s in komga.iter_records("/api/v1/series")]
+        with ThreadPoolExecutor(max_workers=8) as workers:
+            counts = workers.map(
+                lambda sid: sum(1 for _ in komga.iter_records(f"/api/v1/series/{sid}/books")), series
+            )
+            return sum(counts)
+
+    return {
+        "arr_status": arr_status,
+        "arr_series_list": arr_series_list,
+        "arr_history_pages": arr_history_pages,
+        "sab_queue_full": sab_queue_full,
+        "komga_books_concurrent": komga_books_concurrent,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Human-readable regressions of `results` against a previous run."""
+    regressions = []
+    for name, new in results.items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            continue
+        if old["rps"] and new["rps"] < old["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {old['rps']} -> {new['rps']}")
+        if old.get("p99_ms") and new.get("p99_ms") and new["p99_ms"] > old["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {old['p99_ms']}ms -> {new['p99_ms']}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added server latency per request")
+    parser.add_argument("--series", type=int, default=200, help="series/movies per fake service")
+    parser.add_argument("--books", type=int, default=50, help="books per Komga series")
+    parser.add_argument("--queue", type=int, default=500, help="ARR/SABnzbd queue length")
+    parser.add_argument("--history", type=int, default=2000, help="ARR/SABnzbd history length")
+    parser.add_argument("--pad", type=int, default=200, help="filler bytes per record")
+    parser.add_argument("--requests", type=int, default=1000, help="requests for the request-loop scenarios")
+    parser.add_argument("--script-runs", type=int, default=5, help="runs per script scenario")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    parser.add_argument("--baseline", help="previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    args = parser.parse_args()
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "tolerance")}
+    results: Dict[str, Any] = {}
+    stack = FakeStack(
+        latency=args.latency_ms / 1000,
+        series=args.series,
+        books=args.books,
+        queue=args.queue,
+        history=args.history,
+        pad=args.pad,
+    )
+    with stack, tempfile.TemporaryDirectory(prefix="bench-suite-") as tmp:
+        for name, run in client_scenarios(stack, args.requests).items():
+            results[name] = measure(run)
+
+        env = stack.script_env(os.path.join(tmp, "config"))
+        env["KOMGA_GAP_CACHE"] = os.path.join(tmp, "komga-gap.sqlite")
+        validate = str(ROOT / "scripts" / "validate-services.py")
+        gap_report = str(ROOT / "scripts" / "komga-gap-report.py")
+        results["validate_services"] = run_script([validate], env, args.script_runs)
+        results["komga_gap_report_full"] = run_script([gap_report, "--full"], env, args.script_runs)
+        results["komga_gap_report_warm"] = run_script([gap_report], env, args.script_runs)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        pathlib.Path(args.output).write_text(text + "\n")
+
+    if args.baseline:
+        baseline = json.loads(pathlib.Path(args.baseline).read_text())
+        if baseline.get("config") != config:
+            sys.stderr.write("warning: baseline was run with different knobs; numbers may not compare\n")
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            sys.stderr.write(f"REGRESSION {line}\n")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
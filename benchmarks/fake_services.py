@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Fake Sonarr, Radarr, Prowlarr, SABnzbd, Komga, Traefik and Transmission
+servers for offline benchmarks.
+
+Each service is a StubServer with generated, deterministic data whose size
+is set by a few knobs, so client code and the report scripts can be run
+end to end without a stack:
+
+    with FakeStack(latency=0.005, series=300, books=80) as stack:
+        sonarr = ArrClient(stack.urls["sonarr"], FakeStack.API_KEY)
+        env = stack.script_env("/tmp/bench-config")   # for subprocess runs
+
+Komga book names skip every `gap_every`-th volume so the gap report has
+real gaps to find.
+"""
+
+import functools
+import os
+import pathlib
+from typing import Any, Dict, List
+
+from stub_server import StubServer
+
+SERVICES = ("sonarr", "radarr", "prowlarr", "sabnzbd", "komga", "traefik", "transmission")
+
+
+def _page(records: List[Dict[str, Any]], page: int, size: int) -> List[Dict[str, Any]]:
+    return records[page * size:(page + 1) * size]
+
+
+def arr_routes(app: str, series: int, queue: int, history: int, pad: int) -> Dict[str, Any]:
+    """Sonarr/Radarr v3 endpoints: status, full series list, paged queue and history."""
+    filler = "x" * pad
+    catalogue = [
+        {
+            "id": i,
+            "title": f"{app.title()} Title {i}",
+            "tvdbId": 100000 + i,
+            "path": f"/media/{app}/Title {i}",
+            "monitored": i % 5 != 0,
+            "overview": filler,
+            "statistics": {"episodeFileCount": i % 40, "sizeOnDisk": i * 1048576},
+        }
+        for i in range(1, series + 1)
+    ]
+
+    def records(total: int, kind: str) -> List[Dict[str, Any]]:
+        return [
+            {"id": i, "seriesId": i % max(series, 1) + 1, "eventType": kind, "sourceTitle": f"Release.{i}.{filler}"}
+            for i in range(1, total + 1)
+        ]
+
+    def paged(data: List[Dict[str, Any]]):
+        @functools.lru_cache(maxsize=256)
+        def render(page: int, size: int) -> Dict[str, Any]:
+            return {
+                "page": page,
+                "pageSize": size,
+                "totalRecords": len(data),
+                "records": _page(data, page - 1, size),
+            }
+
+        return lambda q: render(int(q.get("page", 1)), int(q.get("pageSize", 10)))
+
+    return {
+        "/api/v3/system/status": {"appName": app.title(), "version": "4.0.0.0"},
+        "/api/v3/series" if app == "sonarr" else "/api/v3/movie": catalogue,
+        "/api/v3/queue": paged(records(queue, "queued")),
+        "/api/v3/history": paged(records(history, "grabbed")),
+    }
+
+
+def sab_routes(slots: int, history: int, pad: int) -> Dict[str, Any]:
+    """SABnzbd /api with mode=version, queue and history honouring start/limit."""
+    filler = "x" * pad
+    queue = [
+        {
+            "nzo_id": f"SABnzbd_nzo_{i:06d}",
+            "filename": f"Release.{i}.{filler}",
+            "status": "Downloading" if i == 0 else "Queued",
+            "percentage": "0",
+            "mb": "1024.0",
+            "mbleft": "1024.0",
+            "index": i,
+        }
+        for i in range(slots)
+    ]
+    done = [
+        {"nzo_id": f"SABnzbd_nzo_h{i:06d}", "name": f"Done.{i}.{filler}", "status": "Completed", "bytes": 1 << 30}
+        for i in range(history)
+    ]
+
+    def api(q: Dict[str, str]):
+        mode = q.get("mode")
+        start, limit = int(q.get("start", 0)), int(q.get("limit", 0))
+        window = slice(start, start + limit if limit else None)
+        if mode == "version":
+            return {"version": "4.3.2"} if q.get("output") == "json" else b"4.3.2\n"
+        if mode == "queue":
+            return {"queue": {
+                "noofslots_total": len(queue),
+                "noofslots": len(queue[window]),
+                "kbpersec": "20480.0",
+                "mbleft": f"{1024.0 * len(queue):.1f}",
+                "paused": False,
+                "slots": queue[window],
+            }}
+        if mode == "history":
+            return {"history": {"noofslots": len(done), "slots": done[window]}}
+        return 400, {"status": False, "error": "unknown mode"}
+
+    return {"/api": api}
+
+
+def komga_routes(series: int, books: int, gap_every: int) -> Dict[str, Any]:
+    """Komga v1 endpoints: libraries and paged series and book listings."""
+    listing = [
+        {
+            "id": f"S{i:05d}",
+            "name": f"Series {i}",
+            "metadata": {"title": f"Series {i}"},
+            "booksCount": books,
+            "lastModified": "2024-01-01T00:00:00Z",
+        }
+        for i in range(series)
+    ]
+    names = [f"v{n:03d}.cbz" for n in range(1, books + 1) if gap_every <= 0 or n % gap_every]
+
+    def paged(content: List[Dict[str, Any]], q: Dict[str, str]) -> Dict[str, Any]:
+        page, size = int(q.get("page", 0)), int(q.get("size", 20))
+        chunk = _page(content, page, size)
+        return {
+            "content": chunk,
+            "number": page,
+            "size": size,
+            "totalElements": len(content),
+            "last": (page + 1) * size >= len(content),
+        }
+
+    def series_books(q: Dict[str, str], sid: str) -> Any:
+        content = [{"id": f"{sid}-{i}", "seriesId": sid, "name": f"{sid} {name}"} for i, name in enumerate(names)]
+        return paged(content, q)
+
+    return {
+        "/api/v1/libraries": [{"id": "L1", "name": "Comics"}],
+        "/api/v1/series": lambda q: paged(listing, q),
+        "/api/v1/series/{sid}/books": series_books,
+    }
+
+
+class FakeStack:
+    """Every fake service on its own localhost port, started and stopped together."""
+
+    API_KEY = "benchkey"
+    KOMGA_USER = "bench@example.com"
+    KOMGA_PASS = "bench"
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        series: int = 200,
+        books: int = 50,
+        queue: int = 500,
+        history: int = 2000,
+        pad: int = 200,
+        gap_every: int = 7,
+    ):
+        self.servers = {
+            "sonarr": StubServer(arr_routes("sonarr", series, queue, history, pad), latency),
+            "radarr": StubServer(arr_routes("radarr", series, queue, history, pad), latency),
+            "prowlarr": StubServer({"/api/v1/system/status": {"appName": "Prowlarr", "version": "1.0"}}, latency),
+            "sabnzbd": StubServer(sab_routes(queue, history, pad), latency),
+            "komga": StubServer(komga_routes(series, books, gap_every), latency),
+            "traefik": StubServer({"/dashboard/": lambda q: (401, b"")}, latency),
+            "transmission": StubServer({"/transmission/rpc": lambda q: (409, b"")}, latency),
+        }
+
+    @property
+    def urls(self) -> Dict[str, str]:
+        return {name: srv.url for name, srv in self.servers.items()}
+
+    @property
+    def hits(self) -> Dict[str, int]:
+        return {name: srv.hits for name, srv in self.servers.items()}
+
+    def write_configs(self, config_root: str) -> None:
+        """Lay out ARR config.xml and sabnzbd.ini files the way read_keys() expects."""
+        root = pathlib.Path(config_root)
+        for app in ("prowlarr", "sonarr", "radarr"):
+            (root / app).mkdir(parents=True, exist_ok=True)
+            (root / app / "config.xml").write_text(f"<Config><ApiKey>{self.API_KEY}</ApiKey></Config>\n")
+        (root / "sabnzbd").mkdir(parents=True, exist_ok=True)
+        (root / "sabnzbd" / "sabnzbd.ini").write_text(f"[misc]\napi_key = {self.API_KEY}\n")
+
+    def script_env(self, config_root: str) -> Dict[str, str]:
+        """Environment pointing validate-services.py and komga-gap-report.py at the fakes."""
+        self.write_configs(config_root)
+        env = dict(os.environ)
+        env.update({f"{name.upper()}_URL": url for name, url in self.urls.items()})
+        env.update(CONFIG_ROOT=config_root, KOMGA_USER=self.KOMGA_USER, KOMGA_PASS=self.KOMGA_PASS)
+        return env
+
+    def start(self) -> "FakeStack":
+        for srv in self.servers.values():
+            srv.start()
+        return self
+
+    def stop(self) -> None:
+        for srv in self.servers.values():
+            srv.stop()
+
+    def __enter__(self) -> "FakeStack":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
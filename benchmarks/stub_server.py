@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+In-process HTTP/1.1 stub server for offline benchmarks.
+
+Serves canned JSON bodies on localhost with keep-alive support so client
+transports can be measured without a running stack. Responses carry an
+ETag and honour If-None-Match with a 304.
+
+Usage:
+    with StubServer({"/api/v3/system/status": {"version": "4.0.0"}}) as srv:
+        client = ArrClient(srv.url, api_key="bench")
+        client.get_json("/api/v3/system/status")
+
+A route may also be a callable, evaluated per request with the parsed
+query string (last value wins) plus any {placeholders} captured from the
+path. It returns a body, or a (status, body) tuple:
+
+    def books(query, sid):
+        return {"content": [...], "last": True}
+
+    StubServer({"/api/v1/series/{sid}/books": books}, latency=0.02)
+
+`latency` adds a fixed delay (seconds) before every response.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+NOT_FOUND = b'{"error": "not found"}'
+
+
+def _encode(body: Any) -> bytes:
+    return body if isinstance(body, bytes) else json.dumps(body).encode()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self.server.hits += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        status, body = self.server.resolve(self.path)
+        if status != 200:
+            self.send_response(status)
+        else:
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", etag)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+    do_PUT = _reply
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, routes: Dict[str, Any], latency: float):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.hits = 0
+        self.latency = latency
+        self.routes: Dict[str, Any] = {}
+        self.patterns = []
+        for path, body in routes.items():
+            if not callable(body):
+                body = _encode(body)
+            if "{" in path:
+                regex = re.sub(r"\\\{(\w+)\\\}", r"(?P<\1>[^/]+)", re.escape(path))
+                self.patterns.append((re.compile(regex + "$"), body))
+            else:
+                self.routes[path] = body
+
+    def resolve(self, target: str) -> Tuple[int, bytes]:
+        path, _, query = target.partition("?")
+        body, params = self.routes.get(path), {}
+        if body is None:
+            for regex, candidate in self.patterns:
+                match = regex.match(path)
+                if match:
+                    body, params = candidate, match.groupdict()
+                    break
+        if body is None:
+            return 404, NOT_FOUND
+        if not callable(body):
+            return 200, body
+        result = body(dict(urllib.parse.parse_qsl(query)), **params)
+        if isinstance(result, tuple):
+            return result[0], _encode(result[1])
+        return 200, _encode(result)
+
+
+class StubServer:
+    """Threaded stub server bound to an ephemeral localhost port."""
+
+    def __init__(self, routes: Optional[Dict[str, Any]] = None, latency: float = 0.0):
+        self._httpd = _StubHTTPServer(routes or {}, latency)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def hits(self) -> int:
+        """Requests served so far."""
+        return self._httpd.hits
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -21,24 +21,1033 @@ Usage:
     # Komga
     komga = KomgaClient("http://localhost:8081", user="...", password="...")
     series = komga.get("/api/v1/series")
+
+Connections are kept alive and reused per host. Clients talking to the
+same hosts can share one pool:
+
+    pool = ConnectionPool(maxsize=8, idle_timeout=15)
+    sonarr = ArrClient("http://localhost:8989", api_key="...", pool=pool)
+    radarr = ArrClient("http://localhost:7878", api_key="...", pool=pool)
+
+Failures come back as (None, RequestError). A RequestError is still the
+error message string, with a `kind` (timeout, refused, circuit_open, ...).
+Idempotent calls are retried with jittered backoff, a per-host circuit
+breaker fails fast while a service is down, and `deadline` bounds the
+whole operation including retries:
+
+    radarr = ArrClient(url, api_key, deadline=15, retry=RetryPolicy(retries=3))
+    status, body = radarr.get("/api/v3/movie")
+    if status is None and body.kind == RequestError.CIRCUIT_OPEN:
+        ...
+
+Read-heavy endpoints can be served from an optional response cache with
+per-endpoint TTLs and ETag/Last-Modified revalidation:
+
+    cache = ResponseCache(ttls={r"/system/status$": 30, r"mode=version": 300})
+    sonarr = ArrClient(url, api_key, cache=cache)
+
+Paged collections can be walked lazily, one page in memory at a time:
+
+    for record in sonarr.iter_records("/api/v3/history", page_size=500):
+        ...
+    for book in komga.iter_records(f"/api/v1/series/{sid}/books"):
+        ...
+    for slot in sab.iter_slots("queue", page_size=100):
+        ...
+
+Clients handed a RequestScheduler share a per-host token bucket and
+concurrency cap, served by priority class, so bulk jobs use spare
+capacity without delaying health checks:
+
+    scheduler = shared_scheduler()
+    health = ArrClient(url, api_key, scheduler=scheduler, priority=RequestScheduler.INTERACTIVE)
+    report = ArrClient(url, api_key, scheduler=scheduler, priority=RequestScheduler.BULK)
+
+Large or unbounded bodies need not be held in memory. Downloads stream
+to disk in fixed-size chunks with an optional checksum, and probes can
+read just a prefix:
+
+    status, dl = komga.download(f"/api/v1/books/{bid}/file", "/tmp/book.cbz", checksum="sha256")
+    if status == 200:
+        print(dl.size, dl.checksum)
+    status, head = HTTPClient("http://localhost:8080").get("/", max_bytes=200)
+    status, raw = sab.get_bytes("/api?mode=get_config&output=json&apikey=...")
+
+Hooks see every call with its status, size, retries and DNS/connect/TTFB
+timings. Built-ins aggregate latency per route, log slow calls and write
+NDJSON traces:
+
+    stats = LatencyHistogram()
+    sonarr = ArrClient(url, api_key, hooks=[stats, SlowRequestLogger(threshold=2.0)])
+    ...
+    for row in stats.report():   # slowest p99 first
+        print(row["method"], row["route"], row["p50_ms"], row["p99_ms"])
 """
 
 import base64
+import errno
+import functools
+import hashlib
+import heapq
+import http.client
+import itertools
 import json
+import logging
 import os
 import pathlib
-import urllib.request
-import urllib.error
-import xml.etree.ElementTree as ET
-from typing import Optional, Dict, Any, Tuple
+import random
+import re
+import socket
+import ssl
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable, Iterator, List, NamedTuple, Tuple, Union
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+# Error bodies kept from a non-200 download response
+ERROR_BODY_LIMIT = 64 * 1024
+
+
+class RequestError(str):
+    """
+    Typed error result, returned in place of a response body.
+
+    Subclasses str so existing callers that slice or print the body keep
+    working; `kind` tells a timeout from a refused connection or an open
+    circuit.
+    """
+
+    TIMEOUT = "timeout"
+    REFUSED = "refused"
+    UNREACHABLE = "unreachable"
+    DNS = "dns"
+    RESET = "reset"
+    TLS = "tls"
+    PROTOCOL = "protocol"
+    REDIRECTS = "redirects"
+    CIRCUIT_OPEN = "circuit_open"
+    DEADLINE = "deadline"
+    THROTTLED = "throttled"
+    TOO_LARGE = "too_large"
+    OTHER = "error"
+
+    # Kinds that suggest the service is down or restarting
+    TRANSIENT = frozenset({TIMEOUT, REFUSED, UNREACHABLE, DNS, RESET})
+
+    kind: str
+
+    def __new__(cls, kind: str, message: str) -> "RequestError":
+        obj = super().__new__(cls, message)
+        obj.kind = kind
+        return obj
+
+    @property
+    def transient(self) -> bool:
+        return self.kind in self.TRANSIENT
+
+    @classmethod
+    def from_exception(cls, exc: BaseException) -> "RequestError":
+        if isinstance(exc, ResponseTooLarge):
+            kind = cls.TOO_LARGE
+        elif isinstance(exc, TimeoutError):
+            kind = cls.TIMEOUT
+        elif isinstance(exc, ConnectionRefusedError):
+            kind = cls.REFUSED
+        elif isinstance(exc, socket.gaierror):
+            kind = cls.DNS
+        elif isinstance(exc, ssl.SSLError):
+            kind = cls.TLS
+        elif isinstance(exc, ConnectionError):
+            kind = cls.RESET
+        elif isinstance(exc, http.client.HTTPException):
+            kind = cls.PROTOCOL
+        elif isinstance(exc, OSError) and exc.errno in (errno.EHOSTUNREACH, errno.ENETUNREACH):
+            kind = cls.UNREACHABLE
+        else:
+            kind = cls.OTHER
+        return cls(kind, str(exc) or exc.__class__.__name__)
+
+
+class ResponseTooLarge(Exception):
+    """A streamed body exceeded its max_bytes cap."""
+
+
+class Download(NamedTuple):
+    path: str
+    size: int
+    checksum: Optional[str]  # hex digest, when one was requested
+    content_type: Optional[str]
+
+
+def stream_to_file(
+    resp: http.client.HTTPResponse,
+    path: str,
+    checksum: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    chunk_size: int = 64 * 1024,
+) -> Union[Download, bytes]:
+    """
+    Copy a response body to `path` through one reused buffer, hashing it on the way.
+
+    The body lands in `path`.part and is renamed into place once complete,
+    so a failed or capped transfer never leaves a truncated file behind.
+    Non-200 responses are not written; their first ERROR_BODY_LIMIT bytes
+    are returned instead.
+    """
+    if resp.status != 200:
+        return resp.read(ERROR_BODY_LIMIT)
+    length = resp.getheader("Content-Length")
+    if max_bytes is not None and length and length.isdigit() and int(length) > max_bytes:
+        raise ResponseTooLarge(f"{length} bytes exceeds the {max_bytes} byte cap")
+
+    digest = hashlib.new(checksum) if checksum else None
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    size = 0
+    part = f"{path}.part"
+    try:
+        with open(part, "wb") as f:
+            while True:
+                n = resp.readinto(buf)
+                if not n:
+                    break
+                size += n
+                if max_bytes is not None and size > max_bytes:
+                    raise ResponseTooLarge(f"body exceeds the {max_bytes} byte cap")
+                f.write(view[:n])
+                if digest is not None:
+                    digest.update(view[:n])
+        os.replace(part, path)
+    except BaseException:
+        try:
+            os.remove(part)
+        except OSError:
+            pass
+        raise
+    return Download(path, size, digest.hexdigest() if digest else None, resp.getheader("Content-Type"))
+
+
+class PageFetchError(RuntimeError):
+    """Raised by the paginated iterators when a page cannot be fetched or decoded."""
+
+    def __init__(self, endpoint: str, status: Optional[int], body: str):
+        detail = f"HTTP {status}" if status is not None else body
+        super().__init__(f"{endpoint}: {detail}")
+        self.endpoint = endpoint
+        self.status = status
+        self.body = body
+
+
+def with_query(endpoint: str, **params: Any) -> str:
+    """Append URL-encoded params to an endpoint that may already have a query string."""
+    sep = "&" if "?" in endpoint else "?"
+    return f"{endpoint}{sep}{urllib.parse.urlencode(params)}"
+
+
+class RetryPolicy:
+    """
+    Retry transient failures of idempotent requests with jittered exponential backoff.
+
+    Delays are drawn uniformly from [0, min(max_backoff, backoff * 2**attempt)]
+    ("full jitter") so clients recovering from the same outage spread out.
+    """
+
+    IDEMPOTENT = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+    # Gateway answers while a container behind Traefik is restarting
+    RETRY_STATUSES = frozenset({502, 503, 504})
+
+    def __init__(self, retries: int = 2, backoff: float = 0.25, max_backoff: float = 4.0):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def should_retry(self, method: str, attempt: int, status: Optional[int], body: str) -> bool:
+        if attempt >= self.retries or method not in self.IDEMPOTENT:
+            return False
+        if status is None:
+            return isinstance(body, RequestError) and body.transient
+        return status in self.RETRY_STATUSES
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+NO_RETRY = RetryPolicy(retries=0)
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After `failure_threshold` consecutive transient failures the circuit
+    opens and requests fail fast for `reset_timeout` seconds. Then a single
+    probe request is let through (half-open); success closes the circuit,
+    failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return self.CLOSED
+            if self._probing or time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self.OPEN
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._probing = True
+            return True
+
+    def cancel(self) -> None:
+        """Give back a probe allow() granted for a request that was never sent."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(base_url: str) -> CircuitBreaker:
+    """Shared circuit breaker for a host, so every client of one service sees the same state."""
+    key = urllib.parse.urlsplit(base_url).netloc.lower()
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = CircuitBreaker()
+        return breaker
+
+
+class RequestScheduler:
+    """
+    Per-host request budget shared by every client that is handed the scheduler.
+
+    Each host (netloc) gets a token bucket (`rate` requests per second,
+    bursts up to `burst`) and a cap of `max_concurrent` requests in flight.
+    Waiting requests are served strictly by priority class, then in arrival
+    order, so a health check never queues behind a bulk report. BULK callers
+    may use at most `max_concurrent - reserved` slots, keeping capacity free
+    for latency-sensitive calls while otherwise running at full speed.
+
+    Limits can differ per host via set_limits(). The budget is per process;
+    separate processes each get their own.
+    """
+
+    INTERACTIVE = 0  # health checks, dashboards
+    INGEST = 1  # imports, scans, pollers (default)
+    BULK = 2  # reports, reconciliation, backfills
+
+    class _Host:
+        __slots__ = ("rate", "burst", "max_concurrent", "tokens", "stamp", "in_flight", "waiters")
+
+        def __init__(self, rate: Optional[float], burst: int, max_concurrent: int):
+            self.rate = rate
+            self.burst = burst
+            self.max_concurrent = max_concurrent
+            self.tokens = float(burst)
+            self.stamp = time.monotonic()
+            self.in_flight = 0
+            self.waiters: List[Tuple[int, int]] = []  # heap of (priority, arrival)
+
+    def __init__(
+        self,
+        rate: Optional[float] = 20.0,
+        burst: int = 10,
+        max_concurrent: int = 4,
+        reserved: int = 1,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.reserved = reserved
+        self._hosts: Dict[str, "RequestScheduler._Host"] = {}
+        self._cond = threading.Condition()
+        self._arrivals = itertools.count()
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        return urllib.parse.urlsplit(url).netloc.lower()
+
+    def set_limits(
+        self,
+        url: str,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_concurrent: Optional[int] = None,
+    ) -> None:
+        """Override the budget of one host (given as a URL or netloc)."""
+        key = self.host_key(url) if "//" in url else url.lower()
+        with self._cond:
+            host = self._host(key)
+            if rate is not None:
+                host.rate = rate
+            if burst is not None:
+                host.burst = burst
+                host.tokens = min(host.tokens, burst)
+            if max_concurrent is not None:
+                host.max_concurrent = max_concurrent
+            self._cond.notify_all()
+
+    def _host(self, key: str) -> "RequestScheduler._Host":
+        host = self._hosts.get(key)
+        if host is None:
+            host = self._hosts[key] = self._Host(self.rate, self.burst, self.max_concurrent)
+        return host
+
+    def _slots(self, host: "RequestScheduler._Host", priority: int) -> int:
+        if priority >= self.BULK:
+            return max(1, host.max_concurrent - self.reserved)
+        return host.max_concurrent
+
+    def acquire(self, url: str, priority: int = INGEST, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for a slot and a token on the host of `url`.
+
+        Returns False if `timeout` seconds passed first; every True must be
+        paired with release().
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        entry = (priority, next(self._arrivals))
+        with self._cond:
+            host = self._host(self.host_key(url))
+            heapq.heappush(host.waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if host.rate:
+                        host.tokens = min(host.burst, host.tokens + (now - host.stamp) * host.rate)
+                    host.stamp = now
+                    wait = None
+                    if host.waiters[0] == entry and host.in_flight < self._slots(host, priority):
+                        if not host.rate or host.tokens >= 1:
+                            heapq.heappop(host.waiters)
+                            if host.rate:
+                                host.tokens -= 1
+                            host.in_flight += 1
+                            entry = None
+                            return True
+                        wait = (1 - host.tokens) / host.rate
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                if entry is not None:
+                    host.waiters.remove(entry)
+                    heapq.heapify(host.waiters)
+                # The next waiter may be able to go now
+                self._cond.notify_all()
+
+    def release(self, url: str) -> None:
+        with self._cond:
+            self._host(self.host_key(url)).in_flight -= 1
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Current in-flight and queued requests per host."""
+        with self._cond:
+            return {
+                key: {"in_flight": host.in_flight, "queued": len(host.waiters), "tokens": round(host.tokens, 2)}
+                for key, host in self._hosts.items()
+            }
+
+
+_shared_scheduler: Optional[RequestScheduler] = None
+_shared_scheduler_lock = threading.Lock()
+
+
+def shared_scheduler() -> RequestScheduler:
+    """
+    Process-wide scheduler, sized from API_RATE, API_BURST and
+    API_MAX_CONCURRENT (per host; API_RATE=0 disables the token bucket).
+    """
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None:
+            rate = float(os.environ.get("API_RATE", "20"))
+            _shared_scheduler = RequestScheduler(
+                rate=rate or None,
+                burst=int(os.environ.get("API_BURST", "10")),
+                max_concurrent=int(os.environ.get("API_MAX_CONCURRENT", "4")),
+            )
+        return _shared_scheduler
+
+
+class _TimedHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection that resolves the host itself so DNS and TCP connect can be timed apart."""
+
+    dns_time = 0.0
+
+    def connect(self) -> None:
+        started = time.perf_counter()
+        addrs = socket.getaddrinfo(self.host, self.port, 0, socket.SOCK_STREAM)
+        self.dns_time = time.perf_counter() - started
+        error: Optional[OSError] = None
+        for family, socktype, proto, _, sockaddr in addrs:
+            sock = socket.socket(family, socktype, proto)
+            try:
+                if self.timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                    sock.settimeout(self.timeout)
+                sock.connect(sockaddr)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.sock = sock
+                return
+            except OSError as e:
+                sock.close()
+                error = e
+        raise error or OSError(f"getaddrinfo returned no addresses for {self.host}")
+
+
+class _TimedHTTPSConnection(http.client.HTTPSConnection, _TimedHTTPConnection):
+    """HTTPS variant; HTTPSConnection.connect() wraps the timed plain socket in TLS."""
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of keep-alive HTTP/1.1 connections, keyed by host.
+
+    Connections are checked out for the duration of one request and
+    returned afterwards. Up to ``maxsize`` idle connections are kept per
+    host; idle connections older than ``idle_timeout`` seconds are closed
+    rather than reused. ``maxsize=0`` disables reuse entirely.
+    """
+
+    def __init__(self, maxsize: int = 4, idle_timeout: float = 15.0):
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self._idle: Dict[Tuple[str, str, int], List[Tuple[float, http.client.HTTPConnection]]] = {}
+        self._lock = threading.Lock()
+
+    def _acquire(
+        self, key: Tuple[str, str, int], timeout: float
+    ) -> Tuple[http.client.HTTPConnection, bool]:
+        """Return (connection, reused) for key, preferring an idle connection."""
+        now = time.monotonic()
+        stale = []
+        conn = None
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                last_used, candidate = idle.pop()
+                if now - last_used <= self.idle_timeout:
+                    conn = candidate
+                    break
+                stale.append(candidate)
+        for c in stale:
+            c.close()
+
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+
+        scheme, host, port = key
+        if scheme == "https":
+            return _TimedHTTPSConnection(host, port, timeout=timeout), False
+        return _TimedHTTPConnection(host, port, timeout=timeout), False
+
+    def _release(self, key: Tuple[str, str, int], conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.maxsize:
+                idle.append((time.monotonic(), conn))
+                return
+        conn.close()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[bytes] = None,
+        timeout: float = 10,
+        timings: Optional[Dict[str, float]] = None,
+        reader: Optional[Callable[[http.client.HTTPResponse], Any]] = None,
+    ) -> Tuple[int, http.client.HTTPMessage, Any]:
+        """
+        Send one request over a pooled connection.
+
+        A reused connection that the server has already closed is retried
+        once on a fresh connection. Other errors propagate to the caller.
+        If `timings` is given it is filled with dns, connect, ttfb and total
+        seconds (dns/connect are 0 on a reused connection) and `reused`.
+        `reader` replaces resp.read() and its result is returned as the
+        body; a connection whose body was not read to the end is closed.
+
+        Returns:
+            Tuple of (status_code, response_headers, response_body)
+        """
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname or "localhost", port)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+
+        for attempt in range(2):
+            started = time.perf_counter()
+            conn, reused = self._acquire(key, timeout)
+            try:
+                connect_time = 0.0
+                if not reused:
+                    conn.connect()
+                    connect_time = time.perf_counter() - started
+                conn.request(method, target, body=data, headers=headers or {})
+                resp = conn.getresponse()
+                ttfb = time.perf_counter() - started
+                body = resp.read() if reader is None else reader(resp)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            if timings is not None:
+                dns = getattr(conn, "dns_time", 0.0) if not reused else 0.0
+                timings.update(
+                    dns=dns,
+                    connect=connect_time - dns,
+                    ttfb=ttfb,
+                    total=time.perf_counter() - started,
+                    reused=float(reused),
+                )
+            if resp.will_close or not resp.isclosed():
+                conn.close()
+            else:
+                self._release(key, conn)
+            return resp.status, resp.headers, body
+        raise http.client.RemoteDisconnected("connection closed by server")
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for _, conn in conns:
+                conn.close()
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of GET responses, bounded by total body bytes.
+
+    Only endpoints matching a TTL rule are cached. `ttls` maps regular
+    expressions (searched against the endpoint, query included) to
+    seconds; the first match wins, and `default_ttl` applies when nothing
+    matches (None = don't cache). Within its TTL an entry is served with no
+    network I/O. After that, if the server sent an ETag or Last-Modified,
+    the request is revalidated and a 304 refreshes the entry in place.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: Optional[float] = None,
+        max_bytes: int = 8 * 1024 * 1024,
+    ):
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in (ttls or {}).items()]
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.revalidations = 0
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ttl_for(self, endpoint: str) -> Optional[float]:
+        for pattern, ttl in self.ttls:
+            if pattern.search(endpoint):
+                return ttl
+        return self.default_ttl
+
+    @staticmethod
+    def key(url: str, headers: Optional[Dict[str, str]]) -> Tuple:
+        # Headers are part of the key so clients with different credentials never share entries
+        return (url, tuple(sorted((headers or {}).items())))
+
+    def get_fresh(self, key: Tuple) -> Optional[Tuple[int, str]]:
+        """Return (status, body) if a non-expired entry exists."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["expires"] <= time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["status"], entry["body"].decode("utf-8", errors="replace")
+
+    def validators(self, key: Tuple) -> Dict[str, str]:
+        """Conditional request headers for a stale entry, if it has any validators."""
+        with self._lock:
+            entry = self._entries.get(key)
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def revalidated(self, key: Tuple, ttl: float) -> Optional[Tuple[int, str]]:
+        """Handle a 304: extend the entry's lifetime and return its cached response."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry["expires"] = time.monotonic() + ttl
+            self._entries.move_to_end(key)
+            self.revalidations += 1
+            return entry["status"], entry["body"].decode("utf-8", errors="replace")
+
+    def store(self, key: Tuple, ttl: float, status: int, headers: http.client.HTTPMessage, body: bytes) -> None:
+        if len(body) > self.max_bytes or "no-store" in (headers.get("Cache-Control") or ""):
+            return
+        entry = {
+            "status": status,
+            "body": body,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "expires": time.monotonic() + ttl,
+        }
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old["body"])
+            self._entries[key] = entry
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted["body"])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class RequestTrace:
+    """
+    Timing and outcome of one client call, handed to request hooks.
+
+    dns/connect/ttfb are seconds spent in the network for the final attempt
+    (dns and connect are 0 when a pooled connection was reused); total is the
+    wall time of the whole call including retries and backoff.
+    """
+
+    __slots__ = (
+        "method", "endpoint", "url", "status", "bytes", "dns", "connect",
+        "ttfb", "total", "queued", "retries", "reused", "cached", "error", "started_at",
+    )
+
+    def __init__(self, method: str, endpoint: str, url: str):
+        self.method = method
+        self.endpoint = endpoint
+        self.url = url
+        self.status: Optional[int] = None
+        self.bytes = 0
+        self.dns = 0.0
+        self.connect = 0.0
+        self.ttfb = 0.0
+        self.total = 0.0
+        self.queued = 0.0  # time spent waiting on the scheduler
+        self.retries = 0
+        self.reused = False
+        self.cached = False
+        self.error: Optional[str] = None  # RequestError.kind on failure
+        self.started_at = time.time()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class RequestHook:
+    """
+    Base class for request instrumentation. Override either callback.
+
+    Hooks run on the calling thread; exceptions they raise are ignored so
+    instrumentation can never break a request.
+    """
+
+    def before_request(self, trace: RequestTrace) -> None:
+        pass
+
+    def after_request(self, trace: RequestTrace) -> None:
+        pass
+
+
+# Numeric path segments and SABnzbd's apikey are folded so stats group by route
+_ID_SEGMENT_RE = re.compile(r"/\d+(?=/|$|\?)")
+_APIKEY_RE = re.compile(r"(apikey=)[^&]*")
+
+
+def endpoint_route(endpoint: str) -> str:
+    """Group key for an endpoint: ids become {id}, query values are dropped."""
+    path, _, query = endpoint.partition("?")
+    route = _ID_SEGMENT_RE.sub("/{id}", path)
+    if query:
+        # Keep SABnzbd's mode, which selects the operation
+        mode = re.search(r"(?:^|&)mode=([^&]*)", query)
+        route += f"?mode={mode.group(1)}" if mode else ""
+    return route
+
+
+class LatencyHistogram(RequestHook):
+    """In-memory per-route latency aggregator; report() summarises it."""
+
+    def __init__(self, max_samples: int = 10000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def after_request(self, trace: RequestTrace) -> None:
+        key = (trace.method, endpoint_route(trace.endpoint))
+        with self._lock:
+            entry = self._routes.setdefault(
+                key, {"count": 0, "errors": 0, "cached": 0, "bytes": 0, "retries": 0, "samples": []}
+            )
+            entry["count"] += 1
+            entry["bytes"] += trace.bytes
+            entry["retries"] += trace.retries
+            entry["cached"] += trace.cached
+            if trace.status is None or trace.status >= 500:
+                entry["errors"] += 1
+            samples = entry["samples"]
+            if len(samples) < self.max_samples:
+                samples.append(trace.total)
+            else:
+                # Reservoir sampling keeps percentiles representative on long runs
+                slot = random.randrange(entry["count"])
+                if slot < self.max_samples:
+                    samples[slot] = trace.total
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Per-route stats in milliseconds, slowest p99 first."""
+        rows = []
+        with self._lock:
+            for (method, route), entry in self._routes.items():
+                samples = sorted(entry["samples"])
+                n = len(samples)
+                rows.append({
+                    "method": method,
+                    "route": route,
+                    "count": entry["count"],
+                    "errors": entry["errors"],
+                    "cached": entry["cached"],
+                    "retries": entry["retries"],
+                    "bytes": entry["bytes"],
+                    "mean_ms": round(1000 * sum(samples) / n, 2),
+                    "p50_ms": round(1000 * samples[n // 2], 2),
+                    "p99_ms": round(1000 * samples[min(n - 1, int(n * 0.99))], 2),
+                    "max_ms": round(1000 * samples[-1], 2),
+                })
+        rows.sort(key=lambda r: r["p99_ms"], reverse=True)
+        return rows
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+class SlowRequestLogger(RequestHook):
+    """Logs calls slower than `threshold` seconds (and failures) to the api_client logger."""
+
+    def __init__(self, threshold: float = 1.0, logger: Optional[logging.Logger] = None):
+        self.threshold = threshold
+        self.logger = logger or logging.getLogger("api_client")
+
+    def after_request(self, trace: RequestTrace) -> None:
+        if trace.total < self.threshold and trace.error is None:
+            return
+        self.logger.warning(
+            "%s %s -> %s in %.0fms (dns %.0fms, connect %.0fms, ttfb %.0fms, %d retries, %d bytes)",
+            trace.method, _APIKEY_RE.sub(r"\1***", trace.endpoint), trace.status or trace.error,
+            trace.total * 1000, trace.dns * 1000, trace.connect * 1000, trace.ttfb * 1000,
+            trace.retries, trace.bytes,
+        )
+
+
+class NDJSONTraceWriter(RequestHook):
+    """Appends one JSON object per call to a file path or open text stream."""
+
+    def __init__(self, target: Any):
+        self._own = isinstance(target, (str, os.PathLike))
+        self._fh = open(target, "a", encoding="utf-8") if self._own else target
+        self._lock = threading.Lock()
+
+    def after_request(self, trace: RequestTrace) -> None:
+        record = trace.as_dict()
+        record["endpoint"] = _APIKEY_RE.sub(r"\1***", trace.endpoint)
+        record["url"] = _APIKEY_RE.sub(r"\1***", trace.url)
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+
+    def close(self) -> None:
+        if self._own:
+            self._fh.close()
+
+
+def _run_hooks(hooks: List[RequestHook], callback: str, trace: RequestTrace) -> None:
+    for hook in hooks:
+        try:
+            getattr(hook, callback)(trace)
+        except Exception:
+            pass
 
 
 class HTTPClient:
-    """Base HTTP client with timeout and error handling."""
+    """
+    Base HTTP client with timeout and error handling.
 
-    def __init__(self, base_url: str, timeout: int = 10):
+    Args:
+        timeout: socket timeout per attempt, in seconds
+        pool: connection pool to share with other clients
+        retry: retry policy for idempotent requests (default: 2 retries)
+        breaker: circuit breaker (default: shared per host)
+        deadline: overall budget per call in seconds, covering retries,
+            backoff and redirects; None means no overall limit
+        cache: response cache for GET requests (default: none)
+        hooks: RequestHook instances notified before and after every call
+        scheduler: RequestScheduler to take a slot from before every attempt
+            (e.g. shared_scheduler()); None sends immediately
+        priority: RequestScheduler class of this client's calls
+    """
+
+    # Auth/default headers; subclasses set their own
+    _headers: Dict[str, str] = {}
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: int = 10,
+        pool: Optional[ConnectionPool] = None,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        deadline: Optional[float] = None,
+        cache: Optional[ResponseCache] = None,
+        hooks: Optional[List[RequestHook]] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        priority: int = RequestScheduler.INGEST,
+    ):
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
+        self.pool = pool if pool is not None else ConnectionPool()
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.breaker = breaker if breaker is not None else breaker_for(self.base_url)
+        self.deadline = deadline
+        self.cache = cache
+        self.hooks = list(hooks) if hooks else []
+        self.scheduler = scheduler
+        self.priority = priority
+
+    def __enter__(self) -> "HTTPClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close idle pooled connections."""
+        self.pool.close()
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        data: Optional[bytes],
+        timeout: float,
+        cache_key: Optional[Tuple] = None,
+        ttl: Optional[float] = None,
+        timings: Optional[Dict[str, float]] = None,
+        reader: Optional[Callable[[http.client.HTTPResponse], Any]] = None,
+    ) -> Tuple[Optional[int], Any]:
+        """
+        One attempt, following GET/HEAD redirects and revalidating cached entries.
+
+        With a `reader` the final response body is whatever it returns,
+        undecoded; redirect responses are always read normally.
+        """
+        request_headers = headers
+        if cache_key is not None:
+            validators = self.cache.validators(cache_key)
+            if validators:
+                request_headers = {**(headers or {}), **validators}
+        read = None
+        if reader is not None:
+            def read(resp: http.client.HTTPResponse) -> Any:
+                if resp.status in REDIRECT_CODES and resp.getheader("Location") and method in ("GET", "HEAD"):
+                    return resp.read()
+                return reader(resp)
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                status, resp_headers, body = self.pool.request(
+                    method, url, request_headers, data, timeout, timings, read
+                )
+                if timings is not None:
+                    timings["bytes"] = body.size if isinstance(body, Download) else len(body)
+                location = resp_headers.get("Location")
+                if status in REDIRECT_CODES and location and method in ("GET", "HEAD"):
+                    url = urllib.parse.urljoin(url, location)
+                    continue
+                if reader is not None:
+                    return status, body
+                if cache_key is not None:
+                    if status == 304:
+                        cached = self.cache.revalidated(cache_key, ttl)
+                        if cached is not None:
+                            return cached
+                        if request_headers is not headers:
+                            # Evicted or cleared since validators() ran; ask again unconditionally
+                            request_headers = headers
+                            continue
+                    elif status == 200:
+                        self.cache.store(cache_key, ttl, status, resp_headers, body)
+                return status, body.decode("utf-8", errors="replace")
+            return None, RequestError(RequestError.REDIRECTS, f"Too many redirects: {url}")
+        except Exception as e:
+            return None, RequestError.from_exception(e)
 
     def _request(
         self,
@@ -46,28 +1055,184 @@ class HTTPClient:
         endpoint: str,
         headers: Optional[Dict[str, str]] = None,
         data: Optional[bytes] = None,
-    ) -> Tuple[Optional[int], str]:
+        reader: Optional[Callable[[http.client.HTTPResponse], Any]] = None,
+    ) -> Tuple[Optional[int], Any]:
         """
-        Make an HTTP request.
+        Make an HTTP request, retrying transient failures within the deadline.
+
+        `reader` consumes the response in place of read-and-decode (see
+        get_bytes and download); such requests bypass the response cache.
 
         Returns:
             Tuple of (status_code, response_body)
-            status_code is None on connection errors
+            status_code is None on connection errors, and the body is then a
+            RequestError describing what went wrong
         """
+        if not self.hooks:
+            return self._attempts(method, endpoint, headers, data, reader=reader)
+
+        trace = RequestTrace(method, endpoint, f"{self.base_url}{endpoint}")
+        _run_hooks(self.hooks, "before_request", trace)
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        status, body = self._attempts(method, endpoint, headers, data, timings, trace, reader)
+        trace.total = time.perf_counter() - started
+        trace.status = status
+        if isinstance(body, RequestError):
+            trace.error = body.kind
+        if trace.cached:
+            trace.bytes = len(body)
+        elif timings:
+            trace.bytes = int(timings.get("bytes", 0))
+            trace.dns = timings.get("dns", 0.0)
+            trace.connect = timings.get("connect", 0.0)
+            trace.ttfb = timings.get("ttfb", 0.0)
+            trace.reused = bool(timings.get("reused"))
+        _run_hooks(self.hooks, "after_request", trace)
+        return status, body
+
+    def _attempts(
+        self,
+        method: str,
+        endpoint: str,
+        headers: Optional[Dict[str, str]],
+        data: Optional[bytes],
+        timings: Optional[Dict[str, float]] = None,
+        trace: Optional[RequestTrace] = None,
+        reader: Optional[Callable[[http.client.HTTPResponse], Any]] = None,
+    ) -> Tuple[Optional[int], Any]:
+        """The retry loop behind _request; fills timings/trace when instrumented."""
         url = f"{self.base_url}{endpoint}"
-        req = urllib.request.Request(url, data=data, headers=headers or {}, method=method)
+        cache_key, ttl = None, None
+        if self.cache is not None and method == "GET" and reader is None:
+            ttl = self.cache.ttl_for(endpoint)
+            if ttl is not None:
+                cache_key = self.cache.key(url, headers)
+                hit = self.cache.get_fresh(cache_key)
+                if hit is not None:
+                    if trace is not None:
+                        trace.cached = True
+                    return hit
 
-        try:
-            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
-                body = resp.read().decode("utf-8", errors="replace")
-                return resp.status, body
-        except urllib.error.HTTPError as e:
-            return e.code, e.read().decode("utf-8", errors="replace")
-        except Exception as e:
-            return None, str(e)
+        started = time.monotonic()
+        attempt = 0
+
+        while True:
+            timeout = self.timeout
+            if self.deadline is not None:
+                remaining = self.deadline - (time.monotonic() - started)
+                if remaining <= 0:
+                    return None, RequestError(
+                        RequestError.DEADLINE, f"Deadline of {self.deadline}s exceeded: {url}"
+                    )
+                timeout = min(timeout, remaining)
+            if not self.breaker.allow():
+                if attempt:
+                    # Our own failures just opened the circuit; report what actually failed
+                    return status, body
+                return None, RequestError(RequestError.CIRCUIT_OPEN, f"Circuit open for {self.base_url}")
+
+            if trace is not None:
+                trace.retries = attempt
+            if self.scheduler is None:
+                status, body = self._send(method, url, headers, data, timeout, cache_key, ttl, timings, reader)
+            else:
+                queued = time.monotonic()
+                wait = None if self.deadline is None else self.deadline - (queued - started)
+                if not self.scheduler.acquire(self.base_url, self.priority, wait):
+                    # Nothing reached the host: neither a success nor a failure
+                    self.breaker.cancel()
+                    return None, RequestError(RequestError.THROTTLED, f"No request slot for {self.base_url}")
+                queued = time.monotonic() - queued
+                if trace is not None:
+                    trace.queued += queued
+                try:
+                    # Time spent queued counts against the deadline, not the socket timeout
+                    if self.deadline is not None:
+                        timeout = max(0.001, min(timeout, self.deadline - (time.monotonic() - started)))
+                    status, body = self._send(method, url, headers, data, timeout, cache_key, ttl, timings, reader)
+                finally:
+                    self.scheduler.release(self.base_url)
+            if status in RetryPolicy.RETRY_STATUSES or (
+                isinstance(body, RequestError) and body.transient
+            ):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+            if not self.retry.should_retry(method, attempt, status, body):
+                return status, body
+            delay = self.retry.delay(attempt)
+            if self.deadline is not None and time.monotonic() - started + delay >= self.deadline:
+                return status, body
+            time.sleep(delay)
+            attempt += 1
+
+    def get(
+        self,
+        endpoint: str,
+        headers: Optional[Dict[str, str]] = None,
+        max_bytes: Optional[int] = None,
+    ) -> Tuple[Optional[int], str]:
+        """
+        GET decoded as text.
+
+        With `max_bytes` at most that many bytes are read and the rest is
+        dropped without any error: a longer body still comes back with its
+        200 status, cut short. Use download() to fail on an oversized body.
+        """
+        if max_bytes is None:
+            return self._request("GET", endpoint, headers)
+        status, body = self.get_bytes(endpoint, headers, max_bytes)
+        if isinstance(body, bytes):
+            body = body.decode("utf-8", errors="replace")
+        return status, body
+
+    def get_bytes(
+        self,
+        endpoint: str,
+        headers: Optional[Dict[str, str]] = None,
+        max_bytes: Optional[int] = None,
+    ) -> Tuple[Optional[int], Union[bytes, RequestError]]:
+        """
+        GET returning the raw body bytes, not decoded and not cached.
+
+        With `max_bytes` the body is truncated to at most that many bytes,
+        silently: the status is still 200 and nothing marks the body as cut
+        short (download() fails with too_large instead). The rest is never
+        read off the socket; the connection is dropped rather than returned
+        to the pool.
+        """
+        headers = {**self._headers, **(headers or {})}
+        return self._request("GET", endpoint, headers, reader=lambda resp: resp.read(max_bytes))
+
+    def download(
+        self,
+        endpoint: str,
+        path: str,
+        headers: Optional[Dict[str, str]] = None,
+        checksum: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        chunk_size: int = 64 * 1024,
+    ) -> Tuple[Optional[int], Union[Download, str]]:
+        """
+        Stream a GET response to `path` in `chunk_size` pieces; memory use does not grow with the body.
 
-    def get(self, endpoint: str, headers: Optional[Dict[str, str]] = None) -> Tuple[Optional[int], str]:
-        return self._request("GET", endpoint, headers)
+        `checksum` names a hashlib algorithm (e.g. "sha256") computed while
+        writing. A body over `max_bytes` is abandoned with a too_large
+        RequestError and nothing is left on disk.
+
+        Returns:
+            (200, Download) on success; (status, error body text) for any other
+            status; (None, RequestError) on connection errors
+        """
+        reader = functools.partial(
+            stream_to_file, path=path, checksum=checksum, max_bytes=max_bytes, chunk_size=chunk_size
+        )
+        status, body = self._request("GET", endpoint, {**self._headers, **(headers or {})}, reader=reader)
+        if isinstance(body, bytes):
+            body = body.decode("utf-8", errors="replace")
+        return status, body
 
     def post(
         self,
@@ -78,6 +1243,15 @@ class HTTPClient:
         encoded = data.encode("utf-8") if data else None
         return self._request("POST", endpoint, headers, encoded)
 
+    def put(
+        self,
+        endpoint: str,
+        data: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[Optional[int], str]:
+        encoded = data.encode("utf-8") if data else None
+        return self._request("PUT", endpoint, headers, encoded)
+
 
 class ArrClient(HTTPClient):
     """
@@ -86,8 +1260,8 @@ class ArrClient(HTTPClient):
     Uses X-Api-Key header for authentication.
     """
 
-    def __init__(self, base_url: str, api_key: str, timeout: int = 10):
-        super().__init__(base_url, timeout)
+    def __init__(self, base_url: str, api_key: str, timeout: int = 10, **kwargs):
+        super().__init__(base_url, timeout, **kwargs)
         self.api_key = api_key
         self._headers = {
             "X-Api-Key": api_key,
@@ -95,12 +1269,20 @@ class ArrClient(HTTPClient):
             "Accept": "application/json",
         }
 
-    def get(self, endpoint: str) -> Tuple[Optional[int], str]:
-        return super().get(endpoint, self._headers)
+    def get(
+        self,
+        endpoint: str,
+        headers: Optional[Dict[str, str]] = None,
+        max_bytes: Optional[int] = None,
+    ) -> Tuple[Optional[int], str]:
+        return super().get(endpoint, {**self._headers, **(headers or {})}, max_bytes)
 
     def post(self, endpoint: str, data: Optional[str] = None) -> Tuple[Optional[int], str]:
         return super().post(endpoint, data, self._headers)
 
+    def put(self, endpoint: str, data: Optional[str] = None) -> Tuple[Optional[int], str]:
+        return super().put(endpoint, data, self._headers)
+
     def get_json(self, endpoint: str) -> Optional[Dict[str, Any]]:
         """GET request returning parsed JSON or None on error."""
         status, body = self.get(endpoint)
@@ -121,6 +1303,35 @@ class ArrClient(HTTPClient):
                 return None
         return None
 
+    def iter_pages(self, endpoint: str, page_size: int = 250, **params: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Yield each page of an ARR paged endpoint (/api/v3/history, /api/v3/queue, ...).
+
+        Pages are requested with page/pageSize (1-based) until totalRecords is
+        covered or a page comes back empty. Extra params (sortKey, sortDirection,
+        ...) are passed through. Raises PageFetchError if a page fails.
+        """
+        page = 1
+        while True:
+            request = with_query(endpoint, **params, page=page, pageSize=page_size)
+            status, body = self.get(request)
+            if status != 200:
+                raise PageFetchError(request, status, body)
+            try:
+                data = json.loads(body)
+            except json.JSONDecodeError:
+                raise PageFetchError(request, status, "invalid JSON")
+            yield data
+            records = data.get("records") or []
+            if not records or page * page_size >= data.get("totalRecords", 0):
+                break
+            page += 1
+
+    def iter_records(self, endpoint: str, page_size: int = 250, **params: Any) -> Iterator[Dict[str, Any]]:
+        """Yield records of an ARR paged endpoint lazily, holding one page at a time."""
+        for page in self.iter_pages(endpoint, page_size, **params):
+            yield from page.get("records") or []
+
     def is_healthy(self) -> bool:
         """Check if service is responding."""
         data = self.get_json("/api/v3/system/status")
@@ -134,8 +1345,8 @@ class SabClient(HTTPClient):
     Uses apikey query parameter for authentication.
     """
 
-    def __init__(self, base_url: str, api_key: str, timeout: int = 10):
-        super().__init__(base_url, timeout)
+    def __init__(self, base_url: str, api_key: str, timeout: int = 10, **kwargs):
+        super().__init__(base_url, timeout, **kwargs)
         self.api_key = api_key
 
     def call(self, params: str) -> Tuple[Optional[int], str]:
@@ -161,6 +1372,39 @@ class SabClient(HTTPClient):
                 return None
         return None
 
+    def iter_pages(self, mode: str, page_size: int = 100, **params: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Yield each page of the SABnzbd queue or history (mode="queue"/"history").
+
+        Pages are requested with start/limit until the slot total
+        (noofslots_total for the queue, noofslots for history) is covered or
+        a page comes back empty. Yields the inner "queue"/"history" object.
+        Raises PageFetchError if a page fails.
+        """
+        start = 0
+        while True:
+            request = urllib.parse.urlencode(
+                {"mode": mode, "output": "json", **params, "start": start, "limit": page_size}
+            )
+            status, body = self.call(request)
+            if status != 200:
+                raise PageFetchError(f"mode={mode}&start={start}", status, body)
+            try:
+                data = json.loads(body).get(mode) or {}
+            except (json.JSONDecodeError, AttributeError):
+                raise PageFetchError(f"mode={mode}&start={start}", status, "invalid JSON")
+            yield data
+            slots = data.get("slots") or []
+            total = data.get("noofslots_total", data.get("noofslots", 0))
+            start += len(slots)
+            if not slots or start >= int(total or 0):
+                break
+
+    def iter_slots(self, mode: str, page_size: int = 100, **params: Any) -> Iterator[Dict[str, Any]]:
+        """Yield queue or history slots lazily, holding one page at a time."""
+        for page in self.iter_pages(mode, page_size, **params):
+            yield from page.get("slots") or []
+
     def is_healthy(self) -> bool:
         """Check if SABnzbd is responding."""
         status, body = self.call("mode=version")
@@ -174,16 +1418,25 @@ class KomgaClient(HTTPClient):
     Uses Basic Auth for authentication.
     """
 
-    def __init__(self, base_url: str, user: str, password: str, timeout: int = 10):
-        super().__init__(base_url, timeout)
+    def __init__(self, base_url: str, user: str, password: str, timeout: int = 10, **kwargs):
+        super().__init__(base_url, timeout, **kwargs)
         auth_str = base64.b64encode(f"{user}:{password}".encode()).decode()
         self._headers = {
             "Authorization": f"Basic {auth_str}",
             "Accept": "application/json",
         }
 
-    def get(self, endpoint: str) -> Tuple[Optional[int], str]:
-        return super().get(endpoint, self._headers)
+    def get(
+        self,
+        endpoint: str,
+        headers: Optional[Dict[str, str]] = None,
+        max_bytes: Optional[int] = None,
+    ) -> Tuple[Optional[int], str]:
+        return super().get(endpoint, {**self._headers, **(headers or {})}, max_bytes)
+
+    def post(self, endpoint: str, data: Optional[str] = None) -> Tuple[Optional[int], str]:
+        headers = {**self._headers, "Content-Type": "application/json"} if data else self._headers
+        return super().post(endpoint, data, headers)
 
     def get_json(self, endpoint: str) -> Optional[Dict[str, Any]]:
         """GET request returning parsed JSON."""
@@ -195,6 +1448,33 @@ class KomgaClient(HTTPClient):
                 return None
         return None
 
+    def iter_pages(self, endpoint: str, page_size: int = 500, **params: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Yield each page of a Komga paged listing (page/size, 0-based).
+
+        Stops after the page marked `last` or an empty page. Raises
+        PageFetchError if a page fails.
+        """
+        page = 0
+        while True:
+            request = with_query(endpoint, **params, page=page, size=page_size)
+            status, body = self.get(request)
+            if status != 200:
+                raise PageFetchError(request, status, body)
+            try:
+                data = json.loads(body)
+            except json.JSONDecodeError:
+                raise PageFetchError(request, status, "invalid JSON")
+            yield data
+            if data.get("last", True) or not data.get("content"):
+                break
+            page += 1
+
+    def iter_records(self, endpoint: str, page_size: int = 500, **params: Any) -> Iterator[Dict[str, Any]]:
+        """Yield items of a Komga paged listing lazily, holding one page at a time."""
+        for page in self.iter_pages(endpoint, page_size, **params):
+            yield from page.get("content") or []
+
     def is_healthy(self) -> bool:
         """Check if Komga is responding."""
         status, _ = self.get("/api/v1/libraries")
@@ -205,6 +1485,8 @@ class KomgaClient(HTTPClient):
 
 def read_api_key_xml(path: pathlib.Path) -> Optional[str]:
     """Read API key from ARR service config.xml file."""
+    import xml.etree.ElementTree as ET  # only needed here; keeps client imports light
+
     if not path.exists():
         return None
     try:
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Batched bulk edits and commands for Sonarr and Radarr.
+
+Instead of one POST per series or movie, ids are grouped into the ARR bulk
+endpoints:
+
+    PUT  /api/v3/series/editor   {"seriesIds": [...], "monitored": true, ...}
+    PUT  /api/v3/movie/editor    {"movieIds": [...], "tags": [3], "applyTags": "add"}
+    POST /api/v3/command         {"name": "RefreshSeries", "seriesIds": [...]}
+
+Ids are split into chunks of `chunk_size` and at most `max_in_flight`
+requests or commands run at once. Every call returns futures immediately.
+A command's future resolves once polling /api/v3/command/{id} shows it
+completed, so the caller never blocks on the ARR task queue; a command
+that ends failed, aborted or otherwise fails its future with BatchError.
+
+Usage:
+    from arr_batch import ArrBatch, wait_all
+
+    with ArrBatch(sonarr, "series", chunk_size=200, max_in_flight=2) as batch:
+        edits = batch.edit(series_ids, tags=[5], applyTags="add")
+        commands = batch.command("RefreshSeries", series_ids)
+        ...                                   # free to do other work
+        for result in wait_all(commands):     # raises BatchError on failure
+            print(result["id"], result["status"])
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    from .api_client import ArrClient
+except ImportError:
+    from api_client import ArrClient
+
+# Command states after which /command/{id} will not change again
+FINISHED = {"completed", "failed", "aborted", "cancelled", "orphaned"}
+
+
+class BatchError(RuntimeError):
+    """
+    A bulk request or command failed, or a command did not finish in time.
+
+    `record` is the last /command/{id} record for a command that finished
+    unsuccessfully, else None.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        status: Optional[int],
+        body: str,
+        record: Optional[Dict[str, Any]] = None,
+    ):
+        super().__init__(f"{endpoint} failed (status {status}): {body[:200]}")
+        self.endpoint = endpoint
+        self.status = status
+        self.body = body
+        self.record = record
+
+
+def chunked(ids: Iterable[int], size: int) -> Iterable[List[int]]:
+    chunk: List[int] = []
+    for item in ids:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def wait_all(futures: Iterable[Future]) -> List[Any]:
+    """Results of `futures` in order; raises the first failure."""
+    return [future.result() for future in futures]
+
+
+class ArrBatch:
+    """
+    Chunked, concurrency-capped bulk operations on one ARR instance.
+
+    Args:
+        client: ArrClient for Sonarr ("series") or Radarr ("movie")
+        kind: "series" or "movie"; selects the editor endpoint and id key
+        chunk_size: ids per request or command
+        max_in_flight: concurrent editor requests or unfinished commands
+        poll_interval: first delay between /command/{id} polls; doubles up
+            to max_poll_interval
+        command_timeout: seconds before an unfinished command's future
+            fails with BatchError
+    """
+
+    def __init__(
+        self,
+        client: ArrClient,
+        kind: str,
+        chunk_size: int = 100,
+        max_in_flight: int = 4,
+        poll_interval: float = 0.5,
+        max_poll_interval: float = 5.0,
+        command_timeout: float = 1800.0,
+        api_base: str = "/api/v3",
+    ):
+        if kind not in ("series", "movie"):
+            raise ValueError(f"kind must be 'series' or 'movie', not {kind!r}")
+        self.client = client
+        self.kind = kind
+        self.ids_key = f"{kind}Ids"
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.command_timeout = command_timeout
+        self.api_base = api_base.rstrip("/")
+        # One worker per in-flight slot: a command holds its worker until it finishes
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix=f"arr-batch-{kind}")
+        self._closed = threading.Event()
+
+    def __enter__(self) -> "ArrBatch":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self, wait: bool = True) -> None:
+        """Stop accepting work; with wait=False, pending polls are abandoned."""
+        if not wait:
+            self._closed.set()
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _edit_chunk(self, endpoint: str, payload: Dict[str, Any]) -> Any:
+        status, body = self.client.put(endpoint, json.dumps(payload))
+        if status not in (200, 202):
+            raise BatchError(endpoint, status, body)
+        try:
+            return json.loads(body) if body.strip() else None
+        except json.JSONDecodeError:
+            return None
+
+    def edit(self, ids: Iterable[int], **changes: Any) -> List[Future]:
+        """
+        Apply the same editor changes to many series or movies.
+
+        `changes` are the editor fields (monitored, qualityProfileId,
+        rootFolderPath, moveFiles, tags, applyTags, ...). Each future
+        resolves to the editor response for one chunk.
+        """
+        endpoint = f"{self.api_base}/{self.kind}/editor"
+        return [
+            self._pool.submit(self._edit_chunk, endpoint, {self.ids_key: chunk, **changes})
+            for chunk in chunked(ids, self.chunk_size)
+        ]
+
+    def _run_command(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        endpoint = f"{self.api_base}/command"
+        status, body = self.client.post(endpoint, json.dumps(payload))
+        if status not in (200, 201):
+            raise BatchError(endpoint, status, body)
+        try:
+            record = json.loads(body)
+        except json.JSONDecodeError:
+            raise BatchError(endpoint, status, "invalid JSON")
+
+        poll = f"{endpoint}/{record['id']}"
+        deadline = time.monotonic() + self.command_timeout
+        delay = self.poll_interval
+        while (record.get("status") or "").lower() not in FINISHED:
+            if time.monotonic() + delay > deadline:
+                raise BatchError(poll, status, f"not finished after {self.command_timeout}s")
+            if self._closed.wait(delay):
+                raise BatchError(poll, status, "batch closed before the command finished")
+            delay = min(delay * 2, self.max_poll_interval)
+            status, body = self.client.get(poll)
+            if status == 200:
+                try:
+                    record = json.loads(body)
+                except json.JSONDecodeError:
+                    pass
+            elif status is not None:
+                raise BatchError(poll, status, body)
+            # Connection errors are retried until the deadline
+        state = (record.get("status") or "").lower()
+        if state != "completed":
+            message = record.get("message") or record.get("exception")
+            detail = f"command {state}" + (f": {message}" if message else "")
+            raise BatchError(poll, status, detail, record)
+        return record
+
+    def command(self, name: str, ids: Iterable[int], **body: Any) -> List[Future]:
+        """
+        Queue one ARR command per chunk of ids (RefreshSeries, RescanSeries,
+        SeriesSearch, RefreshMovie, MoviesSearch, ...).
+
+        Each future resolves to the final /command/{id} record once its
+        status is completed. If it ends failed, aborted, cancelled or
+        orphaned, the future raises BatchError with that record attached.
+        """
+        return [
+            self._pool.submit(self._run_command, {"name": name, self.ids_key: chunk, **body})
+            for chunk in chunked(ids, self.chunk_size)
+        ]
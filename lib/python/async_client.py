@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+Asyncio variant of the Usenet Media Stack API clients.
+
+Mirrors the surface of api_client (get, post, get_json, post_json,
+call_json, is_healthy) as coroutines, using only the standard library.
+Connections are kept alive per host and concurrency is bounded per host,
+so hundreds of requests can be fanned out from one process without
+flooding a single container.
+
+Usage:
+    import asyncio
+    from async_client import AsyncKomgaClient
+
+    async def main():
+        async with AsyncKomgaClient(url, user="...", password="...") as komga:
+            pages = await asyncio.gather(*(
+                komga.get_json(f"/api/v1/series/{sid}/books?size=500")
+                for sid in series_ids
+            ))
+
+    asyncio.run(main())
+"""
+
+import asyncio
+import base64
+import json
+import socket
+import ssl
+import time
+import urllib.parse
+from typing import Optional, Dict, Any, List, Tuple
+
+try:
+    from .api_client import (
+        MAX_REDIRECTS, REDIRECT_CODES, RequestError, RequestHook, RequestTrace, _run_hooks,
+    )
+except ImportError:
+    from api_client import (
+        MAX_REDIRECTS, REDIRECT_CODES, RequestError, RequestHook, RequestTrace, _run_hooks,
+    )
+
+_Conn = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class AsyncConnectionPool:
+    """
+    Keep-alive HTTP/1.1 connection pool for asyncio, keyed by host.
+
+    At most ``limit_per_host`` requests are in flight per host; further
+    requests wait for a slot. Up to ``maxsize`` idle connections are kept
+    per host and closed once older than ``idle_timeout`` seconds.
+    """
+
+    def __init__(self, maxsize: int = 4, idle_timeout: float = 15.0, limit_per_host: int = 8):
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.limit_per_host = limit_per_host
+        self._idle: Dict[Tuple[str, str, int], List[Tuple[float, _Conn]]] = {}
+        self._slots: Dict[Tuple[str, str, int], asyncio.Semaphore] = {}
+
+    async def _acquire(
+        self, key: Tuple[str, str, int], timings: Optional[Dict[str, float]] = None
+    ) -> Tuple[_Conn, bool]:
+        """Return (connection, reused) for key, preferring an idle connection."""
+        now = time.monotonic()
+        idle = self._idle.get(key, [])
+        while idle:
+            last_used, conn = idle.pop()
+            if now - last_used <= self.idle_timeout and not conn[0].at_eof():
+                return conn, True
+            conn[1].close()
+
+        scheme, host, port = key
+        ctx = ssl.create_default_context() if scheme == "https" else None
+        started = time.perf_counter()
+        # Resolve separately so DNS and connect can be timed apart
+        family, _, _, _, sockaddr = (
+            await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        )[0]
+        resolved = time.perf_counter()
+        conn = await asyncio.open_connection(
+            sockaddr[0], port, family=family, ssl=ctx, server_hostname=host if ctx else None
+        )
+        if timings is not None:
+            timings["dns"] = resolved - started
+            timings["connect"] = time.perf_counter() - resolved
+        return conn, False
+
+    def _release(self, key: Tuple[str, str, int], conn: _Conn) -> None:
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.maxsize:
+            idle.append((time.monotonic(), conn))
+        else:
+            conn[1].close()
+
+    async def _exchange(
+        self,
+        conn: _Conn,
+        method: str,
+        host: str,
+        target: str,
+        headers: Dict[str, str],
+        data: Optional[bytes],
+        started: Optional[float] = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Tuple[int, Dict[str, str], bytes, bool]:
+        """Write one request and read its response. Returns (status, headers, body, keep_alive)."""
+        reader, writer = conn
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {host}"]
+        lines.extend(f"{k}: {v}" for k, v in headers.items())
+        if data is not None:
+            lines.append(f"Content-Length: {len(data)}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (data or b""))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by server")
+        if timings is not None and started is not None:
+            timings["ttfb"] = time.perf_counter() - started
+        version, status_str = status_line.decode("latin-1").split(None, 2)[:2]
+        status = int(status_str)
+
+        resp_headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            resp_headers[name.strip().lower()] = value.strip()
+
+        connection = resp_headers.get("connection", "").lower()
+        keep_alive = connection != "close" and (version != "HTTP/1.0" or connection == "keep-alive")
+
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif "chunked" in resp_headers.get("transfer-encoding", "").lower():
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";", 1)[0].strip(), 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            body = b"".join(chunks)
+        elif "content-length" in resp_headers:
+            body = await reader.readexactly(int(resp_headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return status, resp_headers, body, keep_alive
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[bytes] = None,
+        timeout: float = 10,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Send one request over a pooled connection.
+
+        A reused connection that the server has already closed is retried
+        once on a fresh connection. Other errors propagate to the caller.
+        If `timings` is given it is filled as by ConnectionPool.request;
+        time spent waiting for a per-host slot is not counted.
+
+        Returns:
+            Tuple of (status_code, response_headers, response_body);
+            header names are lower-cased.
+        """
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname or "localhost", port)
+        host = parts.netloc.rsplit("@", 1)[-1]
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = asyncio.Semaphore(self.limit_per_host)
+
+        async with slot:
+            for attempt in range(2):
+                started = time.perf_counter()
+                if timings is not None:
+                    timings.update(dns=0.0, connect=0.0)
+                conn, reused = await asyncio.wait_for(self._acquire(key, timings), timeout)
+                try:
+                    status, resp_headers, body, keep_alive = await asyncio.wait_for(
+                        self._exchange(
+                            conn, method, host, target, headers or {}, data, started, timings
+                        ),
+                        timeout,
+                    )
+                except (asyncio.IncompleteReadError, ConnectionResetError, BrokenPipeError):
+                    conn[1].close()
+                    if reused and attempt == 0:
+                        continue
+                    raise
+                except BaseException:
+                    conn[1].close()
+                    raise
+
+                if timings is not None:
+                    timings["total"] = time.perf_counter() - started
+                    timings["reused"] = float(reused)
+                if keep_alive:
+                    self._release(key, conn)
+                else:
+                    conn[1].close()
+                return status, resp_headers, body
+        raise ConnectionResetError("connection closed by server")
+
+    async def close(self) -> None:
+        """Close every idle connection."""
+        idle, self._idle = self._idle, {}
+        writers = [conn[1] for conns in idle.values() for _, conn in conns]
+        for writer in writers:
+            writer.close()
+        for writer in writers:
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+
+class AsyncHTTPClient:
+    """
+    Base asyncio HTTP client with timeout and error handling.
+
+    `hooks` take the same RequestHook objects as the sync clients; they are
+    called synchronously on the event loop, so keep them cheap.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: int = 10,
+        pool: Optional[AsyncConnectionPool] = None,
+        hooks: Optional[List[RequestHook]] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.pool = pool if pool is not None else AsyncConnectionPool()
+        self.hooks = list(hooks) if hooks else []
+
+    async def __aenter__(self) -> "AsyncHTTPClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close idle pooled connections."""
+        await self.pool.close()
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[bytes] = None,
+    ) -> Tuple[Optional[int], str]:
+        """
+        Make an HTTP request.
+
+        Returns:
+            Tuple of (status_code, response_body)
+            status_code is None on connection errors, and the body is then a
+            RequestError describing what went wrong
+        """
+        url = f"{self.base_url}{endpoint}"
+        if not self.hooks:
+            return await self._send(method, url, headers, data)
+
+        trace = RequestTrace(method, endpoint, url)
+        _run_hooks(self.hooks, "before_request", trace)
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        status, body = await self._send(method, url, headers, data, timings)
+        trace.total = time.perf_counter() - started
+        trace.status = status
+        if isinstance(body, RequestError):
+            trace.error = body.kind
+        trace.bytes = int(timings.get("bytes", 0))
+        trace.dns = timings.get("dns", 0.0)
+        trace.connect = timings.get("connect", 0.0)
+        trace.ttfb = timings.get("ttfb", 0.0)
+        trace.reused = bool(timings.get("reused"))
+        _run_hooks(self.hooks, "after_request", trace)
+        return status, body
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        data: Optional[bytes],
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Tuple[Optional[int], str]:
+        """One request, following GET/HEAD redirects."""
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                status, resp_headers, body = await self.pool.request(
+                    method, url, headers, data, self.timeout, timings
+                )
+                if timings is not None:
+                    timings["bytes"] = len(body)
+                location = resp_headers.get("location")
+                if status in REDIRECT_CODES and location and method in ("GET", "HEAD"):
+                    url = urllib.parse.urljoin(url, location)
+                    continue
+                return status, body.decode("utf-8", errors="replace")
+            return None, RequestError(RequestError.REDIRECTS, f"Too many redirects: {url}")
+        except Exception as e:
+            return None, RequestError.from_exception(e)
+
+    async def get(
+        self, endpoint: str, headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[Optional[int], str]:
+        return await self._request("GET", endpoint, headers)
+
+    async def post(
+        self,
+        endpoint: str,
+        data: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[Optional[int], str]:
+        encoded = data.encode("utf-8") if data else None
+        return await self._request("POST", endpoint, headers, encoded)
+
+
+class AsyncArrClient(AsyncHTTPClient):
+    """
+    Asyncio client for ARR services (Prowlarr, Sonarr, Radarr, Lidarr, Bazarr).
+
+    Uses X-Api-Key header for authentication.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        timeout: int = 10,
+        pool: Optional[AsyncConnectionPool] = None,
+        hooks: Optional[List[RequestHook]] = None,
+    ):
+        super().__init__(base_url, timeout, pool, hooks)
+        self.api_key = api_key
+        self._headers = {
+            "X-Api-Key": api_key,
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        }
+
+    async def get(self, endpoint: str) -> Tuple[Optional[int], str]:
+        return await super().get(endpoint, self._headers)
+
+    async def post(self, endpoint: str, data: Optional[str] = None) -> Tuple[Optional[int], str]:
+        return await super().post(endpoint, data, self._headers)
+
+    async def get_json(self, endpoint: str) -> Optional[Dict[str, Any]]:
+        """GET request returning parsed JSON or None on error."""
+        status, body = await self.get(endpoint)
+        if status == 200:
+            try:
+                return json.loads(body)
+            except json.JSONDecodeError:
+                return None
+        return None
+
+    async def post_json(self, endpoint: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """POST request with JSON payload, returning parsed response."""
+        status, body = await self.post(endpoint, json.dumps(payload))
+        if status in (200, 201):
+            try:
+                return json.loads(body)
+            except json.JSONDecodeError:
+                return None
+        return None
+
+    async def is_healthy(self) -> bool:
+        """Check if service is responding."""
+        data = await self.get_json("/api/v3/system/status")
+        return data is not None and "version" in data
+
+
+class AsyncSabClient(AsyncHTTPClient):
+    """
+    Asyncio client for SABnzbd.
+
+    Uses apikey query parameter for authentication.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        timeout: int = 10,
+        pool: Optional[AsyncConnectionPool] = None,
+        hooks: Optional[List[RequestHook]] = None,
+    ):
+        super().__init__(base_url, timeout, pool, hooks)
+        self.api_key = api_key
+
+    async def call(self, params: str) -> Tuple[Optional[int], str]:
+        """
+        Make SABnzbd API call.
+
+        Args:
+            params: URL-encoded parameters (e.g., "mode=queue&output=json")
+
+        Returns:
+            Tuple of (status_code, response_body)
+        """
+        endpoint = f"/api?apikey={self.api_key}&{params}"
+        return await self.get(endpoint)
+
+    async def call_json(self, params: str) -> Optional[Dict[str, Any]]:
+        """API call returning parsed JSON."""
+        status, body = await self.call(params)
+        if status == 200:
+            try:
+                return json.loads(body)
+            except json.JSONDecodeError:
+                return None
+        return None
+
+    async def is_healthy(self) -> bool:
+        """Check if SABnzbd is responding."""
+        status, body = await self.call("mode=version")
+        return status == 200 and body.strip() != ""
+
+
+class AsyncKomgaClient(AsyncHTTPClient):
+    """
+    Asyncio client for Komga.
+
+    Uses Basic Auth for authentication.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        user: str,
+        password: str,
+        timeout: int = 10,
+        pool: Optional[AsyncConnectionPool] = None,
+        hooks: Optional[List[RequestHook]] = None,
+    ):
+        super().__init__(base_url, timeout, pool, hooks)
+        auth_str = base64.b64encode(f"{user}:{password}".encode()).decode()
+        self._headers = {
+            "Authorization": f"Basic {auth_str}",
+            "Accept": "application/json",
+        }
+
+    async def get(self, endpoint: str) -> Tuple[Optional[int], str]:
+        return await super().get(endpoint, self._headers)
+
+    async def get_json(self, endpoint: str) -> Optional[Dict[str, Any]]:
+        """GET request returning parsed JSON."""
+        status, body = await self.get(endpoint)
+        if status == 200:
+            try:
+                return json.loads(body)
+            except json.JSONDecodeError:
+                return None
+        return None
+
+    async def is_healthy(self) -> bool:
+        """Check if Komga is responding."""
+        status, _ = await self.get("/api/v1/libraries")
+        return status == 200
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Parallel, incremental CBZ/ZIP integrity scanner.
+
+CRC verification (zipfile.testzip) is spread across a process pool, and
+verdicts are cached by (path, size, mtime) so unchanged archives are not
+re-read on later runs. Results stream out as NDJSON, one line per file,
+as soon as each verdict is known.
+
+Usage:
+    cbz_integrity.py /var/mnt/pool/Comics                 # scan a tree
+    cbz_integrity.py --list docs/komga-corrupt-cbz.md     # markdown list
+    cbz_integrity.py --quarantine /srv/quarantine ROOT    # move failures
+
+Each output line looks like:
+    {"path": "...", "status": "ok|bad|error|missing", "detail": "", "cached": false}
+
+Exit code is 2 when any file is bad, errored or missing, as before.
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import shutil
+import sqlite3
+import sys
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+ARCHIVE_EXTS = (".cbz", ".zip")
+CACHE_PATH = os.environ.get(
+    "CBZ_VERDICT_CACHE",
+    str(pathlib.Path.home() / ".cache" / "usenet-media-stack" / "cbz-verdicts.sqlite"),
+)
+# Verdicts that depend only on file content and are safe to reuse.
+CACHEABLE = ("ok", "bad")
+
+
+def verify_archive(path: str) -> Tuple[str, str]:
+    """
+    CRC-check every member of one archive. Runs in a worker process.
+
+    Returns:
+        Tuple of (status, detail) where status is "ok", "bad" or "error"
+    """
+    try:
+        with zipfile.ZipFile(path, "r") as z:
+            bad = z.testzip()
+        if bad:
+            return "bad", f"BAD:{bad}"
+        return "ok", ""
+    except zipfile.BadZipFile as e:
+        return "bad", f"ERROR:{e}"
+    except Exception as e:
+        return "error", f"ERROR:{e}"
+
+
+def iter_archives(root: str) -> Iterator[str]:
+    """Yield archive paths under root using os.scandir."""
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith(ARCHIVE_EXTS):
+                        yield entry.path
+        except OSError:
+            continue
+
+
+def read_list_file(path: str, prefix: str = "/comics/") -> List[str]:
+    """Extract `- /comics/...` paths from a markdown list."""
+    paths = []
+    for line in pathlib.Path(path).read_text().splitlines():
+        if line.startswith("- ") and line[2:].lstrip().startswith(prefix):
+            paths.append(line[2:].strip())
+    return paths
+
+
+class VerdictCache:
+    """SQLite-backed verdict cache keyed by (path, size, mtime_ns)."""
+
+    def __init__(self, path: str):
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS verdicts (
+                   path TEXT PRIMARY KEY,
+                   size INTEGER NOT NULL,
+                   mtime_ns INTEGER NOT NULL,
+                   status TEXT NOT NULL,
+                   detail TEXT NOT NULL
+               )"""
+        )
+        self._pending: List[Tuple[str, int, int, str, str]] = []
+
+    def get(self, path: str, size: int, mtime_ns: int) -> Optional[Tuple[str, str]]:
+        row = self._db.execute(
+            "SELECT status, detail FROM verdicts WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (path, size, mtime_ns),
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, path: str, size: int, mtime_ns: int, status: str, detail: str) -> None:
+        self._pending.append((path, size, mtime_ns, status, detail))
+        if len(self._pending) >= 500:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?)", self._pending
+            )
+        self._pending = []
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
+
+
+def scan(
+    paths: Iterable[str],
+    jobs: Optional[int] = None,
+    cache: Optional[VerdictCache] = None,
+) -> Iterator[Dict[str, object]]:
+    """
+    Verify archives in parallel, yielding one verdict dict per path as it completes.
+
+    Cached verdicts are yielded immediately; at most jobs * 4 archives are
+    queued on the pool at once so huge trees don't pile up futures.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    window = jobs * 4
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        in_flight = {}
+
+        def drain(block_until: int) -> Iterator[Dict[str, object]]:
+            while len(in_flight) > block_until:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, size, mtime_ns = in_flight.pop(future)
+                    status, detail = future.result()
+                    if cache is not None and status in CACHEABLE:
+                        cache.put(path, size, mtime_ns, status, detail)
+                    yield {"path": path, "status": status, "detail": detail, "cached": False}
+
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                yield {"path": path, "status": "missing", "detail": "MISSING", "cached": False}
+                continue
+            hit = cache.get(path, st.st_size, st.st_mtime_ns) if cache is not None else None
+            if hit:
+                yield {"path": path, "status": hit[0], "detail": hit[1], "cached": True}
+                continue
+            in_flight[pool.submit(verify_archive, path)] = (path, st.st_size, st.st_mtime_ns)
+            yield from drain(window - 1)
+        yield from drain(0)
+
+
+def quarantine(path: str, dest_dir: str) -> Optional[str]:
+    """Move path into dest_dir without overwriting. Returns the new path, or None."""
+    target = os.path.join(dest_dir, os.path.basename(path))
+    if os.path.exists(target):
+        return None
+    return shutil.move(path, target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel CBZ/ZIP integrity scanner (NDJSON output)")
+    parser.add_argument("roots", nargs="*", help="directories or archive files to scan")
+    parser.add_argument("--list", dest="list_file", help="markdown list of `- /comics/...` paths")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--cache", default=CACHE_PATH, help=f"verdict cache path (default: {CACHE_PATH})")
+    parser.add_argument("--no-cache", action="store_true", help="re-verify every archive")
+    parser.add_argument("--quarantine", metavar="DIR", help="move failing archives into DIR as they are found")
+    args = parser.parse_args()
+
+    if not args.roots and not args.list_file:
+        parser.error("give at least one root or --list")
+
+    def targets() -> Iterator[str]:
+        if args.list_file:
+            yield from read_list_file(args.list_file)
+        for root in args.roots:
+            if os.path.isdir(root):
+                yield from iter_archives(root)
+            else:
+                yield root
+
+    if args.quarantine:
+        os.makedirs(args.quarantine, exist_ok=True)
+
+    cache = None if args.no_cache else VerdictCache(args.cache)
+    counts: Dict[str, int] = {}
+    try:
+        for verdict in scan(targets(), args.jobs, cache):
+            counts[verdict["status"]] = counts.get(verdict["status"], 0) + 1
+            if args.quarantine and verdict["status"] in ("bad", "error"):
+                verdict["quarantined"] = quarantine(verdict["path"], args.quarantine)
+            print(json.dumps(verdict), flush=True)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    failed = sum(n for status, n in counts.items() if status != "ok")
+    summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items())) or "no archives"
+    sys.stderr.write(f"Scanned: {summary}\n")
+    sys.exit(2 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
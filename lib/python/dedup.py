@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Content-hash duplicate finder for the media trees, with staged hashing.
+
+Builds on the inventory index (inventory.py / books-inventory.sh), so
+file sizes come from SQLite instead of a fresh walk. Hashing is staged
+so that most files are never read:
+
+    1. group by size; unique sizes cannot have duplicates
+    2. hash the first and last `block` bytes of each remaining file
+    3. stream a full hash only for files whose partial hash still collides
+
+Files no larger than two blocks are read whole in stage 2, so their
+partial hash is already final. Hashing runs on a thread pool (hashlib
+releases the GIL), and digests are cached by (path, size, mtime) so a
+re-run only reads new or changed files. Hard links to the same inode are
+counted once, since deleting one frees nothing.
+
+Do not mix a mergerfs pool with its branch drives in one run: the same
+file seen through both looks like a duplicate.
+
+Usage:
+    from dedup import HashCache, find_duplicates
+    from inventory import Inventory
+
+    with Inventory("/var/mnt/pool/Books") as inv, HashCache(CACHE_PATH) as cache:
+        inv.refresh()
+        sets, stats = find_duplicates(inv.iter_files(), cache=cache)
+        for dup in sets:
+            print(dup.reclaimable, dup.paths)
+
+CLI:
+    dedup.py ROOT [ROOT ...] [--ext cbz epub] [--min-size 1M] [--workers 8] [--json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pathlib
+import sqlite3
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    from .inventory import FileEntry, Inventory, human_bytes
+except ImportError:
+    from inventory import FileEntry, Inventory, human_bytes
+
+CACHE_PATH = os.environ.get(
+    "DEDUP_HASH_CACHE",
+    str(pathlib.Path.home() / ".cache" / "usenet-media-stack" / "dedup-hashes.sqlite"),
+)
+BLOCK = 64 * 1024
+CHUNK = 1024 * 1024
+
+
+class DuplicateSet(NamedTuple):
+    size: int
+    digest: str
+    paths: List[str]
+
+    @property
+    def reclaimable(self) -> int:
+        """Bytes freed by keeping one copy."""
+        return self.size * (len(self.paths) - 1)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"size": self.size, "hash": self.digest, "reclaimable": self.reclaimable, "paths": self.paths}
+
+
+def partial_hash(path: str, size: int, block: int = BLOCK) -> str:
+    """Hash of the first and last `block` bytes; of the whole file when it is at most 2 * block."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        if size <= 2 * block:
+            h.update(f.read())
+        else:
+            h.update(f.read(block))
+            f.seek(-block, os.SEEK_END)
+            h.update(f.read(block))
+    return h.hexdigest()
+
+
+def full_hash(path: str) -> str:
+    """Streaming hash of the whole file."""
+    h = hashlib.blake2b(digest_size=20)
+    buf = bytearray(CHUNK)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+class HashCache:
+    """SQLite-backed partial/full digests keyed by (path, size, mtime_ns)."""
+
+    def __init__(self, path: str):
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS hashes (
+                   path TEXT PRIMARY KEY,
+                   size INTEGER NOT NULL,
+                   mtime_ns INTEGER NOT NULL,
+                   partial TEXT,
+                   full TEXT
+               )"""
+        )
+        self._pending: Dict[str, List[Tuple[str, int, int, str]]] = {"partial": [], "full": []}
+
+    def __enter__(self) -> "HashCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get(self, path: str) -> Optional[Tuple[int, int, Optional[str], Optional[str]]]:
+        """(size, mtime_ns, partial, full) as last recorded, or None."""
+        return self._db.execute(
+            "SELECT size, mtime_ns, partial, full FROM hashes WHERE path = ?", (path,)
+        ).fetchone()
+
+    def put(self, column: str, path: str, size: int, mtime_ns: int, digest: str) -> None:
+        self._pending[column].append((path, size, mtime_ns, digest))
+        if len(self._pending[column]) >= 500:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._db:
+            for column, other in (("partial", "full"), ("full", "partial")):
+                # The other digest survives only if the file is unchanged
+                self._db.executemany(
+                    f"""INSERT INTO hashes (path, size, mtime_ns, {column}) VALUES (?, ?, ?, ?)
+                        ON CONFLICT (path) DO UPDATE SET
+                            {column} = excluded.{column},
+                            {other} = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+                                           THEN {other} END,
+                            size = excluded.size,
+                            mtime_ns = excluded.mtime_ns""",
+                    self._pending[column],
+                )
+                self._pending[column] = []
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
+
+
+class _Digest(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+    inode: Tuple[int, int]
+    digest: str
+    cached: bool
+
+
+def _digest(path: str, kind: str, known: Optional[Tuple], block: int) -> Optional[_Digest]:
+    """Stat one file and hash it unless the cached digest is still valid. Runs on the pool."""
+    try:
+        st = os.stat(path)
+        inode = (st.st_dev, st.st_ino)
+        if known is not None and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            cached = known[2] if kind == "partial" else known[3]
+            if cached:
+                return _Digest(path, st.st_size, st.st_mtime_ns, inode, cached, True)
+        digest = partial_hash(path, st.st_size, block) if kind == "partial" else full_hash(path)
+    except OSError:
+        return None
+    return _Digest(path, st.st_size, st.st_mtime_ns, inode, digest, False)
+
+
+def _parallel(pool: ThreadPoolExecutor, calls: Iterable[Tuple], fn: Callable, window: int) -> Iterator:
+    """Run fn(*args) for each args tuple, at most `window` at a time; yields results as they finish."""
+    in_flight = set()
+    for args in calls:
+        in_flight.add(pool.submit(fn, *args))
+        if len(in_flight) >= window:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    for future in in_flight:
+        yield future.result()
+
+
+def find_duplicates(
+    files: Iterable[FileEntry],
+    cache: Optional[HashCache] = None,
+    workers: int = 8,
+    min_size: int = 1,
+    extensions: Optional[Iterable[str]] = None,
+    block: int = BLOCK,
+) -> Tuple[List[DuplicateSet], Dict[str, int]]:
+    """
+    Duplicate sets among `files`, largest reclaimable space first, plus stage counters.
+
+    Files that vanish or cannot be read during hashing are left out.
+    """
+    exts = {e.lower().lstrip(".") for e in extensions} if extensions else None
+    stats = dict.fromkeys(
+        ("files", "size_candidates", "partial_hashed", "full_hashed", "cache_hits", "hardlinks", "unreadable"), 0
+    )
+
+    by_size: Dict[int, List[str]] = {}
+    seen = set()
+    for entry in files:
+        if entry.size < min_size or (exts is not None and entry.ext not in exts) or entry.path in seen:
+            continue
+        seen.add(entry.path)
+        stats["files"] += 1
+        by_size.setdefault(entry.size, []).append(entry.path)
+    del seen
+
+    def run_stage(kind: str, groups: Iterable[List[str]]) -> Dict[Tuple[int, str], List[_Digest]]:
+        calls = (
+            (path, kind, cache.get(path) if cache is not None else None, block)
+            for group in groups
+            for path in group
+        )
+        buckets: Dict[Tuple[int, str], List[_Digest]] = {}
+        for result in _parallel(pool, calls, _digest, workers * 4):
+            if result is None:
+                stats["unreadable"] += 1
+                continue
+            if result.cached:
+                stats["cache_hits"] += 1
+            else:
+                stats[f"{kind}_hashed"] += 1
+                if cache is not None:
+                    cache.put(kind, result.path, result.size, result.mtime_ns, result.digest)
+            buckets.setdefault((result.size, result.digest), []).append(result)
+        return buckets
+
+    def collisions(buckets: Dict[Tuple[int, str], List[_Digest]]) -> Iterator[Tuple[Tuple[int, str], List[str]]]:
+        """Groups of distinct inodes that share a key."""
+        for key, results in buckets.items():
+            paths, inodes = [], set()
+            for result in sorted(results, key=lambda r: r.path):
+                if result.inode in inodes:
+                    stats["hardlinks"] += 1
+                    continue
+                inodes.add(result.inode)
+                paths.append(result.path)
+            if len(paths) > 1:
+                yield key, paths
+
+    candidates = [paths for paths in by_size.values() if len(paths) > 1]
+    stats["size_candidates"] = sum(map(len, candidates))
+    del by_size
+
+    sets: List[DuplicateSet] = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dedup") as pool:
+        full_groups = []
+        for (size, digest), paths in collisions(run_stage("partial", candidates)):
+            if size <= 2 * block:
+                sets.append(DuplicateSet(size, digest, paths))
+            else:
+                full_groups.append(paths)
+        for (size, digest), paths in collisions(run_stage("full", full_groups)):
+            sets.append(DuplicateSet(size, digest, paths))
+
+    sets.sort(key=lambda s: (-s.reclaimable, s.paths[0]))
+    stats["sets"] = len(sets)
+    stats["reclaimable"] = sum(s.reclaimable for s in sets)
+    return sets, stats
+
+
+def parse_size(text: str) -> int:
+    """Byte count from e.g. 512, 64K, 1.5M, 2G."""
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find duplicate files by size, partial hash and full hash")
+    parser.add_argument("roots", nargs="+", help="trees to compare (each keeps its own inventory index)")
+    parser.add_argument("--ext", nargs="*", default=None, help="only these extensions (e.g. cbz epub)")
+    parser.add_argument("--min-size", type=parse_size, default=1, help="skip smaller files (default: 1 byte)")
+    parser.add_argument("--workers", type=int, default=8, help="hashing threads")
+    parser.add_argument("--cache", default=CACHE_PATH, help=f"hash cache path (default: {CACHE_PATH})")
+    parser.add_argument("--no-cache", action="store_true", help="hash everything again")
+    parser.add_argument("--no-refresh", action="store_true", help="use the inventory index as-is")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of text")
+    args = parser.parse_args()
+
+    for root in args.roots:
+        if not os.path.isdir(root):
+            sys.stderr.write(f"Root not found: {root}\n")
+            sys.exit(1)
+
+    inventories = [Inventory(root) for root in args.roots]
+    cache = None if args.no_cache else HashCache(args.cache)
+    try:
+        if not args.no_refresh:
+            for inv in inventories:
+                inv.refresh()
+        files = (entry for inv in inventories for entry in inv.iter_files())
+        sets, stats = find_duplicates(files, cache, args.workers, args.min_size, args.ext)
+    finally:
+        for inv in inventories:
+            inv.close()
+        if cache is not None:
+            cache.close()
+
+    if args.json:
+        print(json.dumps({"roots": args.roots, "stats": stats, "sets": [s.to_dict() for s in sets]}, indent=2))
+        return
+
+    for dup in sets:
+        print(f"{len(dup.paths)} x {human_bytes(dup.size)}  (reclaim {human_bytes(dup.reclaimable)})")
+        for path in dup.paths:
+            print(f"  {path}")
+    print(
+        f"\n{stats['sets']} duplicate sets, {human_bytes(stats['reclaimable'])} reclaimable "
+        f"({stats['files']} files, {stats['size_candidates']} same-size, "
+        f"{stats['partial_hashed']} partial + {stats['full_hashed']} full hashes, "
+        f"{stats['cache_hits']} cached)"
+    )
+
+
+if __name__ == "__main__":
+    main()
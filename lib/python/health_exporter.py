@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Long-running service health prober with a Prometheus/OpenMetrics endpoint.
+
+Each probe runs on its own schedule in its own thread, reusing whatever
+clients (and pooled connections) it closed over, and records:
+
+    media_stack_service_up{service}                  1/0 from the last probe
+    media_stack_probe_duration_seconds{service}      histogram of probe latency
+    media_stack_probes_total{service,result}         ok/fail counter
+    media_stack_last_success_timestamp_seconds{service}
+    media_stack_<extra>{service}                     gauges returned by the probe
+
+Usage:
+    exporter = HealthExporter([
+        Probe("sonarr", 15, lambda: {} if sonarr.is_healthy() else None),
+    ])
+    exporter.serve("127.0.0.1", 9180)   # blocks until SIGINT/SIGTERM
+
+A probe's check returns None when the service is down, or a dict of extra
+gauge values (e.g. {"queue_records": 12}) when it is up. Exceptions count
+as down.
+"""
+
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+PREFIX = "media_stack"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# HELP text for extra gauges returned by probes
+EXTRA_HELP = {
+    "queue_records": "Items in the ARR download queue",
+    "sabnzbd_queue_slots": "Jobs in the SABnzbd queue",
+    "sabnzbd_speed_bytes_per_second": "Current SABnzbd download speed",
+    "sabnzbd_remaining_bytes": "Bytes left to download in the SABnzbd queue",
+    "sabnzbd_paused": "1 if the SABnzbd queue is paused",
+}
+
+
+class Probe(NamedTuple):
+    name: str
+    interval: float
+    check: Callable[[], Optional[Dict[str, float]]]
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in sorted(labels.items())
+    )
+    return "{" + body + "}"
+
+
+class MetricsRegistry:
+    """Minimal thread-safe gauge/counter/histogram store rendered in text exposition format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._values: Dict[str, Dict[Tuple, float]] = {}
+        self._histograms: Dict[str, Dict[Tuple, List[float]]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        with self._lock:
+            self._help.setdefault(name, (kind, help_text))
+
+    def set(self, name: str, labels: Dict[str, str], value: float) -> None:
+        with self._lock:
+            self._values.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+    def inc(self, name: str, labels: Dict[str, str], amount: float = 1.0) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, labels: Dict[str, str], value: float) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            # Per-bucket counts, then sum and count
+            state = self._histograms.setdefault(name, {}).setdefault(
+                key, [0.0] * (len(LATENCY_BUCKETS) + 2)
+            )
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name in sorted(set(self._values) | set(self._histograms)):
+                kind, help_text = self._help.get(name, ("gauge", name))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(self._values.get(name, {}).items()):
+                    lines.append(f"{name}{_labels(dict(key))} {value:g}")
+                for key, state in sorted(self._histograms.get(name, {}).items()):
+                    labels = dict(key)
+                    for bound, count in zip(LATENCY_BUCKETS, state):
+                        lines.append(f"{name}_bucket{_labels({**labels, 'le': f'{bound:g}'})} {count:g}")
+                    lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {state[-1]:g}")
+                    lines.append(f"{name}_sum{_labels(labels)} {state[-2]:g}")
+                    lines.append(f"{name}_count{_labels(labels)} {state[-1]:g}")
+        return "\n".join(lines) + "\n"
+
+
+class HealthExporter:
+    """Runs probes on their own schedules and serves the results on /metrics."""
+
+    def __init__(self, probes: Iterable[Probe], registry: Optional[MetricsRegistry] = None):
+        self.probes = list(probes)
+        self.registry = registry or MetricsRegistry()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        r = self.registry
+        r.describe(f"{PREFIX}_service_up", "gauge", "1 if the last probe succeeded")
+        r.describe(f"{PREFIX}_probe_duration_seconds", "histogram", "Probe latency")
+        r.describe(f"{PREFIX}_probes_total", "counter", "Probes run, by result")
+        r.describe(f"{PREFIX}_last_success_timestamp_seconds", "gauge", "Unix time of the last successful probe")
+        for name, help_text in EXTRA_HELP.items():
+            r.describe(f"{PREFIX}_{name}", "gauge", help_text)
+
+    def run_probe(self, probe: Probe) -> bool:
+        """Run one probe and record its metrics. Returns whether the service is up."""
+        labels = {"service": probe.name}
+        started = time.perf_counter()
+        try:
+            extras = probe.check()
+        except Exception:
+            extras = None
+        self.registry.observe(f"{PREFIX}_probe_duration_seconds", labels, time.perf_counter() - started)
+
+        up = extras is not None
+        self.registry.set(f"{PREFIX}_service_up", labels, 1 if up else 0)
+        self.registry.inc(f"{PREFIX}_probes_total", {**labels, "result": "ok" if up else "fail"})
+        if up:
+            self.registry.set(f"{PREFIX}_last_success_timestamp_seconds", labels, time.time())
+            for name, value in extras.items():
+                self.registry.set(f"{PREFIX}_{name}", labels, value)
+        return up
+
+    def _loop(self, probe: Probe) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.run_probe(probe)
+            self._stop.wait(max(0.0, probe.interval - (time.monotonic() - started)))
+
+    def start(self) -> None:
+        for probe in self.probes:
+            thread = threading.Thread(target=self._loop, args=(probe,), name=f"probe-{probe.name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def serve(self, host: str = "127.0.0.1", port: int = 9180) -> None:
+        """Start probing and serve /metrics until SIGINT or SIGTERM."""
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path == "/metrics":
+                    body, ctype = registry.render().encode(), CONTENT_TYPE
+                elif path == "/healthz":
+                    body, ctype = b"ok\n", "text/plain"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        httpd = ThreadingHTTPServer((host, port), Handler)
+        httpd.daemon_threads = True
+
+        def shutdown(*_):
+            self.stop()
+            threading.Thread(target=httpd.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+        self.start()
+        try:
+            httpd.serve_forever()
+        finally:
+            httpd.server_close()
@@ -0,0 +1,621 @@
+#!/usr/bin/env python3
+"""
+Event-driven ingest of new downloads into the reading collections.
+
+Replaces the `--watch` polling loops of travel-ingest.sh and
+suwayomi-to-komga.sh. New files are picked up from inotify events
+(IN_CLOSE_WRITE / IN_MOVED_TO, with watches added for new directories as
+they appear); where inotify is unavailable or out of watches, a scandir
+watcher re-lists only directories whose mtime changed. Either way the
+tree is walked once at startup, and that walk doubles as the initial
+pass over files that arrived while the service was down.
+
+A file is only handled once its size and mtime have been stable for
+`settle` seconds, so partially written downloads are left alone. Settled
+files are collected into a batch until the watched trees have been quiet
+for `batch_window` seconds (or the oldest file has waited `max_delay`),
+then handled in a worker pool, and one Komga library scan is triggered
+for the whole batch instead of one per file.
+
+Usage:
+    from ingest import IngestService, TravelHandler, make_watcher
+
+    handler = TravelHandler("/var/mnt/fast8tb/Local/downloads", "/var/mnt/fast8tb/Cloud/OneDrive/Books")
+    service = IngestService(handler, make_watcher(handler.roots), komga=komga_client)
+    service.run()                      # until stop.set() or Ctrl+C
+
+CLI:
+    ingest.py travel [--dry-run] [--settle 5] [--batch-window 3] [--no-inotify]
+    ingest.py suwayomi [--dry-run] ...
+
+Environment:
+    DOWNLOADS_ROOT_PORTABLE, BOOKS_ROOT      travel profile (as travel-ingest.sh)
+    SUWAYOMI_DOWNLOADS, COMICS_ROOT          suwayomi profile (as suwayomi-to-komga.sh)
+    KOMGA_URL, KOMGA_USER, KOMGA_PASS        library scans; skipped without credentials
+"""
+
+import abc
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import json
+import logging
+import os
+import re
+import select
+import shutil
+import struct
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from .api_client import KomgaClient, shared_scheduler
+    from .service_registry import host_path
+except ImportError:
+    from api_client import KomgaClient, shared_scheduler
+    from service_registry import host_path
+
+logger = logging.getLogger("ingest")
+
+SCRIPT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "scripts")
+
+# Suffixes of files still being written by a downloader
+PARTIAL_SUFFIXES = (".part", ".partial", ".tmp", ".crdownload", ".!qb", ".!ut", ".aria2")
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT = struct.Struct("iIII")
+
+
+def _walk(top: str, on_dir=None) -> List[str]:
+    """Every file under `top`, skipping hidden entries; calls on_dir(path) for each directory."""
+    files = []
+    stack = [top]
+    while stack:
+        path = stack.pop()
+        if on_dir is not None:
+            on_dir(path)
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.name.startswith("."):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            files.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return files
+
+
+class InotifyWatcher:
+    """Recursive inotify watch; read() returns paths of files written or moved in."""
+
+    def __init__(self, roots: Iterable[str]):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.roots = list(roots)
+        self._dirs: Dict[int, str] = {}
+        self._backlog: List[str] = []
+        try:
+            for root in self.roots:
+                self._backlog.extend(self._watch_tree(root, strict=True))
+        except OSError:
+            self.close()
+            raise
+
+    def _watch(self, path: str, strict: bool = False) -> None:
+        wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd >= 0:
+            self._dirs[wd] = path
+            return
+        err = ctypes.get_errno()
+        if strict:
+            raise OSError(err, os.strerror(err), path)
+        # ENOSPC: fs.inotify.max_user_watches is exhausted; otherwise the directory is already gone
+        if err == errno.ENOSPC:
+            logger.warning("Out of inotify watches; %s is not watched", path)
+
+    def _watch_tree(self, top: str, strict: bool = False) -> List[str]:
+        return _walk(top, lambda path: self._watch(path, strict))
+
+    def read(self, timeout: float) -> List[str]:
+        if self._backlog:
+            backlog, self._backlog = self._backlog, []
+            return backlog
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = b""
+        while True:
+            try:
+                chunk = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            data += chunk
+
+        paths = []
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                logger.warning("inotify queue overflowed; rescanning")
+                return [p for root in self.roots for p in _walk(root)]
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            parent = self._dirs.get(wd)
+            if parent is None or not name or name.startswith(b"."):
+                continue
+            path = os.path.join(parent, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                # Files can land in a new directory before its watch exists
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    paths.extend(self._watch_tree(path))
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                paths.append(path)
+        return paths
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class ScanWatcher:
+    """
+    Polling fallback: every `interval` seconds, stat each known directory
+    and list only those whose mtime changed. New names are reported.
+    """
+
+    def __init__(self, roots: Iterable[str], interval: float = 30.0):
+        self.roots = list(roots)
+        self.interval = interval
+        # dir -> (mtime_ns, file names, subdirectories)
+        self._dirs: Dict[str, Tuple[int, Set[str], List[str]]] = {}
+        self._next = 0.0
+
+    def _scan(self) -> List[str]:
+        new = []
+        seen = set()
+        stack = list(self.roots)
+        while stack:
+            path = stack.pop()
+            seen.add(path)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            known = self._dirs.get(path)
+            if known is not None and known[0] == mtime:
+                stack.extend(known[2])
+                continue
+            names, subdirs = set(), []
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.name.startswith("."):
+                            continue
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                names.add(entry.name)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+            old_names = known[1] if known is not None else set()
+            new.extend(os.path.join(path, name) for name in names - old_names)
+            self._dirs[path] = (mtime, names, subdirs)
+            stack.extend(subdirs)
+        for path in set(self._dirs) - seen:
+            del self._dirs[path]
+        return new
+
+    def read(self, timeout: float) -> List[str]:
+        wait = self._next - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return []
+        if wait > 0:
+            time.sleep(wait)
+        self._next = time.monotonic() + self.interval
+        return self._scan()
+
+    def close(self) -> None:
+        pass
+
+
+def make_watcher(roots: Iterable[str], use_inotify: bool = True, interval: float = 30.0):
+    """InotifyWatcher where the kernel allows it, otherwise ScanWatcher."""
+    roots = list(roots)
+    if use_inotify and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError) as e:
+            logger.warning("inotify unavailable (%s); polling every %ss", e, interval)
+    return ScanWatcher(roots, interval)
+
+
+class Debouncer:
+    """Holds files until their size and mtime have not changed for `settle` seconds."""
+
+    def __init__(self, settle: float = 5.0):
+        self.settle = settle
+        self._pending: Dict[str, Tuple[int, int, float]] = {}  # path -> (size, mtime_ns, stable since)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def touch(self, path: str, now: float) -> None:
+        self._pending[path] = (-1, -1, now)
+
+    def settled(self, now: float) -> List[str]:
+        ready = []
+        for path, (size, mtime, since) in list(self._pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._pending[path]
+                continue
+            if (st.st_size, st.st_mtime_ns) != (size, mtime):
+                self._pending[path] = (st.st_size, st.st_mtime_ns, now)
+            elif now - since >= self.settle:
+                del self._pending[path]
+                ready.append(path)
+        return ready
+
+
+class IngestHandler(abc.ABC):
+    """What to watch, which files matter, and what to do with a settled batch."""
+
+    name = "ingest"
+
+    def __init__(self, roots: List[str], dry_run: bool = False):
+        self.roots = roots
+        self.dry_run = dry_run
+
+    def accepts(self, path: str) -> bool:
+        return not path.lower().endswith(PARTIAL_SUFFIXES)
+
+    @abc.abstractmethod
+    def process(self, paths: List[str], pool: ThreadPoolExecutor) -> List[str]:
+        """Handle a batch; returns the destinations that now need a Komga scan."""
+
+
+# Content classification, as in travel-ingest.sh
+_COMIC_PDF_RE = re.compile(r"[Mm]anga|[Cc]omic|[Cc]hapter|[Vv]ol\.?")
+_AUDIOBOOK_DIR_RE = re.compile(r"[Aa]udiobook|[Nn]arrat")
+TRAVEL_EXTENSIONS = {"cbz", "cbr", "cb7", "epub", "mobi", "azw", "azw3", "pdf", "m4b"}
+
+
+def classify_file(path: str) -> str:
+    """comics, ebooks, audiobooks or unknown, from the extension and path."""
+    ext = path.rsplit(".", 1)[-1].lower() if "." in os.path.basename(path) else ""
+    if ext in ("cbz", "cbr", "cb7"):
+        return "comics"
+    if ext in ("epub", "mobi", "azw", "azw3"):
+        return "ebooks"
+    if ext == "m4b":
+        return "audiobooks"
+    if ext == "pdf":
+        return "comics" if _COMIC_PDF_RE.search(path) else "ebooks"
+    if ext == "mp3":
+        return "audiobooks" if _AUDIOBOOK_DIR_RE.search(os.path.dirname(path)) else "unknown"
+    return "unknown"
+
+
+class TravelHandler(IngestHandler):
+    """Moves comics, eBooks and audiobooks from the portable downloads tree into BOOKS_ROOT."""
+
+    name = "travel"
+
+    def __init__(self, downloads_root: str, books_root: str, dry_run: bool = False):
+        super().__init__([downloads_root], dry_run)
+        self.downloads_root = downloads_root
+        self.destinations = {
+            "comics": os.path.join(books_root, "Comics"),
+            "ebooks": os.path.join(books_root, "eBooks"),
+            "audiobooks": os.path.join(books_root, "Audiobooks"),
+        }
+
+    def accepts(self, path: str) -> bool:
+        ext = path.rsplit(".", 1)[-1].lower()
+        return ext in TRAVEL_EXTENSIONS and super().accepts(path)
+
+    def move(self, src: str) -> Optional[str]:
+        """Move one file to its collection; returns the destination, or None if skipped."""
+        dest_dir = self.destinations.get(classify_file(src))
+        if dest_dir is None:
+            return None
+        filename = os.path.basename(src)
+        if self.dry_run:
+            logger.info("Would move: %s -> %s/", src, dest_dir)
+            return None
+        os.makedirs(dest_dir, exist_ok=True)
+        dest = os.path.join(dest_dir, filename)
+        try:
+            dest_size = os.stat(dest).st_size
+        except FileNotFoundError:
+            dest_size = None
+        if dest_size is not None:
+            if dest_size == os.stat(src).st_size:
+                logger.info("Duplicate (same size), removing source: %s", filename)
+                os.remove(src)
+                return None
+            base, ext = os.path.splitext(filename)
+            new_name = f"{base}_{time.strftime('%Y%m%d%H%M%S')}{ext}"
+            logger.warning("File exists with different size, keeping both: %s (as %s)", filename, new_name)
+            dest = os.path.join(dest_dir, new_name)
+        shutil.move(src, dest)
+        logger.info("Moved: %s -> %s/", filename, dest_dir)
+        return dest
+
+    def _prune(self, directory: str) -> None:
+        """Remove empty directories from `directory` up to (not including) the root."""
+        root = os.path.abspath(self.downloads_root)
+        directory = os.path.abspath(directory)
+        while directory != root and directory.startswith(root + os.sep):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                return
+            directory = os.path.dirname(directory)
+
+    def process(self, paths: List[str], pool: ThreadPoolExecutor) -> List[str]:
+        moved, failed = [], 0
+        futures = [(path, pool.submit(self.move, path)) for path in paths]
+        for path, future in futures:
+            try:
+                dest = future.result()
+            except OSError as e:
+                logger.error("Failed to move %s: %s", path, e)
+                failed += 1
+                continue
+            if dest is not None:
+                moved.append(dest)
+        if not self.dry_run:
+            for directory in sorted({os.path.dirname(p) for p in paths}, key=len, reverse=True):
+                self._prune(directory)
+        logger.info("Batch complete: %d moved, %d skipped, %d failed", len(moved), len(paths) - len(moved) - failed, failed)
+        return moved
+
+
+class SuwayomiHandler(IngestHandler):
+    """
+    Runs the one-shot suwayomi-to-komga.sh pipeline (series naming, chapter
+    layout) once per settled batch; the Komga scan is left to the service.
+    """
+
+    name = "suwayomi"
+
+    def __init__(self, downloads: str, comics_root: str, dry_run: bool = False, script: Optional[str] = None):
+        super().__init__([downloads], dry_run)
+        self.comics_root = comics_root
+        self.script = script or os.path.join(SCRIPT_DIR, "suwayomi-to-komga.sh")
+
+    def process(self, paths: List[str], pool: ThreadPoolExecutor) -> List[str]:
+        env = {
+            **os.environ,
+            "SUWAYOMI_DOWNLOADS": self.roots[0],
+            "COMICS_ROOT": self.comics_root,
+            "DRY_RUN": "1" if self.dry_run else "0",
+            "KOMGA_SCAN": "0",
+        }
+        logger.info("Processing %d new files from %s", len(paths), self.roots[0])
+        result = subprocess.run([self.script], env=env)
+        if result.returncode != 0:
+            logger.error("%s exited with %d", self.script, result.returncode)
+            return []
+        return [] if self.dry_run else [self.comics_root]
+
+
+class KomgaScanner:
+    """Triggers one scan per batch for the Komga libraries holding the new files."""
+
+    def __init__(self, client: KomgaClient, path_map: Optional[Dict[str, str]] = None):
+        self.client = client
+        self.path_map = path_map
+
+    def _libraries(self) -> List[Dict]:
+        status, body = self.client.get("/api/v1/libraries")
+        if status != 200:
+            logger.warning("Could not list Komga libraries (status %s): %s", status, body[:200])
+            return []
+        try:
+            return json.loads(body)
+        except json.JSONDecodeError:
+            return []
+
+    def scan(self, paths: List[str]) -> List[str]:
+        """Scan libraries whose root contains any of `paths` (the first library if none match)."""
+        libraries = self._libraries()
+        if not libraries:
+            return []
+        targets = []
+        for library in libraries:
+            root = host_path(library.get("root"), self.path_map)
+            if root and any(p == root or p.startswith(root.rstrip("/") + "/") for p in paths):
+                targets.append(library)
+        # suwayomi-to-komga.sh always scanned the first library
+        targets = targets or libraries[:1]
+        scanned = []
+        for library in targets:
+            status, body = self.client.post(f"/api/v1/libraries/{library['id']}/scan")
+            if status in (200, 202, 204):
+                scanned.append(library["id"])
+                logger.info("Komga scan triggered for library: %s", library.get("name", library["id"]))
+            else:
+                logger.warning("Komga scan of %s failed (status %s): %s", library["id"], status, body[:200])
+        return scanned
+
+
+class IngestService:
+    """
+    Watches a handler's roots and feeds it settled files in batches.
+
+    Args:
+        handler: TravelHandler, SuwayomiHandler or another IngestHandler
+        watcher: from make_watcher(handler.roots)
+        komga: client for the per-batch library scan; None to skip scans
+        settle: seconds a file's size and mtime must be unchanged
+        batch_window: quiet seconds (nothing pending or arriving) before a batch runs
+        max_delay: longest a settled file waits for the batch to close
+        workers: worker threads for per-file work
+    """
+
+    def __init__(
+        self,
+        handler: IngestHandler,
+        watcher,
+        komga: Optional[KomgaClient] = None,
+        settle: float = 5.0,
+        batch_window: float = 3.0,
+        max_delay: float = 60.0,
+        workers: int = 4,
+    ):
+        self.handler = handler
+        self.watcher = watcher
+        self.scanner = KomgaScanner(komga) if komga is not None else None
+        self.debouncer = Debouncer(settle)
+        self.batch_window = batch_window
+        self.max_delay = max_delay
+        self.workers = workers
+        self.batches = 0
+
+    def _flush(self, batch: List[str], pool: ThreadPoolExecutor) -> None:
+        self.batches += 1
+        try:
+            landed = self.handler.process(batch, pool)
+        except Exception:
+            logger.exception("Ingest batch failed")
+            return
+        if landed and self.scanner is not None and not self.handler.dry_run:
+            self.scanner.scan(landed)
+
+    def run(self, stop: Optional[threading.Event] = None, tick: float = 1.0) -> None:
+        """Handle events until `stop` is set."""
+        stop = stop or threading.Event()
+        batch: Dict[str, None] = {}
+        first_ready = last_event = 0.0
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest") as pool:
+            try:
+                while not stop.is_set():
+                    now = time.monotonic()
+                    for path in self.watcher.read(tick):
+                        if self.handler.accepts(path):
+                            self.debouncer.touch(path, now)
+                            last_event = now
+                    now = time.monotonic()
+                    for path in self.debouncer.settled(now):
+                        if not batch:
+                            first_ready = now
+                        batch[path] = None
+                    if not batch:
+                        continue
+                    quiet = not len(self.debouncer) and now - last_event >= self.batch_window
+                    if quiet or now - first_ready >= self.max_delay:
+                        self._flush(list(batch), pool)
+                        batch.clear()
+            finally:
+                self.watcher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch download folders and ingest new files")
+    parser.add_argument("profile", choices=["travel", "suwayomi"])
+    parser.add_argument("--dry-run", "-n", action="store_true", help="log what would happen without moving")
+    parser.add_argument("--settle", type=float, default=5.0, help="seconds a file must stop changing")
+    parser.add_argument("--batch-window", type=float, default=3.0, help="quiet seconds before a batch runs")
+    parser.add_argument("--max-delay", type=float, default=60.0, help="longest wait for a batch to close")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--no-inotify", action="store_true", help="use the scandir watcher")
+    parser.add_argument("--poll-interval", type=float, default=30.0, help="scandir watcher interval")
+    parser.add_argument("--log-file", help="also append log lines to this file")
+    args = parser.parse_args()
+
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    if args.log_file:
+        os.makedirs(os.path.dirname(args.log_file) or ".", exist_ok=True)
+        handlers.append(logging.FileHandler(args.log_file))
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[%(asctime)s] [%(levelname)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+        handlers=handlers,
+    )
+
+    if args.profile == "travel":
+        handler: IngestHandler = TravelHandler(
+            os.environ.get("DOWNLOADS_ROOT_PORTABLE", "/var/mnt/fast8tb/Local/downloads"),
+            os.environ.get("BOOKS_ROOT", "/var/mnt/fast8tb/Cloud/OneDrive/Books"),
+            args.dry_run,
+        )
+    else:
+        handler = SuwayomiHandler(
+            os.environ.get("SUWAYOMI_DOWNLOADS", "/var/mnt/fast8tb/Cloud/OneDrive/Books/Comics/Manga"),
+            os.environ.get("COMICS_ROOT", "/var/mnt/fast8tb/Cloud/OneDrive/Books/Comics"),
+            args.dry_run,
+        )
+    for root in handler.roots:
+        if not os.path.isdir(root):
+            sys.stderr.write(f"Error: directory not found: {root}\n")
+            sys.exit(1)
+
+    komga = None
+    user, password = os.environ.get("KOMGA_USER"), os.environ.get("KOMGA_PASS")
+    if user and password:
+        komga = KomgaClient(
+            os.environ.get("KOMGA_URL", "http://localhost:8081"), user, password, scheduler=shared_scheduler()
+        )
+    else:
+        logger.info("KOMGA_USER/KOMGA_PASS not set; Komga scans disabled")
+
+    watcher = make_watcher(handler.roots, not args.no_inotify, args.poll_interval)
+    logger.info(
+        "Watching %s with %s (%s profile)", ", ".join(handler.roots), type(watcher).__name__, handler.name
+    )
+    service = IngestService(
+        handler,
+        watcher,
+        komga,
+        settle=args.settle,
+        batch_window=args.batch_window,
+        max_delay=args.max_delay,
+        workers=args.workers,
+    )
+    try:
+        service.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Library inventory engine with a persistent, incrementally refreshed index.
+
+Walks a media tree with os.scandir on a thread pool (one task per
+directory) and records every file's path, size, mtime and extension in a
+SQLite index. On later runs a directory is only re-listed when its own
+mtime changed; unchanged directories reuse their indexed entries, so a
+warm refresh costs one stat() per directory instead of one per file.
+
+Note: directory mtimes change when entries are added, removed or renamed.
+A file rewritten in place keeps its directory mtime; use --full to pick
+up such edits.
+
+Usage:
+    from inventory import Inventory
+
+    inv = Inventory("/var/mnt/pool/Books")
+    inv.refresh()
+    for name, info in inv.summary(["Audiobooks", "eBooks", "Comics"]).items():
+        print(name, info["files"], info["bytes"], info["top_exts"])
+
+CLI:
+    inventory.py ROOT [--categories Audiobooks eBooks Comics] [--full] [--json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pathlib
+import sqlite3
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+CACHE_DIR = pathlib.Path.home() / ".cache" / "usenet-media-stack"
+NO_EXT = "<noext>"
+
+
+class FileEntry(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+    ext: str
+
+
+class _DirVisit(NamedTuple):
+    path: str
+    parent: Optional[str]
+    mtime_ns: int
+    files: Optional[List[Tuple[str, int, int, str]]]  # None when reused from the index
+    children: List[str]
+
+
+def default_index_path(root: str) -> str:
+    """
+    Per-root index file under the user cache directory.
+
+    INVENTORY_INDEX overrides it with one file shared by every root; each
+    root only ever refreshes or prunes its own subtree of that file.
+    """
+    digest = hashlib.sha1(os.path.abspath(root).encode()).hexdigest()[:12]
+    return os.environ.get("INVENTORY_INDEX", str(CACHE_DIR / f"inventory-{digest}.sqlite"))
+
+
+def file_ext(name: str) -> str:
+    ext = os.path.splitext(name)[1].lower().lstrip(".")
+    return ext or NO_EXT
+
+
+def _subtree_bounds(path: str) -> Tuple[str, str]:
+    """Half-open key range covering every path strictly below `path`."""
+    # '/' sorts directly before '0', so [path/, path0) is exactly the subtree
+    return path + "/", path + "0"
+
+
+class Inventory:
+    """Persistent file inventory for one root directory."""
+
+    def __init__(self, root: str, index_path: Optional[str] = None, workers: int = 16):
+        self.root = os.path.abspath(root)
+        self.index_path = index_path or default_index_path(self.root)
+        self.workers = workers
+        pathlib.Path(self.index_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.index_path)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS dirs (
+                path TEXT PRIMARY KEY,
+                parent TEXT,
+                mtime_ns INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS files (
+                dir TEXT NOT NULL,
+                name TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                ext TEXT NOT NULL,
+                PRIMARY KEY (dir, name)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+            """
+        )
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "Inventory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @staticmethod
+    def _visit(
+        path: str, parent: Optional[str], known: Optional[Tuple[int, List[str]]]
+    ) -> Optional[_DirVisit]:
+        """Stat one directory and list it only if its mtime changed. Runs on the pool."""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        if known is not None and known[0] == mtime_ns:
+            return _DirVisit(path, parent, mtime_ns, None, known[1])
+
+        files = []
+        children = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            children.append(entry.path)
+                        else:
+                            st = entry.stat()
+                            files.append((entry.name, st.st_size, st.st_mtime_ns, file_ext(entry.name)))
+                    except OSError:
+                        continue
+        except OSError:
+            # Unreadable: record nothing so the next refresh retries it
+            mtime_ns = -1
+        return _DirVisit(path, parent, mtime_ns, files, children)
+
+    def refresh(self, full: bool = False) -> Dict[str, int]:
+        """
+        Bring the index up to date with the filesystem.
+
+        Returns:
+            Counts of directories listed, reused and removed
+        """
+        # The index may be shared with other roots; only this subtree is ours
+        dirs_where, dirs_params = self._where_under(self.root, "path")
+        files_where, files_params = self._where_under(self.root)
+        known: Dict[str, Tuple[int, List[str]]] = {}
+        if not full:
+            children: Dict[str, List[str]] = {}
+            rows = self._db.execute(
+                f"SELECT path, parent, mtime_ns FROM dirs WHERE {dirs_where}", dirs_params
+            ).fetchall()
+            for path, parent, _ in rows:
+                if parent is not None:
+                    children.setdefault(parent, []).append(path)
+            known = {path: (mtime_ns, children.get(path, [])) for path, _, mtime_ns in rows}
+
+        stats = {"listed": 0, "reused": 0, "removed": 0}
+        seen = set()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool, self._db:
+            if full:
+                self._db.execute(f"DELETE FROM files WHERE {files_where}", files_params)
+                self._db.execute(f"DELETE FROM dirs WHERE {dirs_where}", dirs_params)
+            pending = {pool.submit(self._visit, self.root, None, known.get(self.root))}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    visit = future.result()
+                    if visit is None:
+                        continue
+                    seen.add(visit.path)
+                    for child in visit.children:
+                        pending.add(pool.submit(self._visit, child, visit.path, known.get(child)))
+                    if visit.files is None:
+                        stats["reused"] += 1
+                        continue
+                    stats["listed"] += 1
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?)",
+                        (visit.path, visit.parent, visit.mtime_ns),
+                    )
+                    self._db.execute("DELETE FROM files WHERE dir = ?", (visit.path,))
+                    self._db.executemany(
+                        "INSERT INTO files (dir, name, size, mtime_ns, ext) VALUES (?, ?, ?, ?, ?)",
+                        [(visit.path, *f) for f in visit.files],
+                    )
+
+            gone = [path for path in known if path not in seen]
+            for path in gone:
+                self._db.execute("DELETE FROM dirs WHERE path = ?", (path,))
+                self._db.execute("DELETE FROM files WHERE dir = ?", (path,))
+            stats["removed"] = len(gone)
+        return stats
+
+    def _where_under(self, path: str, column: str = "dir") -> Tuple[str, Tuple[str, ...]]:
+        lo, hi = _subtree_bounds(path)
+        return f"({column} = ? OR ({column} >= ? AND {column} < ?))", (path, lo, hi)
+
+    def category_summary(self, path: str, top: int = 10) -> Dict[str, Any]:
+        """File count, total bytes and most common extensions below one directory."""
+        where, params = self._where_under(path)
+        files, total = self._db.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files WHERE {where}", params
+        ).fetchone()
+        exts = self._db.execute(
+            f"SELECT ext, COUNT(*) AS n, SUM(size) FROM files WHERE {where} "
+            "GROUP BY ext ORDER BY n DESC LIMIT ?",
+            (*params, top),
+        ).fetchall()
+        return {
+            "path": path,
+            "files": files,
+            "bytes": total,
+            "top_exts": [{"ext": e, "files": n, "bytes": b} for e, n, b in exts],
+        }
+
+    def summary(self, categories: Optional[List[str]] = None, top: int = 10) -> Dict[str, Dict[str, Any]]:
+        """Per-category summaries; defaults to every top-level directory of the root."""
+        if categories is None:
+            categories = [
+                os.path.basename(p)
+                for (p,) in self._db.execute(
+                    "SELECT path FROM dirs WHERE parent = ? ORDER BY path", (self.root,)
+                )
+            ]
+        result = {}
+        for name in categories:
+            path = os.path.join(self.root, name)
+            if self._db.execute("SELECT 1 FROM dirs WHERE path = ?", (path,)).fetchone():
+                result[name] = self.category_summary(path, top)
+        return result
+
+    def iter_files(self, under: Optional[str] = None) -> Iterator[FileEntry]:
+        """Yield indexed files, optionally limited to one subtree."""
+        where, params = self._where_under(os.path.abspath(under or self.root))
+        for d, name, size, mtime_ns, ext in self._db.execute(
+            f"SELECT dir, name, size, mtime_ns, ext FROM files WHERE {where}", params
+        ):
+            yield FileEntry(os.path.join(d, name), size, mtime_ns, ext)
+
+
+def human_bytes(n: float) -> str:
+    """du -h style size string."""
+    if n < 1024:
+        return f"{int(n)}B"
+    for unit in ("K", "M", "G"):
+        n /= 1024
+        if n < 1024:
+            return f"{n:.1f}{unit}"
+    return f"{n / 1024:.1f}T"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental media library inventory")
+    parser.add_argument("root")
+    parser.add_argument("--categories", nargs="*", default=None, help="top-level directories to report")
+    parser.add_argument("--index", default=None, help="index path (default: per-root file in ~/.cache)")
+    parser.add_argument("--full", action="store_true", help="rebuild the index from scratch")
+    parser.add_argument("--top", type=int, default=10, help="extensions listed per category")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of text")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root):
+        sys.stderr.write(f"Root not found: {args.root}\n")
+        sys.exit(1)
+
+    with Inventory(args.root, args.index) as inv:
+        stats = inv.refresh(full=args.full)
+        sizes = inv.summary(top=0)
+        report = inv.summary(args.categories, args.top)
+
+    if args.json:
+        print(json.dumps({"root": args.root, "refresh": stats, "top_level": sizes, "categories": report}, indent=2))
+        return
+
+    print(f"Inventory for: {args.root}")
+    print(f"(index: {stats['listed']} dirs listed, {stats['reused']} reused, {stats['removed']} removed)\n")
+    print("Top-level sizes:")
+    for name, info in sorted(sizes.items(), key=lambda kv: kv[1]["bytes"]):
+        print(f"{human_bytes(info['bytes']):>8}  {info['path']}")
+    print()
+    for info in report.values():
+        print(f"{info['path']}: {info['files']} files, {human_bytes(info['bytes'])}")
+        for e in info["top_exts"]:
+            print(f"  {e['ext']}: {e['files']} ({human_bytes(e['bytes'])})")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+NAMING_STANDARD_V2 audit and enforcement for the comics library.
+
+Engine behind scripts/manga-naming-enforcer.sh. Each top-level series
+folder is walked once with os.scandir (folders in parallel) to collect
+file, comic and byte counts; compliance is then decided from names and
+counts in memory, so no per-folder find/du/mv processes are forked.
+
+Fix mode builds the complete rename plan before touching anything and
+flags collisions up front: a target that already exists (compared
+case-insensitively, as OneDrive does) or two folders that would get the
+same name. The plan is applied on a thread pool and every step is
+appended to a JSONL journal, so an interrupted run can be resumed and a
+finished one rolled back.
+
+Usage:
+    from naming_enforcer import scan_library, plan_renames, apply_plan
+
+    folders = scan_library("/var/mnt/fast8tb/Cloud/OneDrive/Books/Comics")
+    plan = plan_renames(folders)
+    for rename in plan.renames:
+        print(rename.src, "->", rename.dst)
+
+CLI (same modes as the shell script):
+    naming_enforcer.py [--audit]                 # report compliance (default)
+    naming_enforcer.py --fix [--exec]            # plan renames; apply with --exec
+    naming_enforcer.py --cleanup [--exec]        # remove Mylar3 stubs
+    naming_enforcer.py --resume JOURNAL          # finish an interrupted --fix --exec
+    naming_enforcer.py --rollback JOURNAL        # undo the renames of a journal
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import re
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+DEFAULT_COMICS_ROOT = "/var/mnt/fast8tb/Cloud/OneDrive/Books/Comics"
+JOURNAL_DIR = os.environ.get(
+    "NAMING_JOURNAL_DIR",
+    str(pathlib.Path.home() / ".cache" / "usenet-media-stack" / "naming-journal"),
+)
+
+STANDARD_RE = re.compile(r".+ \([A-Za-z ]+\) \[EN\]$")
+YEAR_ONLY_RE = re.compile(r".+ \([0-9]{4}\)$")
+YEAR_SUFFIX_RE = re.compile(r" \([0-9]{4}\)$")
+COMIC_EXTS = (".cbz", ".cbr")
+SPECIAL_FOLDERS = {"MANGA_PROJECT_DOCS", "Manga", "logs"}
+
+# Known publisher mappings; extend as series are researched
+PUBLISHER_MAP: Dict[str, str] = {
+    "Death Note": "Viz",
+    "Kingdom": "Kodansha",
+    "Parasyte": "Kodansha",
+    "Billy Bat": "Fan Translation",
+    "My Hero Academia": "Viz",
+}
+
+
+class FolderStats(NamedTuple):
+    name: str
+    path: str
+    files: int
+    comics: int
+    size: int
+
+    @property
+    def compliant(self) -> bool:
+        return STANDARD_RE.match(self.name) is not None
+
+    @property
+    def stub(self) -> bool:
+        """Mylar3 stub: year-only name and no comic files."""
+        return YEAR_ONLY_RE.match(self.name) is not None and self.comics == 0
+
+
+class Rename(NamedTuple):
+    src: str
+    dst: str
+
+
+class RenamePlan(NamedTuple):
+    renames: List[Rename]
+    conflicts: List[Tuple[Rename, str]]  # (rename, reason)
+
+
+def _folder_stats(name: str, path: str) -> FolderStats:
+    """Walk one series folder. Runs on the pool."""
+    files = comics = size = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            files += 1
+                            size += entry.stat(follow_symlinks=False).st_size
+                            if entry.name.lower().endswith(COMIC_EXTS):
+                                comics += 1
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return FolderStats(name, path, files, comics, size)
+
+
+def series_folders(root: str) -> List[Tuple[str, str]]:
+    """(name, path) of every top-level folder, minus hidden and special ones."""
+    folders = []
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.name.startswith(".") or entry.name in SPECIAL_FOLDERS:
+                continue
+            if entry.is_dir():
+                folders.append((entry.name, entry.path))
+    return sorted(folders)
+
+
+def scan_library(root: str, workers: int = 8) -> List[FolderStats]:
+    """Stats for every series folder under root, sorted by name."""
+    folders = series_folders(root)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="naming-scan") as pool:
+        return list(pool.map(lambda f: _folder_stats(*f), folders))
+
+
+def target_name(name: str, publishers: Optional[Dict[str, str]] = None) -> str:
+    """Standard name for a non-compliant folder: 'Series (Publisher) [EN]'."""
+    base = YEAR_SUFFIX_RE.sub("", name)
+    publisher = (publishers if publishers is not None else PUBLISHER_MAP).get(base, "UNKNOWN")
+    return f"{base} ({publisher}) [EN]"
+
+
+def plan_renames(
+    folders: Iterable[FolderStats],
+    publishers: Optional[Dict[str, str]] = None,
+    existing: Optional[Iterable[str]] = None,
+) -> RenamePlan:
+    """
+    Rename plan for every non-compliant folder that is not a stub.
+
+    `existing` defaults to the scanned folder names; pass the root's full
+    listing to also guard against special and hidden folders.
+    """
+    folders = list(folders)
+    taken = {name.casefold() for name in (existing if existing is not None else (f.name for f in folders))}
+    wanted: Dict[str, List[Rename]] = {}
+    for folder in folders:
+        if folder.compliant or folder.stub:
+            continue
+        new_name = target_name(folder.name, publishers)
+        rename = Rename(folder.path, os.path.join(os.path.dirname(folder.path), new_name))
+        wanted.setdefault(new_name.casefold(), []).append(rename)
+
+    renames, conflicts = [], []
+    for key, group in wanted.items():
+        if key in taken:
+            conflicts.extend((r, "target exists") for r in group)
+        elif len(group) > 1:
+            conflicts.extend((r, f"{len(group)} folders map to this name") for r in group)
+        else:
+            renames.append(group[0])
+    renames.sort()
+    conflicts.sort()
+    return RenamePlan(renames, conflicts)
+
+
+class Journal:
+    """Append-only JSONL record of a run: plan lines first, then one line per step."""
+
+    def __init__(self, path: str):
+        self.path = path
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a+", encoding="utf-8")
+        self._lock = threading.Lock()
+        # Terminate a line torn by a crash so the next record is not glued onto it
+        if self._file.tell():
+            self._file.seek(self._file.tell() - 1)
+            if self._file.read(1) != "\n":
+                self._file.write("\n")
+
+    @staticmethod
+    def new_path(root: str) -> str:
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.path.basename(root.rstrip('/')) or 'root'}.jsonl"
+        return os.path.join(JOURNAL_DIR, name)
+
+    def write(self, op: str, src: str, dst: str = "") -> None:
+        line = json.dumps({"op": op, "src": src, "dst": dst, "ts": round(time.time(), 3)})
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+    @staticmethod
+    def read(path: str) -> Tuple[List[Rename], Dict[Rename, str]]:
+        """Planned renames in order, and the last recorded state of each."""
+        planned, state = [], {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from a crash
+                rename = Rename(record["src"], record["dst"])
+                if record["op"] == "plan":
+                    planned.append(rename)
+                state[rename] = record["op"]
+        return planned, state
+
+
+def _rename(journal: Journal, rename: Rename, undo: bool = False) -> Tuple[Rename, str]:
+    """Apply (or undo) one rename without ever overwriting. Runs on the pool."""
+    src, dst = (rename.dst, rename.src) if undo else rename
+    done = "undone" if undo else "done"
+    if not os.path.lexists(src) and os.path.lexists(dst):
+        journal.write(done, *rename)  # finished before the journal line was written
+        return rename, "already"
+    if os.path.lexists(dst):
+        journal.write("conflict", *rename)
+        return rename, "conflict"
+    try:
+        os.rename(src, dst)
+    except OSError as e:
+        journal.write("failed", *rename)
+        return rename, f"failed: {e.strerror}"
+    journal.write(done, *rename)
+    return rename, done
+
+
+def apply_plan(
+    renames: List[Rename], journal: Journal, workers: int = 8, undo: bool = False
+) -> List[Tuple[Rename, str]]:
+    """Run renames on a thread pool; returns (rename, outcome) in plan order."""
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="naming-apply") as pool:
+        return list(pool.map(lambda r: _rename(journal, r, undo), renames))
+
+
+def remove_stubs(stubs: List[FolderStats], journal: Optional[Journal], workers: int = 8) -> List[Tuple[str, str]]:
+    """Delete stub folders on a thread pool; returns (name, outcome). Removals cannot be rolled back."""
+
+    def remove(folder: FolderStats) -> Tuple[str, str]:
+        try:
+            shutil.rmtree(folder.path)
+        except OSError as e:
+            return folder.name, f"failed: {e.strerror}"
+        if journal is not None:
+            journal.write("removed", folder.path)
+        return folder.name, "removed"
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="naming-cleanup") as pool:
+        return list(pool.map(remove, stubs))
+
+
+if sys.stdout.isatty():
+    RED, GREEN, YELLOW, BLUE, NC = "\033[0;31m", "\033[0;32m", "\033[0;33m", "\033[0;34m", "\033[0m"
+else:
+    RED = GREEN = YELLOW = BLUE = NC = ""
+
+
+def _banner(title: str) -> None:
+    print("========================================")
+    print(title)
+    print("========================================")
+
+
+def audit(folders: List[FolderStats], root: str) -> None:
+    _banner("MANGA NAMING STANDARD AUDIT")
+    print(f"Root: {root}")
+    print("Standard: NAMING_STANDARD_V2 (Series (Publisher) [Language])\n")
+    mb = 1024 * 1024
+    print(f"{BLUE}=== COMPLIANT FOLDERS ==={NC}")
+    compliant = [f for f in folders if f.compliant]
+    for f in compliant:
+        print(f"{GREEN}[OK]{NC} {f.name} ({f.comics} CBZ, {f.size // mb}MB)")
+    print(f"\n{YELLOW}=== NON-COMPLIANT FOLDERS ==={NC}")
+    stubs = 0
+    for f in folders:
+        if f.compliant:
+            continue
+        if f.stub:
+            stubs += 1
+            print(f"{RED}[STUB]{NC} {f.name} (metadata only, 0 CBZ)")
+        else:
+            print(f"{YELLOW}[FIX]{NC} {f.name} ({f.comics} CBZ, {f.size // mb}MB)")
+    print()
+    _banner("SUMMARY")
+    total = len(folders)
+    print(f"Total folders: {total}")
+    print(f"{GREEN}Compliant: {len(compliant)}{NC} ({len(compliant) * 100 // total if total else 0}%)")
+    print(f"{YELLOW}Non-compliant: {total - len(compliant)}{NC}")
+    print(f"{RED}Mylar3 stubs: {stubs}{NC} (safe to remove)")
+
+
+def fix(folders: List[FolderStats], root: str, execute: bool, workers: int) -> None:
+    _banner("NAMING STANDARD FIX MODE")
+    print(f"Root: {root}")
+    print(f"Mode: {'--exec' if execute else 'dry-run'}\n")
+    plan = plan_renames(folders, existing=os.listdir(root))
+    for rename, reason in plan.conflicts:
+        print(f"{RED}[CONFLICT]{NC} {os.path.basename(rename.src)} -> {os.path.basename(rename.dst)} ({reason})")
+
+    renamed = 0
+    if not execute:
+        for rename in plan.renames:
+            print(f"{YELLOW}[WOULD RENAME]{NC}")
+            print(f"  From: {os.path.basename(rename.src)}")
+            print(f"  To:   {os.path.basename(rename.dst)}")
+    elif plan.renames:
+        journal = Journal(Journal.new_path(root))
+        for rename in plan.renames:
+            journal.write("plan", *rename)
+        renamed = _report(apply_plan(plan.renames, journal, workers))
+        journal.close()
+        print(f"\nJournal: {journal.path} (undo with --rollback)")
+
+    print()
+    _banner("SUMMARY")
+    print(f"Non-compliant (with content): {len(plan.renames) + len(plan.conflicts)}")
+    print(f"Conflicts: {len(plan.conflicts)}")
+    if execute:
+        print(f"{GREEN}Renamed: {renamed}{NC}")
+    else:
+        print("Run with --exec to rename\n")
+        print("NOTE: Review suggested names. Some may need manual publisher research.")
+        print("Add known mappings to PUBLISHER_MAP in lib/python/naming_enforcer.py.")
+
+
+def _report(results: List[Tuple[Rename, str]], undo: bool = False) -> int:
+    """Print outcomes; returns how many renames (or undos) happened or were already in place."""
+    count = 0
+    for rename, outcome in results:
+        src, dst = os.path.basename(rename.src), os.path.basename(rename.dst)
+        if undo:
+            src, dst = dst, src
+        if outcome in ("done", "undone"):
+            count += 1
+            print(f"{GREEN}[{'RESTORED' if undo else 'RENAMED'}]{NC} {src} -> {dst}")
+        elif outcome == "already":
+            count += 1
+            print(f"[SKIPPED] {src} -> {dst} (already in place)")
+        elif outcome == "conflict":
+            print(f"{RED}[CONFLICT]{NC} {src} -> {dst} (target exists)")
+        else:
+            print(f"{RED}[FAILED]{NC} {src} -> {dst} ({outcome})")
+    return count
+
+
+def cleanup(folders: List[FolderStats], root: str, execute: bool, workers: int) -> None:
+    _banner("MYLAR3 STUB CLEANUP")
+    print(f"Root: {root}")
+    print(f"Mode: {'--exec' if execute else 'dry-run'}\n")
+    stubs = [f for f in folders if f.stub]
+    removed = 0
+    if execute:
+        journal = Journal(Journal.new_path(root)) if stubs else None
+        for name, outcome in remove_stubs(stubs, journal, workers):
+            if outcome == "removed":
+                removed += 1
+                print(f"{GREEN}[REMOVED]{NC} {name}")
+            else:
+                print(f"{RED}[FAILED]{NC} {name} ({outcome})")
+        if journal is not None:
+            journal.close()
+    else:
+        for f in stubs:
+            print(f"{YELLOW}[WOULD REMOVE]{NC} {f.name}")
+    print()
+    _banner("SUMMARY")
+    print(f"Stubs found: {len(stubs)}")
+    if execute:
+        print(f"{GREEN}Removed: {removed}{NC}")
+    else:
+        print("Run with --exec to remove")
+
+
+def replay(path: str, rollback: bool, workers: int) -> int:
+    """Finish (or undo) the renames recorded in a journal."""
+    planned, state = Journal.read(path)
+    if rollback:
+        todo = [r for r in reversed(planned) if state.get(r) in ("done", "plan")]
+    else:
+        todo = [r for r in planned if state.get(r) == "plan"]
+    _banner("NAMING JOURNAL " + ("ROLLBACK" if rollback else "RESUME"))
+    print(f"Journal: {path}")
+    print(f"Pending: {len(todo)} of {len(planned)} planned renames\n")
+    journal = Journal(path)
+    results = apply_plan(todo, journal, workers, undo=rollback)
+    journal.close()
+    count = _report(results, undo=rollback)
+    print(f"\n{'Restored' if rollback else 'Renamed'}: {count}")
+    return 0 if count == len(todo) else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit and enforce NAMING_STANDARD_V2 for the comics library")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--audit", "-a", action="store_true", help="report compliance (default)")
+    mode.add_argument("--fix", "-f", action="store_true", help="rename non-compliant folders (dry-run)")
+    mode.add_argument("--cleanup", "-c", action="store_true", help="remove Mylar3 stubs (dry-run)")
+    mode.add_argument("--resume", metavar="JOURNAL", help="apply the unfinished renames of a journal")
+    mode.add_argument("--rollback", metavar="JOURNAL", help="undo the renames of a journal")
+    parser.add_argument("--exec", dest="execute", action="store_true", help="with --fix/--cleanup: do it for real")
+    parser.add_argument("--root", default=os.environ.get("COMICS_ROOT", DEFAULT_COMICS_ROOT))
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    if args.resume or args.rollback:
+        sys.exit(replay(args.resume or args.rollback, bool(args.rollback), args.workers))
+
+    if not os.path.isdir(args.root):
+        sys.stderr.write(f"Error: Comics root not found: {args.root}\n")
+        sys.exit(1)
+    folders = scan_library(args.root, args.workers)
+    if args.fix:
+        fix(folders, args.root, args.execute, args.workers)
+    elif args.cleanup:
+        cleanup(folders, args.root, args.execute, args.workers)
+    else:
+        audit(folders, args.root)
+
+
+if __name__ == "__main__":
+    main()
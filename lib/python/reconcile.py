@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Cross-service library reconciliation with hash joins.
+
+Each side of a comparison is loaded once (ARR catalogues in one request,
+Komga through paged iteration, disk folders with one scandir) into
+CatalogEntry records. The join then runs in passes, each a dict lookup per
+entry, so 50k titles reconcile in linear time:
+
+    1. path        container path mapped to the host (service_registry.PATH_MAP), normalised
+    2. title+year  normalised title plus release year
+    3. title       normalised title, only when unique on both sides
+
+Entries matched in an earlier pass are not considered again. Titles that
+map to several entries on either side are reported as ambiguous instead of
+guessed.
+
+Usage:
+    from reconcile import reconcile, sonarr_series, disk_folders
+
+    result = reconcile(sonarr_series(sonarr), disk_folders(["/var/mnt/pool/TV"]))
+    result.left_only      # Sonarr series with no folder on disk
+    result.right_only     # folders Sonarr does not know about
+    result.to_dict()      # structured diff for JSON output
+
+CLI:
+    reconcile.py sonarr-disk ROOT [ROOT ...] [--json]
+    reconcile.py radarr-disk ROOT [ROOT ...] [--json]
+    reconcile.py komga-disk  ROOT [ROOT ...] [--json]
+    reconcile.py radarr-files [--json]        # movie files missing on disk
+    reconcile.py sonarr-files [--json]        # episode files missing on disk
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    from .api_client import ArrClient, KomgaClient, PageFetchError, RequestScheduler
+    from .service_registry import host_path
+except ImportError:
+    from api_client import ArrClient, KomgaClient, PageFetchError, RequestScheduler
+    from service_registry import host_path
+
+_YEAR_SUFFIX_RE = re.compile(r"\s*[\(\[]((?:19|20)\d\d)[\)\]]\s*$")
+_ARTICLE_RE = re.compile(r"^(the|a|an)\s+")
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+
+class CatalogEntry(NamedTuple):
+    source: str
+    id: Any
+    title: str
+    year: Optional[int]
+    path: Optional[str]
+    extra: Dict[str, Any]
+
+
+class Match(NamedTuple):
+    left: CatalogEntry
+    right: CatalogEntry
+    method: str  # path, title_year, title
+
+
+class ReconcileResult(NamedTuple):
+    matched: List[Match]
+    left_only: List[CatalogEntry]
+    right_only: List[CatalogEntry]
+    ambiguous: List[Tuple[str, List[CatalogEntry], List[CatalogEntry]]]  # (title key, left, right)
+
+    def to_dict(self) -> Dict[str, Any]:
+        def brief(e: CatalogEntry) -> Dict[str, Any]:
+            return {"source": e.source, "id": e.id, "title": e.title, "year": e.year, "path": e.path}
+
+        by_method: Dict[str, int] = {}
+        for m in self.matched:
+            by_method[m.method] = by_method.get(m.method, 0) + 1
+        return {
+            "summary": {
+                "matched": len(self.matched),
+                "matched_by": by_method,
+                "left_only": len(self.left_only),
+                "right_only": len(self.right_only),
+                "ambiguous": len(self.ambiguous),
+            },
+            "left_only": [brief(e) for e in self.left_only],
+            "right_only": [brief(e) for e in self.right_only],
+            "ambiguous": [
+                {"key": key, "left": [brief(e) for e in left], "right": [brief(e) for e in right]}
+                for key, left, right in self.ambiguous
+            ],
+        }
+
+
+def normalize_title(title: str) -> str:
+    """Comparison key: accents, case, punctuation, '&' and leading articles folded."""
+    text = unicodedata.normalize("NFKD", title)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = _YEAR_SUFFIX_RE.sub("", text).replace("&", " and ")
+    text = _NON_WORD_RE.sub(" ", text).strip()
+    return _ARTICLE_RE.sub("", text)
+
+
+def split_year(name: str) -> Tuple[str, Optional[int]]:
+    """'Title (2019)' -> ('Title', 2019); names without a year keep year None."""
+    match = _YEAR_SUFFIX_RE.search(name)
+    if match:
+        return name[:match.start()], int(match.group(1))
+    return name, None
+
+
+# --- catalogue loaders -------------------------------------------------------
+
+def _arr_list(client: ArrClient, endpoint: str) -> List[Dict[str, Any]]:
+    status, body = client.get(endpoint)
+    if status != 200:
+        raise PageFetchError(endpoint, status, body)
+    try:
+        return json.loads(body)
+    except json.JSONDecodeError:
+        raise PageFetchError(endpoint, status, "invalid JSON")
+
+
+def sonarr_series(client: ArrClient, path_map: Optional[Dict[str, str]] = None) -> List[CatalogEntry]:
+    return [
+        CatalogEntry(
+            "sonarr", s["id"], s.get("title", ""), s.get("year") or None,
+            host_path(s.get("path"), path_map),
+            {"episodeFileCount": (s.get("statistics") or {}).get("episodeFileCount")},
+        )
+        for s in _arr_list(client, "/api/v3/series")
+    ]
+
+
+def radarr_movies(client: ArrClient, path_map: Optional[Dict[str, str]] = None) -> List[CatalogEntry]:
+    return [
+        CatalogEntry(
+            "radarr", m["id"], m.get("title", ""), m.get("year") or None,
+            host_path(m.get("path"), path_map), {"hasFile": m.get("hasFile")},
+        )
+        for m in _arr_list(client, "/api/v3/movie")
+    ]
+
+
+def radarr_files(client: ArrClient, path_map: Optional[Dict[str, str]] = None) -> List[CatalogEntry]:
+    """One entry per movie file Radarr believes it has."""
+    entries = []
+    for m in _arr_list(client, "/api/v3/movie"):
+        movie_file = m.get("movieFile")
+        if not m.get("hasFile") or not movie_file:
+            continue
+        path = movie_file.get("path") or os.path.join(m.get("path", ""), movie_file.get("relativePath", ""))
+        entries.append(CatalogEntry(
+            "radarr", movie_file.get("id"), m.get("title", ""), m.get("year") or None,
+            host_path(path, path_map), {"movieId": m["id"], "size": movie_file.get("size")},
+        ))
+    return entries
+
+
+def sonarr_episode_files(
+    client: ArrClient,
+    series_ids: Iterable[int],
+    path_map: Optional[Dict[str, str]] = None,
+    workers: int = 8,
+) -> List[CatalogEntry]:
+    """One entry per episode file, fetched for several series concurrently."""
+
+    def fetch(sid: int) -> List[Dict[str, Any]]:
+        return _arr_list(client, f"/api/v3/episodefile?seriesId={sid}")
+
+    entries = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for files in pool.map(fetch, list(series_ids)):
+            for f in files:
+                entries.append(CatalogEntry(
+                    "sonarr", f["id"], os.path.basename(f.get("path") or f.get("relativePath", "")), None,
+                    host_path(f.get("path"), path_map), {"seriesId": f.get("seriesId"), "size": f.get("size")},
+                ))
+    return entries
+
+
+def komga_series(client: KomgaClient, path_map: Optional[Dict[str, str]] = None) -> Iterator[CatalogEntry]:
+    for s in client.iter_records("/api/v1/series", page_size=500):
+        title = (s.get("metadata") or {}).get("title") or s.get("name", "")
+        title, year = split_year(title)
+        yield CatalogEntry(
+            "komga", s["id"], title, year, host_path(s.get("url"), path_map),
+            {"booksCount": s.get("booksCount")},
+        )
+
+
+def disk_folders(roots: Iterable[str]) -> Iterator[CatalogEntry]:
+    """Immediate subdirectories of each root, titled from 'Name (Year)' folder names."""
+    for root in roots:
+        try:
+            with os.scandir(root) as it:
+                entries = [e for e in it if e.is_dir(follow_symlinks=False) and not e.name.startswith(".")]
+        except OSError:
+            continue
+        for e in entries:
+            title, year = split_year(e.name)
+            yield CatalogEntry("disk", e.path, title, year, os.path.normpath(e.path), {})
+
+
+def disk_files(paths: Iterable[str]) -> Iterator[CatalogEntry]:
+    """Entries for existing files, e.g. from Inventory.iter_files()."""
+    for path in paths:
+        yield CatalogEntry("disk", path, os.path.basename(path), None, os.path.normpath(path), {})
+
+
+# --- join --------------------------------------------------------------------
+
+def _index(entries: Iterable[Tuple[int, CatalogEntry]], key: Callable[[CatalogEntry], Any]) -> Dict[Any, List[int]]:
+    index: Dict[Any, List[int]] = {}
+    for i, e in entries:
+        k = key(e)
+        if k is not None:
+            index.setdefault(k, []).append(i)
+    return index
+
+
+def _path_key(e: CatalogEntry) -> Optional[str]:
+    return e.path
+
+
+def _title_year_key(e: CatalogEntry) -> Optional[Tuple[str, int]]:
+    return (normalize_title(e.title), e.year) if e.title and e.year else None
+
+
+def _title_key(e: CatalogEntry) -> Optional[str]:
+    return normalize_title(e.title) or None
+
+
+PASSES: List[Tuple[str, Callable[[CatalogEntry], Any]]] = [
+    ("path", _path_key),
+    ("title_year", _title_year_key),
+    ("title", _title_key),
+]
+
+
+def reconcile(
+    left: Iterable[CatalogEntry],
+    right: Iterable[CatalogEntry],
+    passes: Optional[List[str]] = None,
+) -> ReconcileResult:
+    """
+    Join two catalogues by path, then title+year, then title.
+
+    Returns:
+        ReconcileResult with matches (and the pass that found them), entries
+        only on either side, and title keys that were not unique
+    """
+    left, right = list(left), list(right)
+    open_left = set(range(len(left)))
+    open_right = set(range(len(right)))
+    matched: List[Match] = []
+    ambiguous: Dict[Any, Tuple[List[int], List[int]]] = {}
+
+    for method, key in PASSES:
+        if passes is not None and method not in passes:
+            continue
+        right_index = _index(((i, right[i]) for i in sorted(open_right)), key)
+        left_index = _index(((i, left[i]) for i in sorted(open_left)), key)
+        for k, lefts in left_index.items():
+            rights = right_index.get(k)
+            if not rights:
+                continue
+            if len(lefts) == 1 and len(rights) == 1:
+                li, ri = lefts[0], rights[0]
+                matched.append(Match(left[li], right[ri], method))
+                open_left.discard(li)
+                open_right.discard(ri)
+            elif method == "title":
+                ambiguous[k] = (lefts, rights)
+            elif len(lefts) == len(rights) and method == "path":
+                # Same path listed twice on both sides: pair them up in order
+                for li, ri in zip(lefts, rights):
+                    matched.append(Match(left[li], right[ri], method))
+                    open_left.discard(li)
+                    open_right.discard(ri)
+
+    # Ambiguous titles stay out of left_only/right_only so they are not double-reported
+    held_left = {i for lefts, _ in ambiguous.values() for i in lefts if i in open_left}
+    held_right = {i for _, rights in ambiguous.values() for i in rights if i in open_right}
+    return ReconcileResult(
+        matched=matched,
+        left_only=[left[i] for i in sorted(open_left - held_left)],
+        right_only=[right[i] for i in sorted(open_right - held_right)],
+        ambiguous=[
+            (k, [left[i] for i in lefts if i in open_left], [right[i] for i in rights if i in open_right])
+            for k, (lefts, rights) in ambiguous.items()
+        ],
+    )
+
+
+def print_report(result: ReconcileResult, left_name: str, right_name: str) -> None:
+    summary = result.to_dict()["summary"]
+    print(f"Matched: {summary['matched']} {summary['matched_by']}")
+    print(f"\nOnly in {left_name} ({len(result.left_only)}):")
+    for e in result.left_only:
+        print(f"  {e.title}{f' ({e.year})' if e.year else ''}  {e.path or ''}")
+    print(f"\nOnly in {right_name} ({len(result.right_only)}):")
+    for e in result.right_only:
+        print(f"  {e.title}{f' ({e.year})' if e.year else ''}  {e.path or ''}")
+    if result.ambiguous:
+        print(f"\nAmbiguous titles ({len(result.ambiguous)}):")
+        for key, lefts, rights in result.ambiguous:
+            print(f"  {key}: {len(lefts)} in {left_name}, {len(rights)} in {right_name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile ARR/Komga catalogues with each other or the disk")
+    parser.add_argument(
+        "mode", choices=["sonarr-disk", "radarr-disk", "komga-disk", "radarr-files", "sonarr-files"]
+    )
+    parser.add_argument("roots", nargs="*", help="library folders to compare against")
+    parser.add_argument("--json", action="store_true", help="print the diff as JSON")
+    args = parser.parse_args()
+
+    try:
+        from .service_registry import ServiceRegistry
+    except ImportError:
+        from service_registry import ServiceRegistry
+
+    registry = ServiceRegistry(timeout=60, priority=RequestScheduler.BULK)
+    service, target = args.mode.split("-", 1)
+    if target == "disk" and not args.roots:
+        parser.error(f"{args.mode} needs at least one ROOT")
+    try:
+        client = registry.client(service)
+        if target == "files":
+            if service == "radarr":
+                left = radarr_files(client)
+            else:
+                # Series Sonarr reports no files for need no request
+                series = [e.id for e in sonarr_series(client) if e.extra.get("episodeFileCount") != 0]
+                left = sonarr_episode_files(client, series)
+            right = list(disk_files(e.path for e in left if e.path and os.path.exists(e.path)))
+        else:
+            left = {"sonarr": sonarr_series, "radarr": radarr_movies, "komga": komga_series}[service](client)
+            right = disk_folders(args.roots)
+        result = reconcile(left, right, passes=["path"] if target == "files" else None)
+    except (LookupError, PageFetchError) as e:
+        sys.stderr.write(f"Error: {e}\n")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(result.to_dict(), indent=2))
+    else:
+        print_report(result, service, "disk")
+
+
+if __name__ == "__main__":
+    main()
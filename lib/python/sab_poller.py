@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Delta poller for the SABnzbd queue and history.
+
+Instead of pulling and parsing the whole queue on every poll, each poll
+fetches only the head of the queue (start=0, limit=head_size), where the
+active downloads are. The rest of the queue is paged through only when
+the head shows that something moved: the slot total changed or slots
+appeared in or dropped out of the head. A full sweep also runs every
+`full_sweep_every` polls to catch reorders further down.
+
+History is read newest first and paging stops at the first job already
+seen, so a poll normally costs one small request. Completed and failed
+jobs fire callbacks once each.
+
+State is bounded: at most `max_slots` queue slots are tracked, and the set
+of seen history ids keeps only the newest `max_history_ids`.
+
+Usage:
+    from sab_poller import SabPoller
+
+    poller = SabPoller(
+        sab,
+        on_change=lambda delta: print(delta.added, delta.removed, delta.updated),
+        on_complete=lambda job: print("done", job["name"]),
+        on_failure=lambda job: print("failed", job["name"], job.get("fail_message")),
+    )
+    poller.run(interval=5)            # or call poller.poll() yourself
+
+CLI (NDJSON events on stdout):
+    sab_poller.py [--interval 5] [--once]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    from .api_client import PageFetchError, SabClient
+    from .service_registry import ServiceRegistry
+except ImportError:
+    from api_client import PageFetchError, SabClient
+    from service_registry import ServiceRegistry
+
+logger = logging.getLogger("sab_poller")
+
+# Slot fields whose change counts as an update. index and timeleft are left
+# out: SABnzbd recomputes them for every slot whenever the head job moves.
+SLOT_FIELDS = ("status", "percentage", "mbleft", "priority", "filename")
+
+Slot = Dict[str, Any]
+
+
+class SabDelta(NamedTuple):
+    added: List[Slot]
+    removed: List[str]  # nzo_ids
+    updated: List[Slot]
+    completed: List[Slot]  # history entries
+    failed: List[Slot]
+    totals: Dict[str, Any]  # noofslots_total, mbleft, kbpersec, paused, full_sweep
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.updated or self.completed or self.failed)
+
+
+def slot_fingerprint(slot: Slot) -> Tuple:
+    return tuple(slot.get(field) for field in SLOT_FIELDS)
+
+
+class SabPoller:
+    """Emits only what changed in the SABnzbd queue and history between polls."""
+
+    def __init__(
+        self,
+        client: SabClient,
+        head_size: int = 20,
+        page_size: int = 200,
+        full_sweep_every: int = 12,
+        history_page: int = 20,
+        max_slots: int = 20000,
+        max_history_ids: int = 2000,
+        on_change: Optional[Callable[[SabDelta], None]] = None,
+        on_complete: Optional[Callable[[Slot], None]] = None,
+        on_failure: Optional[Callable[[Slot], None]] = None,
+    ):
+        self.client = client
+        self.head_size = head_size
+        self.page_size = page_size
+        self.full_sweep_every = full_sweep_every
+        self.history_page = history_page
+        self.max_slots = max_slots
+        self.max_history_ids = max_history_ids
+        self.on_change = on_change
+        self.on_complete = on_complete
+        self.on_failure = on_failure
+
+        self._slots: Dict[str, Tuple] = {}  # nzo_id -> fingerprint
+        self._head: List[str] = []
+        self._total: Optional[int] = None
+        self._seen_history: "OrderedDict[str, None]" = OrderedDict()
+        self._history_primed = False
+        self._history_update: Optional[Any] = None
+        self._polls = 0
+
+    def _fetch_head(self) -> Dict[str, Any]:
+        return next(self.client.iter_pages("queue", self.head_size))
+
+    def _sweep(self) -> List[Slot]:
+        """Every queue slot, up to max_slots."""
+        slots = []
+        for slot in self.client.iter_slots("queue", self.page_size):
+            slots.append(slot)
+            if len(slots) >= self.max_slots:
+                break
+        return slots
+
+    def _queue_delta(self) -> Tuple[List[Slot], List[str], List[Slot], Dict[str, Any]]:
+        head = self._fetch_head()
+        head_slots = head.get("slots") or []
+        head_ids = [s.get("nzo_id") for s in head_slots]
+        total = int(head.get("noofslots_total", len(head_slots)) or 0)
+
+        self._polls += 1
+        full = (
+            self._total is None
+            or total != self._total
+            or set(head_ids) != set(self._head)
+            or (self.full_sweep_every and self._polls % self.full_sweep_every == 0)
+        )
+        # The head page already holds the whole queue when it is short
+        if full and total > len(head_slots):
+            current = self._sweep()
+        else:
+            current = head_slots
+
+        added, updated = [], []
+        seen = set()
+        for slot in current:
+            nzo_id = slot.get("nzo_id")
+            if nzo_id is None:
+                continue
+            seen.add(nzo_id)
+            fingerprint = slot_fingerprint(slot)
+            previous = self._slots.get(nzo_id)
+            if previous is None:
+                added.append(slot)
+            elif previous != fingerprint:
+                updated.append(slot)
+            self._slots[nzo_id] = fingerprint
+
+        removed = []
+        if full:
+            removed = [nzo_id for nzo_id in self._slots if nzo_id not in seen]
+            for nzo_id in removed:
+                del self._slots[nzo_id]
+        # Untracked slots beyond max_slots are never reported as added
+        while len(self._slots) > self.max_slots:
+            self._slots.pop(next(iter(self._slots)))
+
+        self._head = head_ids
+        self._total = total
+        totals = {
+            "noofslots_total": total,
+            "mbleft": head.get("mbleft"),
+            "kbpersec": head.get("kbpersec"),
+            "paused": head.get("paused"),
+            "full_sweep": bool(full),
+        }
+        return added, removed, updated, totals
+
+    def _remember(self, nzo_id: str) -> None:
+        self._seen_history[nzo_id] = None
+        if len(self._seen_history) > self.max_history_ids:
+            self._seen_history.popitem(last=False)
+
+    def _history_delta(self) -> Tuple[List[Slot], List[Slot]]:
+        params = {}
+        if self._history_update is not None:
+            # Newer SABnzbd versions answer "history": false when nothing changed
+            params["last_history_update"] = self._history_update
+        new = []
+        for page in self.client.iter_pages("history", self.history_page, **params):
+            if not page:
+                return [], []
+            if "last_history_update" in page:
+                self._history_update = page["last_history_update"]
+            fresh = [s for s in page.get("slots") or [] if s.get("nzo_id") not in self._seen_history]
+            new.extend(fresh)
+            # Stop at the first known job, and only read one page to prime
+            if len(fresh) < len(page.get("slots") or []) or not self._history_primed:
+                break
+            if len(new) >= self.max_history_ids:
+                break
+
+        # Oldest first, so callbacks fire in completion order
+        for slot in reversed(new):
+            self._remember(slot["nzo_id"])
+        if not self._history_primed:
+            # Jobs finished before we started are not news
+            self._history_primed = True
+            return [], []
+        completed = [s for s in reversed(new) if s.get("status") == "Completed"]
+        failed = [s for s in reversed(new) if s.get("status") == "Failed"]
+        return completed, failed
+
+    def poll(self) -> SabDelta:
+        """
+        Fetch changes since the last poll and fire callbacks.
+
+        The first poll reports the whole queue as added and primes history
+        without reporting old jobs. Raises PageFetchError if SABnzbd fails.
+        """
+        added, removed, updated, totals = self._queue_delta()
+        completed, failed = self._history_delta()
+        delta = SabDelta(added, removed, updated, completed, failed, totals)
+
+        for callback, items in ((self.on_complete, completed), (self.on_failure, failed)):
+            if callback is None:
+                continue
+            for item in items:
+                try:
+                    callback(item)
+                except Exception:
+                    logger.exception("SABnzbd poller callback failed")
+        if delta and self.on_change is not None:
+            try:
+                self.on_change(delta)
+            except Exception:
+                logger.exception("SABnzbd poller callback failed")
+        return delta
+
+    def run(self, interval: float = 5.0, stop: Optional[threading.Event] = None) -> None:
+        """Poll every `interval` seconds until `stop` is set; fetch errors are logged and retried."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                self.poll()
+            except PageFetchError as e:
+                logger.warning("SABnzbd poll failed: %s", e)
+            stop.wait(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream SABnzbd queue/history changes as NDJSON")
+    parser.add_argument("--url", default=None, help="SABnzbd URL (default: from its config)")
+    parser.add_argument("--interval", type=float, default=5.0)
+    parser.add_argument("--once", action="store_true", help="poll once and exit")
+    args = parser.parse_args()
+
+    info = ServiceRegistry().get("sabnzbd")
+    api_key = os.environ.get("SABNZBD_API_KEY") or (info.api_key if info else None)
+    url = args.url or (info.url if info else "http://localhost:8080")
+    if not api_key:
+        sys.stderr.write("Error: no SABnzbd API key (set SABNZBD_API_KEY or CONFIG_ROOT)\n")
+        sys.exit(1)
+
+    def emit(event: str, payload: Any) -> None:
+        print(json.dumps({"event": event, **payload}), flush=True)
+
+    def on_change(delta: SabDelta) -> None:
+        for slot in delta.added:
+            emit("added", {"nzo_id": slot.get("nzo_id"), "filename": slot.get("filename")})
+        for nzo_id in delta.removed:
+            emit("removed", {"nzo_id": nzo_id})
+        for slot in delta.updated:
+            emit("updated", {k: slot.get(k) for k in ("nzo_id", *SLOT_FIELDS)})
+
+    poller = SabPoller(
+        SabClient(url, api_key, timeout=10),
+        on_change=on_change,
+        on_complete=lambda job: emit("completed", {"nzo_id": job.get("nzo_id"), "name": job.get("name")}),
+        on_failure=lambda job: emit(
+            "failed", {"nzo_id": job.get("nzo_id"), "name": job.get("name"), "reason": job.get("fail_message")}
+        ),
+    )
+    if args.once:
+        try:
+            poller.poll()
+        except PageFetchError as e:
+            sys.stderr.write(f"Error: {e}\n")
+            sys.exit(1)
+        return
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        poller.run(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
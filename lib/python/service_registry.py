@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Cached discovery of stack services and their credentials under CONFIG_ROOT.
+
+Each service's config file (ARR config.xml, sabnzbd.ini, Bazarr's
+config.yaml) is read once per process with a few regexes instead of a full
+XML parse, and the result is memoized by the file's (mtime, size). Later
+lookups cost one stat(), so short-lived scripts stay in the low
+milliseconds and long-running ones pick up rotated keys automatically.
+
+Usage:
+    from service_registry import ServiceRegistry
+
+    registry = ServiceRegistry()              # CONFIG_ROOT or /srv/usenet/config
+    sonarr = registry.client("sonarr")        # ArrClient on a shared pool
+    info = registry.get("radarr")             # ServiceInfo(url=..., api_key=..., ...)
+    for info in registry.discover():          # every service with a config file
+        print(info.name, info.url, info.api_version)
+
+URLs can be overridden per service with <NAME>_URL (e.g. SONARR_URL), and
+the host for derived URLs with STACK_HOST. Komga has no key on disk; its
+client takes KOMGA_USER/KOMGA_PASS from the environment.
+
+CLI:
+    service_registry.py [--json] [--show-keys]
+"""
+
+import html
+import os
+import pathlib
+import re
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+if TYPE_CHECKING:
+    from api_client import ConnectionPool, HTTPClient
+
+# api_client (http.client, ssl, email) is only imported once a client is
+# requested, so key lookups stay cheap for short-lived scripts.
+DEFAULT_CONFIG_ROOT = "/srv/usenet/config"
+
+
+def _api_client():
+    try:
+        from . import api_client
+    except ImportError:
+        import api_client
+    return api_client
+
+
+class ServiceInfo(NamedTuple):
+    name: str
+    kind: str  # arr, sabnzbd, bazarr, komga
+    url: str
+    port: int
+    url_base: str
+    api_version: str  # e.g. "v3"; "" when the API is unversioned
+    api_key: Optional[str]
+    config_path: Optional[str]
+
+    @property
+    def api_root(self) -> str:
+        """Path prefix of the service's API, e.g. /api/v3."""
+        return f"/api/{self.api_version}" if self.api_version else "/api"
+
+
+class _Spec(NamedTuple):
+    kind: str
+    config: Optional[str]  # relative to CONFIG_ROOT
+    port: int  # published port in docker-compose.yml
+    api_version: str
+
+
+SERVICES: Dict[str, _Spec] = {
+    "sonarr": _Spec("arr", "sonarr/config.xml", 8989, "v3"),
+    "radarr": _Spec("arr", "radarr/config.xml", 7878, "v3"),
+    "whisparr": _Spec("arr", "whisparr/config.xml", 6969, "v3"),
+    "lidarr": _Spec("arr", "lidarr/config.xml", 8686, "v1"),
+    "readarr": _Spec("arr", "readarr/config.xml", 8787, "v1"),
+    "prowlarr": _Spec("arr", "prowlarr/config.xml", 9696, "v1"),
+    "bazarr": _Spec("bazarr", "bazarr/config/config.yaml", 6767, ""),
+    "sabnzbd": _Spec("sabnzbd", "sabnzbd/sabnzbd.ini", 8080, ""),
+    # Komga listens on 25600 inside its container
+    "komga": _Spec("komga", None, 8081, "v1"),
+}
+
+_XML_TAG_RE = re.compile(rb"<(ApiKey|Port|UrlBase|SslPort|EnableSsl)>\s*([^<]*?)\s*</\1>")
+_INI_RE = re.compile(r"^\s*(\w+)\s*=\s*(.*?)\s*$")
+_YAML_APIKEY_RE = re.compile(rb"^\s*apikey:\s*['\"]?([^'\"\s]+)", re.MULTILINE)
+
+# path -> (mtime_ns, size, parsed fields); shared by every registry in the process
+_parsed: Dict[str, Tuple[int, int, Dict[str, str]]] = {}
+_parsed_lock = threading.Lock()
+
+
+def _parse_arr_xml(data: bytes) -> Dict[str, str]:
+    fields = {}
+    for tag, value in _XML_TAG_RE.findall(data):
+        fields.setdefault(tag.decode(), html.unescape(value.decode("utf-8", "replace")))
+    return fields
+
+
+def _parse_sab_ini(data: bytes) -> Dict[str, str]:
+    """Top-level [misc] keys; nested sections ([[server]]) are skipped."""
+    fields = {}
+    section = None
+    for line in data.decode("utf-8", "replace").splitlines():
+        stripped = line.strip()
+        if stripped.startswith("["):
+            section = stripped
+            continue
+        if section in (None, "[misc]"):
+            match = _INI_RE.match(line)
+            if match:
+                fields.setdefault(match.group(1), match.group(2))
+    return fields
+
+
+def _parse_bazarr_yaml(data: bytes) -> Dict[str, str]:
+    match = _YAML_APIKEY_RE.search(data)
+    return {"apikey": match.group(1).decode()} if match else {}
+
+
+PARSERS: Dict[str, Callable[[bytes], Dict[str, str]]] = {
+    "arr": _parse_arr_xml,
+    "sabnzbd": _parse_sab_ini,
+    "bazarr": _parse_bazarr_yaml,
+}
+
+
+def read_config(path: pathlib.Path, kind: str) -> Optional[Dict[str, str]]:
+    """Parsed fields of a service config file, memoized by mtime and size."""
+    key = str(path)
+    try:
+        st = os.stat(key)
+    except OSError:
+        return None
+    with _parsed_lock:
+        hit = _parsed.get(key)
+    if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+    try:
+        with open(key, "rb") as f:
+            fields = PARSERS[kind](f.read())
+    except OSError:
+        return None
+    with _parsed_lock:
+        _parsed[key] = (st.st_mtime_ns, st.st_size, fields)
+    return fields
+
+
+# Container mount -> host path, as mounted in docker-compose.yml
+PATH_MAP = {
+    "/pool": os.environ.get("POOL_ROOT", "/var/mnt/pool"),
+    "/comics": os.environ.get("COMICS_ROOT", "/srv/usenet/books/Comics"),
+}
+
+
+def host_path(path: Optional[str], path_map: Optional[Dict[str, str]] = None) -> Optional[str]:
+    """Map a container path (as a service reports it) to the host and normalise it."""
+    if not path:
+        return None
+    path = path.replace("\\", "/")
+    for prefix, target in (path_map if path_map is not None else PATH_MAP).items():
+        if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+            path = target.rstrip("/") + path[len(prefix.rstrip("/")):]
+            break
+    return os.path.normpath(path)
+
+
+def _url_base(value: str) -> str:
+    value = value.strip().strip("/")
+    return f"/{value}" if value else ""
+
+
+class ServiceRegistry:
+    """Discovers services under CONFIG_ROOT and hands out pooled clients by name."""
+
+    def __init__(
+        self,
+        config_root: Optional[str] = None,
+        host: Optional[str] = None,
+        pool: Optional["ConnectionPool"] = None,
+        **client_options: Any,
+    ):
+        self.config_root = pathlib.Path(config_root or os.environ.get("CONFIG_ROOT", DEFAULT_CONFIG_ROOT))
+        self.host = host or os.environ.get("STACK_HOST", "localhost")
+        self._pool = pool
+        self.client_options = client_options
+        self._clients: Dict[str, Tuple[ServiceInfo, "HTTPClient"]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[ServiceInfo]:
+        """Current info for one service, or None if it is unknown or has no config."""
+        spec = SERVICES.get(name)
+        if spec is None:
+            return None
+        override = os.environ.get(f"{name.upper()}_URL")
+
+        if spec.config is None:
+            url = override or f"http://{self.host}:{spec.port}"
+            return ServiceInfo(name, spec.kind, url.rstrip("/"), spec.port, "", spec.api_version, None, None)
+
+        path = self.config_root / spec.config
+        fields = read_config(path, spec.kind)
+        if fields is None:
+            return None
+        if spec.kind == "arr":
+            api_key = fields.get("ApiKey")
+            port = int(fields.get("Port") or spec.port)
+            url_base = _url_base(fields.get("UrlBase", ""))
+        elif spec.kind == "sabnzbd":
+            api_key = fields.get("api_key")
+            port = int(fields.get("port") or spec.port)
+            url_base = _url_base(fields.get("url_base", ""))
+        else:
+            api_key = fields.get("apikey")
+            port, url_base = spec.port, ""
+        url = override or f"http://{self.host}:{port}{url_base}"
+        return ServiceInfo(name, spec.kind, url.rstrip("/"), port, url_base, spec.api_version, api_key, str(path))
+
+    def discover(self) -> List[ServiceInfo]:
+        """Every known service that has a config file (plus Komga)."""
+        return [info for info in map(self.get, SERVICES) if info is not None]
+
+    def api_key(self, name: str) -> Optional[str]:
+        info = self.get(name)
+        return info.api_key if info else None
+
+    @property
+    def pool(self) -> "ConnectionPool":
+        """Connection pool shared by every client this registry hands out."""
+        if self._pool is None:
+            self._pool = _api_client().ConnectionPool(maxsize=4)
+        return self._pool
+
+    def client(self, name: str, **options: Any) -> "HTTPClient":
+        """
+        Ready-made client for a service, sharing the registry's connection pool
+        and the process-wide request scheduler (shared_scheduler()).
+
+        Clients are cached per name and rebuilt when the service's URL or key
+        changes on disk. Extra options are passed to the client on creation.
+        Raises LookupError if the service or its credentials cannot be found.
+        """
+        info = self.get(name)
+        if info is None:
+            raise LookupError(f"No config for {name} under {self.config_root}")
+        with self._lock:
+            cached = self._clients.get(name)
+            if cached is not None and cached[0] == info and not options:
+                return cached[1]
+            api = _api_client()
+            opts = {"pool": self.pool, "scheduler": api.shared_scheduler(), **self.client_options, **options}
+            if info.kind == "komga":
+                user, password = os.environ.get("KOMGA_USER"), os.environ.get("KOMGA_PASS")
+                if not user or not password:
+                    raise LookupError("KOMGA_USER and KOMGA_PASS must be set for the Komga client")
+                client: "HTTPClient" = api.KomgaClient(info.url, user, password, **opts)
+            elif not info.api_key:
+                raise LookupError(f"No API key for {name} in {info.config_path}")
+            elif info.kind == "sabnzbd":
+                client = api.SabClient(info.url, info.api_key, **opts)
+            else:
+                client = api.ArrClient(info.url, info.api_key, **opts)
+            if not options:
+                self._clients[name] = (info, client)
+            return client
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+
+    def __enter__(self) -> "ServiceRegistry":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def main():
+    import argparse
+    import json
+    import sys
+
+    parser = argparse.ArgumentParser(description="List stack services discovered under CONFIG_ROOT")
+    parser.add_argument("--config-root", default=None)
+    parser.add_argument("--json", action="store_true", help="print JSON instead of text")
+    parser.add_argument("--show-keys", action="store_true", help="include API keys in the output")
+    args = parser.parse_args()
+
+    registry = ServiceRegistry(args.config_root)
+    services = []
+    for info in registry.discover():
+        record = info._asdict()
+        if not args.show_keys:
+            record["api_key"] = "set" if info.api_key else None
+        services.append(record)
+
+    if args.json:
+        print(json.dumps(services, indent=2))
+        return
+    if not services:
+        sys.stderr.write(f"No service configs found under {registry.config_root}\n")
+    for s in services:
+        print(f"{s['name']:<10} {s['url']:<32} api {s['api_version'] or '-':<3} key {s['api_key'] or 'missing'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+Shared setup for the Python unit tests.
+
+Puts lib/python and scripts (the modules under test) and benchmarks
+(StubServer and the fake services) on sys.path, the same way the scripts do.
+
+Run from the repository root:
+    python -m pytest lib/test/python -q
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+for path in (os.path.join(ROOT, "lib", "python"), os.path.join(ROOT, "scripts"), os.path.join(ROOT, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,32 @@
+"""Test doubles shared by the api_client tests."""
+
+import http.client
+import time
+
+
+def response(status, body=b"", **headers):
+    msg = http.client.HTTPMessage()
+    for name, value in headers.items():
+        msg[name.replace("_", "-")] = value
+    return status, msg, body
+
+
+class FakePool:
+    """Stands in for ConnectionPool: plays back outcomes, repeating the last one."""
+
+    def __init__(self, *outcomes, delay=0.0):
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.calls = []
+
+    def request(self, method, url, headers=None, data=None, timeout=10, timings=None, reader=None):
+        self.calls.append({"method": method, "url": url, "headers": dict(headers or {}), "timeout": timeout})
+        if self.delay:
+            time.sleep(self.delay)
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    def close(self):
+        pass
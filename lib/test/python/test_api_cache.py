@@ -0,0 +1,137 @@
+"""Unit tests for the api_client ResponseCache: TTLs, ETag revalidation and LRU eviction."""
+
+import http.client
+import time
+
+from api_client import NO_RETRY, CircuitBreaker, ConnectionPool, HTTPClient, ResponseCache
+from stub_server import StubServer
+
+
+def headers(**values):
+    msg = http.client.HTTPMessage()
+    for name, value in values.items():
+        msg[name.replace("_", "-")] = value
+    return msg
+
+
+def client(srv, cache, pool=None):
+    return HTTPClient(srv.url, pool=pool, cache=cache, retry=NO_RETRY, breaker=CircuitBreaker())
+
+
+def test_ttl_rules_first_match_wins():
+    cache = ResponseCache(ttls={r"/system/status$": 30, r"/system": 5}, default_ttl=None)
+    assert cache.ttl_for("/api/v3/system/status") == 30
+    assert cache.ttl_for("/api/v3/system/task") == 5
+    assert cache.ttl_for("/api/v3/series") is None
+
+
+def test_fresh_entry_is_served_without_network():
+    with StubServer({"/status": {"v": 1}}) as srv:
+        cache = ResponseCache(default_ttl=60)
+        c = client(srv, cache)
+        assert c.get("/status") == (200, '{"v": 1}')
+        assert c.get("/status") == (200, '{"v": 1}')
+        assert srv.hits == 1 and cache.hits == 1
+
+
+def test_uncached_endpoints_and_methods_always_hit_the_server():
+    with StubServer({"/status": {"v": 1}, "/series": []}) as srv:
+        c = client(srv, ResponseCache(ttls={r"/status$": 60}))
+        c.get("/series")
+        c.get("/series")
+        c.post("/status", "{}")
+        c.post("/status", "{}")
+        assert srv.hits == 4
+
+
+def test_stale_entry_is_revalidated_with_etag():
+    with StubServer({"/status": {"v": 1}}) as srv:
+        cache = ResponseCache(default_ttl=0.05)
+        c = client(srv, cache)
+        c.get("/status")
+        time.sleep(0.06)
+        assert c.get("/status") == (200, '{"v": 1}')
+        assert srv.hits == 2 and cache.revalidations == 1
+        # The 304 renewed the TTL
+        c.get("/status")
+        assert srv.hits == 2
+
+
+def test_changed_resource_replaces_the_entry():
+    state = {"v": 1}
+    with StubServer({"/status": lambda query: dict(state)}) as srv:
+        cache = ResponseCache(default_ttl=0.05)
+        c = client(srv, cache)
+        c.get("/status")
+        state["v"] = 2
+        time.sleep(0.06)
+        assert c.get("/status") == (200, '{"v": 2}')
+        assert cache.revalidations == 0
+        assert c.get("/status") == (200, '{"v": 2}')
+        assert srv.hits == 2
+
+
+def test_304_after_eviction_refetches_unconditionally():
+    class EvictingPool(ConnectionPool):
+        """Drops the entry between validators() and the response, as a concurrent caller could."""
+
+        def request(self, method, url, headers=None, *args, **kwargs):
+            if headers and "If-None-Match" in headers:
+                cache.clear()
+            return super().request(method, url, headers, *args, **kwargs)
+
+    with StubServer({"/status": {"v": 1}}) as srv:
+        cache = ResponseCache(default_ttl=0.05)
+        c = client(srv, cache, EvictingPool())
+        c.get("/status")
+        time.sleep(0.06)
+        assert c.get("/status") == (200, '{"v": 1}')
+        # Initial fetch, the conditional request answered 304, then the unconditional retry
+        assert srv.hits == 3
+        assert cache.get_fresh(cache.key(f"{srv.url}/status", None)) is not None
+
+
+def test_credentials_are_part_of_the_key():
+    with StubServer({"/status": {"v": 1}}) as srv:
+        c = client(srv, ResponseCache(default_ttl=60))
+        c.get("/status", {"X-Api-Key": "a"})
+        c.get("/status", {"X-Api-Key": "b"})
+        c.get("/status", {"X-Api-Key": "a"})
+        assert srv.hits == 2
+
+
+def test_lru_eviction_by_total_bytes():
+    cache = ResponseCache(default_ttl=60, max_bytes=10)
+    for name in ("a", "b", "c"):
+        cache.store(name, 60, 200, headers(), b"xxx")
+    assert cache.get_fresh("a") is not None  # a is now most recently used
+    cache.store("d", 60, 200, headers(), b"xxx")
+    assert cache.get_fresh("b") is None
+    assert all(cache.get_fresh(k) is not None for k in ("a", "c", "d"))
+    assert cache.size == 9
+
+
+def test_replacing_an_entry_keeps_size_accurate():
+    cache = ResponseCache(default_ttl=60, max_bytes=100)
+    cache.store("a", 60, 200, headers(), b"x" * 40)
+    cache.store("a", 60, 200, headers(), b"x" * 10)
+    assert cache.size == 10
+
+
+def test_oversized_and_no_store_responses_are_not_cached():
+    cache = ResponseCache(default_ttl=60, max_bytes=10)
+    cache.store("big", 60, 200, headers(), b"x" * 11)
+    cache.store("private", 60, 200, headers(Cache_Control="no-store"), b"x")
+    assert cache.get_fresh("big") is None and cache.get_fresh("private") is None
+    assert cache.size == 0
+
+
+def test_expired_entry_keeps_its_validators():
+    cache = ResponseCache(default_ttl=60)
+    cache.store("a", 0, 200, headers(ETag='"v1"', Last_Modified="Mon, 01 Jan 2024 00:00:00 GMT"), b"x")
+    assert cache.get_fresh("a") is None
+    assert cache.validators("a") == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+    assert cache.validators("missing") == {}
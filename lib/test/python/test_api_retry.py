@@ -0,0 +1,190 @@
+"""Unit tests for api_client retries, deadlines and the per-host circuit breaker."""
+
+import http.client
+import time
+
+import pytest
+
+from api_client import (
+    NO_RETRY,
+    CircuitBreaker,
+    HTTPClient,
+    RequestError,
+    RetryPolicy,
+    breaker_for,
+)
+
+from fakes import FakePool, response
+
+
+def client(pool, **kwargs):
+    kwargs.setdefault("retry", RetryPolicy(backoff=0))
+    kwargs.setdefault("breaker", CircuitBreaker())
+    return HTTPClient("http://svc.test:8989", pool=pool, **kwargs)
+
+
+@pytest.mark.parametrize("status", [502, 503, 504])
+def test_get_retries_gateway_errors(status):
+    pool = FakePool(response(status), response(200, b"ok"))
+    assert client(pool).get("/api") == (200, "ok")
+    assert len(pool.calls) == 2
+
+
+def test_get_retries_transient_connection_errors():
+    pool = FakePool(ConnectionRefusedError(), ConnectionResetError(), response(200, b"ok"))
+    assert client(pool).get("/api") == (200, "ok")
+    assert len(pool.calls) == 3
+
+
+def test_non_transient_errors_are_not_retried():
+    pool = FakePool(http.client.BadStatusLine("garbage"), response(200, b"ok"))
+    status, body = client(pool).get("/api")
+    assert status is None and body.kind == RequestError.PROTOCOL
+    assert len(pool.calls) == 1
+
+
+@pytest.mark.parametrize("status", [400, 404, 500])
+def test_other_statuses_are_not_retried(status):
+    pool = FakePool(response(status, b"nope"), response(200, b"ok"))
+    assert client(pool).get("/api") == (status, "nope")
+    assert len(pool.calls) == 1
+
+
+@pytest.mark.parametrize("outcome", [response(503), ConnectionRefusedError()])
+def test_post_is_never_retried(outcome):
+    pool = FakePool(outcome, response(200, b"ok"))
+    status, _ = client(pool).post("/api/command", "{}")
+    assert status in (503, None)
+    assert len(pool.calls) == 1
+
+
+def test_put_is_retried():
+    pool = FakePool(response(503), response(200, b"ok"))
+    assert client(pool).put("/api/item/1", "{}") == (200, "ok")
+    assert len(pool.calls) == 2
+
+
+def test_default_policy_gives_up_after_two_retries():
+    pool = FakePool(response(503))
+    c = client(pool, retry=None)
+    c.retry.backoff = 0
+    assert c.retry.retries == 2
+    assert c.get("/api") == (503, "")
+    assert len(pool.calls) == 3
+
+
+def test_no_retry_opt_out():
+    pool = FakePool(response(503), response(200, b"ok"))
+    assert client(pool, retry=NO_RETRY).get("/api") == (503, "")
+    assert len(pool.calls) == 1
+
+
+def test_deadline_cuts_retries_short():
+    pool = FakePool(response(503), delay=0.05)
+    started = time.monotonic()
+    status, body = client(pool, retry=RetryPolicy(retries=50, backoff=0), deadline=0.12).get("/api")
+    assert time.monotonic() - started < 0.5
+    # Either the last answer (no time left to back off) or a deadline error
+    assert status == 503 or body.kind == RequestError.DEADLINE
+    assert 2 <= len(pool.calls) <= 4
+    # Each attempt's socket timeout is capped by what is left of the deadline
+    assert all(call["timeout"] <= 0.12 for call in pool.calls)
+    assert pool.calls[-1]["timeout"] < pool.calls[0]["timeout"]
+
+
+def test_deadline_skips_a_backoff_that_would_overrun(monkeypatch):
+    pool = FakePool(response(503), response(200, b"ok"))
+    retry = RetryPolicy(retries=3)
+    monkeypatch.setattr(retry, "delay", lambda attempt: 5.0)
+    started = time.monotonic()
+    assert client(pool, retry=retry, deadline=1.0).get("/api") == (503, "")
+    assert time.monotonic() - started < 0.5
+    assert len(pool.calls) == 1
+
+
+def test_backoff_is_jittered_and_capped():
+    retry = RetryPolicy(backoff=0.25, max_backoff=1.0)
+    delays = [retry.delay(attempt) for attempt in range(8) for _ in range(20)]
+    assert all(0 <= d <= 1.0 for d in delays)
+    assert len(set(delays)) > 1
+
+
+def test_breaker_opens_at_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_half_opens_after_cooldown_and_closes_on_success():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    # Only one probe at a time
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_open_circuit_fails_fast_without_sending():
+    pool = FakePool(response(503))
+    c = client(pool, retry=NO_RETRY, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    c.get("/api")
+    c.get("/api")
+    status, body = c.get("/api")
+    assert status is None and body.kind == RequestError.CIRCUIT_OPEN
+    assert len(pool.calls) == 2
+
+
+def test_circuit_opened_by_own_retries_reports_the_real_failure():
+    pool = FakePool(response(503))
+    c = client(pool, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    assert c.get("/api") == (503, "")
+    assert len(pool.calls) == 2
+
+
+def test_client_errors_do_not_trip_the_breaker():
+    pool = FakePool(response(404))
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    c = client(pool, breaker=breaker)
+    for _ in range(3):
+        c.get("/missing")
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_default_breaker_is_shared_per_host():
+    a = HTTPClient("http://Shared.test:8080", pool=FakePool(response(200)))
+    b = HTTPClient("http://shared.test:8080/api", pool=FakePool(response(200)))
+    assert a.breaker is b.breaker is breaker_for("http://shared.test:8080")
+    assert HTTPClient("http://shared.test:8081").breaker is not a.breaker
+
+
+def test_private_breaker_opt_out():
+    own = CircuitBreaker()
+    c = HTTPClient("http://shared.test:8080", breaker=own)
+    assert c.breaker is own and own is not breaker_for("http://shared.test:8080")
@@ -0,0 +1,152 @@
+"""Unit tests for the api_client RequestScheduler: priorities, the BULK reserve and rate limits."""
+
+import threading
+import time
+
+import api_client
+from api_client import NO_RETRY, CircuitBreaker, HTTPClient, RequestError, RequestScheduler
+
+from fakes import FakePool, response
+
+HOST = "http://svc.test:8989"
+INTERACTIVE, INGEST, BULK = RequestScheduler.INTERACTIVE, RequestScheduler.INGEST, RequestScheduler.BULK
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.002)
+
+
+def queued(scheduler, host="svc.test:8989"):
+    return scheduler.stats().get(host, {}).get("queued", 0)
+
+
+def start_waiter(scheduler, priority, order, label):
+    """Queue one acquire in a thread; it records `label` once granted and releases."""
+
+    def run():
+        assert scheduler.acquire(HOST, priority, timeout=2)
+        order.append(label)
+        scheduler.release(HOST)
+
+    thread = threading.Thread(target=run)
+    before = queued(scheduler)
+    thread.start()
+    wait_until(lambda: queued(scheduler) == before + 1)
+    return thread
+
+
+def test_waiters_are_served_by_priority_then_arrival():
+    scheduler = RequestScheduler(rate=None, max_concurrent=1, reserved=0)
+    assert scheduler.acquire(HOST)
+    order = []
+    threads = [
+        start_waiter(scheduler, BULK, order, "bulk"),
+        start_waiter(scheduler, INGEST, order, "ingest-1"),
+        start_waiter(scheduler, INTERACTIVE, order, "interactive"),
+        start_waiter(scheduler, INGEST, order, "ingest-2"),
+    ]
+    scheduler.release(HOST)
+    for thread in threads:
+        thread.join(2)
+    assert order == ["interactive", "ingest-1", "ingest-2", "bulk"]
+    assert scheduler.stats()["svc.test:8989"]["in_flight"] == 0
+
+
+def test_bulk_leaves_reserved_slots_for_other_classes():
+    scheduler = RequestScheduler(rate=None, max_concurrent=3, reserved=1)
+    assert scheduler.acquire(HOST, BULK)
+    assert scheduler.acquire(HOST, BULK)
+    assert not scheduler.acquire(HOST, BULK, timeout=0.05)
+    assert scheduler.acquire(HOST, INTERACTIVE, timeout=0)
+    # The failed bulk request left the queue
+    assert queued(scheduler) == 0
+
+
+def test_bulk_always_gets_at_least_one_slot():
+    scheduler = RequestScheduler(rate=None, max_concurrent=1, reserved=1)
+    assert scheduler.acquire(HOST, BULK, timeout=0)
+
+
+def test_queued_bulk_does_not_block_interactive_on_reserved_slot():
+    scheduler = RequestScheduler(rate=None, max_concurrent=2, reserved=1)
+    assert scheduler.acquire(HOST, BULK)
+    order = []
+    bulk = start_waiter(scheduler, BULK, order, "bulk")
+    assert scheduler.acquire(HOST, INTERACTIVE, timeout=0.5)
+    assert order == []
+    scheduler.release(HOST)
+    scheduler.release(HOST)
+    bulk.join(2)
+    assert order == ["bulk"]
+
+
+def test_token_bucket_limits_rate_after_the_burst():
+    scheduler = RequestScheduler(rate=20, burst=2, max_concurrent=10)
+    started = time.monotonic()
+    for _ in range(4):
+        assert scheduler.acquire(HOST)
+        scheduler.release(HOST)
+    # Two from the burst, then two more at 20/s
+    assert time.monotonic() - started >= 0.08
+
+
+def test_hosts_have_separate_budgets_and_limits():
+    scheduler = RequestScheduler(rate=None, max_concurrent=1)
+    assert scheduler.acquire(HOST)
+    assert scheduler.acquire("http://other.test:7878", timeout=0)
+    assert not scheduler.acquire(HOST, timeout=0.01)
+
+    scheduler.set_limits("svc.test:8989", max_concurrent=2)
+    assert scheduler.acquire(HOST, timeout=0)
+
+
+def test_client_reports_throttled_without_sending_when_no_slot_frees():
+    scheduler = RequestScheduler(rate=None, max_concurrent=1)
+    assert scheduler.acquire(HOST)
+    pool = FakePool(response(200, b"ok"))
+    c = HTTPClient(HOST, pool=pool, retry=NO_RETRY, breaker=CircuitBreaker(), deadline=0.05, scheduler=scheduler)
+    status, body = c.get("/api")
+    assert status is None and body.kind == RequestError.THROTTLED
+    assert pool.calls == []
+
+
+def test_client_releases_its_slot_after_every_attempt():
+    scheduler = RequestScheduler(rate=None, max_concurrent=1)
+    pool = FakePool(ConnectionResetError(), response(200, b"ok"))
+    c = HTTPClient(
+        HOST, pool=pool, retry=api_client.RetryPolicy(backoff=0), breaker=CircuitBreaker(), scheduler=scheduler
+    )
+    assert c.get("/api") == (200, "ok")
+    assert len(pool.calls) == 2
+    assert scheduler.stats()["svc.test:8989"]["in_flight"] == 0
+
+
+def test_shared_scheduler_reads_limits_from_the_environment(monkeypatch):
+    monkeypatch.setattr(api_client, "_shared_scheduler", None)
+    monkeypatch.setenv("API_RATE", "0")
+    monkeypatch.setenv("API_BURST", "3")
+    monkeypatch.setenv("API_MAX_CONCURRENT", "7")
+    scheduler = api_client.shared_scheduler()
+    assert (scheduler.rate, scheduler.burst, scheduler.max_concurrent) == (None, 3, 7)
+    assert api_client.shared_scheduler() is scheduler
+
+
+def test_throttled_probe_does_not_leave_the_breaker_stuck_half_open():
+    scheduler = RequestScheduler(rate=None, max_concurrent=1)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert scheduler.acquire(HOST)
+    pool = FakePool(response(200, b"ok"))
+    c = HTTPClient(HOST, pool=pool, retry=NO_RETRY, breaker=breaker, deadline=0.05, scheduler=scheduler)
+    status, body = c.get("/api")
+    assert status is None and body.kind == RequestError.THROTTLED
+    # The probe was handed back uncounted: the next request may still probe
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    scheduler.release(HOST)
+    assert c.get("/api") == (200, "ok")
+    assert breaker.state == CircuitBreaker.CLOSED
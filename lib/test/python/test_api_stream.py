@@ -0,0 +1,109 @@
+"""Unit tests for the api_client streaming paths: download(), get_bytes() and max_bytes caps."""
+
+import hashlib
+import http.server
+import os
+import threading
+
+import pytest
+
+from api_client import ArrClient, ConnectionPool, Download, HTTPClient, KomgaClient, NO_RETRY, RequestError
+from stub_server import StubServer
+
+from fakes import FakePool, response
+
+BODY = bytes(range(256)) * 64  # 16 KiB
+
+
+class UnframedHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP/1.0 answer with no Content-Length: the body runs until the server closes."""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.end_headers()
+        for _ in range(16):
+            self.wfile.write(BODY[:1024])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def unframed():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), UnframedHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def client(url, pool=None):
+    return HTTPClient(url, pool=pool or ConnectionPool(), retry=NO_RETRY)
+
+
+def leftovers(tmp_path):
+    return sorted(os.listdir(tmp_path))
+
+
+def test_download_streams_to_file_with_checksum(tmp_path):
+    path = str(tmp_path / "book.cbz")
+    with StubServer({"/file": BODY}) as srv:
+        status, result = client(srv.url).download("/file", path, checksum="sha256", chunk_size=1000)
+    assert status == 200
+    assert result == Download(path, len(BODY), hashlib.sha256(BODY).hexdigest(), "application/json")
+    with open(path, "rb") as f:
+        assert f.read() == BODY
+    assert leftovers(tmp_path) == ["book.cbz"]
+
+
+def test_download_over_declared_length_is_too_large(tmp_path):
+    with StubServer({"/file": BODY}) as srv:
+        status, result = client(srv.url).download("/file", str(tmp_path / "book.cbz"), max_bytes=len(BODY) - 1)
+    assert status is None and result.kind == RequestError.TOO_LARGE
+    assert leftovers(tmp_path) == []
+
+
+def test_download_of_unframed_body_stops_at_the_cap(tmp_path, unframed):
+    c = client(unframed)
+    status, result = c.download("/file", str(tmp_path / "book.cbz"), max_bytes=5000, chunk_size=1024)
+    assert status is None and result.kind == RequestError.TOO_LARGE
+    assert leftovers(tmp_path) == []
+
+    # Under the cap the same stream downloads whole
+    status, result = c.download("/file", str(tmp_path / "book.cbz"), max_bytes=len(BODY), chunk_size=1024)
+    assert status == 200 and result.size == len(BODY)
+    assert leftovers(tmp_path) == ["book.cbz"]
+
+
+def test_download_error_status_returns_the_body_and_writes_nothing(tmp_path):
+    with StubServer({"/file": lambda q: (404, {"error": "no such file"})}) as srv:
+        status, result = client(srv.url).download("/file", str(tmp_path / "book.cbz"))
+    assert status == 404 and "no such file" in result
+    assert leftovers(tmp_path) == []
+
+
+def test_get_bytes_reads_only_max_bytes_and_drops_the_connection():
+    pool = ConnectionPool()
+    with StubServer({"/file": BODY}) as srv:
+        c = client(srv.url, pool)
+        # Truncation is silent: the status is still 200
+        assert c.get_bytes("/file", max_bytes=100) == (200, BODY[:100])
+        assert not any(pool._idle.values())
+        # A full read hands its connection back for reuse
+        assert c.get_bytes("/file") == (200, BODY)
+        assert any(pool._idle.values())
+
+
+def test_subclass_get_passes_headers_and_max_bytes_through():
+    pool = FakePool(response(200, b"{}"))
+    ArrClient("http://svc.test:8989", "key", pool=pool, retry=NO_RETRY).get("/api", headers={"Accept": "text/plain"})
+    assert pool.calls[0]["headers"]["X-Api-Key"] == "key"
+    assert pool.calls[0]["headers"]["Accept"] == "text/plain"
+
+    with StubServer({"/api/item": {"title": "x" * 500}}) as srv:
+        arr = ArrClient(srv.url, "key", retry=NO_RETRY)
+        assert arr.get("/api/item", max_bytes=10) == (200, '{"title": ')
+        komga = KomgaClient(srv.url, "user", "pass", retry=NO_RETRY)
+        assert komga.get("/api/item", headers={"X-Trace": "1"}, max_bytes=3) == (200, '{"t')
@@ -0,0 +1,88 @@
+"""Unit tests for arr_batch.py against a stub ARR command API."""
+
+import pytest
+
+from api_client import NO_RETRY, ArrClient, CircuitBreaker
+from arr_batch import ArrBatch, BatchError, chunked, wait_all
+from stub_server import StubServer
+
+
+def command_api(*states, **final):
+    """Routes for POST /command and a /command/{id} that walks through `states`, one per poll."""
+    remaining = list(states)
+    polls = []
+
+    def create(query):
+        return 201, {"id": 7, "name": "RefreshSeries", "status": "queued"}
+
+    def poll(query, cid):
+        polls.append(cid)
+        state = remaining.pop(0) if len(remaining) > 1 else remaining[0]
+        record = {"id": int(cid), "name": "RefreshSeries", "status": state}
+        if len(remaining) == 1 and state == remaining[0]:
+            record.update(final)
+        return record
+
+    return {"/api/v3/command": create, "/api/v3/command/{cid}": poll}, polls
+
+
+def batch(srv, **kwargs):
+    client = ArrClient(srv.url, api_key="test", retry=NO_RETRY, breaker=CircuitBreaker())
+    kwargs.setdefault("poll_interval", 0.01)
+    kwargs.setdefault("max_poll_interval", 0.02)
+    return ArrBatch(client, "series", **kwargs)
+
+
+def test_chunked():
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(chunked([], 2)) == []
+
+
+def test_command_resolves_when_completed():
+    routes, polls = command_api("started", "completed")
+    with StubServer(routes) as srv, batch(srv) as b:
+        [record] = wait_all(b.command("RefreshSeries", [1, 2, 3]))
+    assert record["status"] == "completed"
+    assert polls == ["7", "7"]
+
+
+def test_command_that_ends_failed_raises():
+    routes, polls = command_api("queued", "started", "failed", message="Series 3 not found")
+    with StubServer(routes) as srv, batch(srv) as b:
+        futures = b.command("RefreshSeries", [1, 2, 3])
+        with pytest.raises(BatchError) as excinfo:
+            wait_all(futures)
+    err = excinfo.value
+    assert err.endpoint == "/api/v3/command/7"
+    assert err.record["status"] == "failed"
+    assert "command failed: Series 3 not found" in str(err)
+    assert polls == ["7", "7", "7"]
+
+
+@pytest.mark.parametrize("state", ["aborted", "cancelled", "orphaned"])
+def test_other_unsuccessful_states_raise(state):
+    routes, _ = command_api(state)
+    with StubServer(routes) as srv, batch(srv) as b:
+        with pytest.raises(BatchError, match=f"command {state}"):
+            wait_all(b.command("RefreshSeries", [1]))
+
+
+def test_unfinished_command_times_out():
+    routes, _ = command_api("started")
+    with StubServer(routes) as srv, batch(srv, command_timeout=0.1) as b:
+        with pytest.raises(BatchError, match="not finished"):
+            wait_all(b.command("RefreshSeries", [1]))
+
+
+def test_rejected_command_raises():
+    with StubServer({"/api/v3/command": lambda query: (400, {"message": "bad"})}) as srv, batch(srv) as b:
+        with pytest.raises(BatchError) as excinfo:
+            wait_all(b.command("RefreshSeries", [1]))
+    assert excinfo.value.status == 400 and excinfo.value.record is None
+
+
+def test_edit_sends_one_request_per_chunk():
+    with StubServer({"/api/v3/series/editor": lambda query: (202, [])}) as srv, batch(srv, chunk_size=2) as b:
+        results = wait_all(b.edit([1, 2, 3, 4, 5], monitored=True))
+        assert len(results) == 3
+        assert srv.hits == 3
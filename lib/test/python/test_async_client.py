@@ -0,0 +1,129 @@
+"""Unit tests for async_client.py against the stub and fake servers."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from api_client import RequestError, RequestHook
+from async_client import AsyncArrClient, AsyncConnectionPool, AsyncHTTPClient, AsyncKomgaClient, AsyncSabClient
+from fake_services import arr_routes, komga_routes, sab_routes
+from stub_server import StubServer
+
+
+class InFlight:
+    """Route that holds each request briefly and records the peak overlap."""
+
+    def __init__(self, hold=0.03):
+        self.hold = hold
+        self.now = self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, query):
+        with self._lock:
+            self.now += 1
+            self.peak = max(self.peak, self.now)
+        time.sleep(self.hold)
+        with self._lock:
+            self.now -= 1
+        return {"ok": True}
+
+
+class Traces(RequestHook):
+    def __init__(self):
+        self.traces = []
+
+    def after_request(self, trace):
+        self.traces.append(trace)
+
+
+@pytest.fixture(scope="module")
+def fakes():
+    servers = {
+        "sonarr": StubServer(arr_routes("sonarr", 3, 0, 0, 0)),
+        "sabnzbd": StubServer(sab_routes(2, 1, 0)),
+        "komga": StubServer(komga_routes(2, 3, 0)),
+    }
+    for srv in servers.values():
+        srv.start()
+    yield {name: srv.url for name, srv in servers.items()}
+    for srv in servers.values():
+        srv.stop()
+
+
+def test_requests_per_host_never_exceed_the_limit():
+    route = InFlight()
+
+    async def run(url):
+        pool = AsyncConnectionPool(limit_per_host=3)
+        async with AsyncHTTPClient(url, pool=pool) as client:
+            return await asyncio.gather(*(client.get("/slow") for _ in range(12)))
+
+    with StubServer({"/slow": route}) as srv:
+        results = asyncio.run(run(srv.url))
+    assert [status for status, _ in results] == [200] * 12
+    assert route.peak == 3
+
+
+def test_connections_are_kept_alive_and_reused():
+    async def run(url, pool):
+        hook = Traces()
+        async with AsyncHTTPClient(url, pool=pool, hooks=[hook]) as client:
+            for _ in range(3):
+                assert (await client.get("/ok"))[0] == 200
+        return [trace.reused for trace in hook.traces]
+
+    with StubServer({"/ok": {"ok": True}}) as srv:
+        assert asyncio.run(run(srv.url, AsyncConnectionPool())) == [False, True, True]
+        # maxsize=0 disables reuse
+        assert asyncio.run(run(srv.url, AsyncConnectionPool(maxsize=0))) == [False, False, False]
+
+
+def test_arr_client(fakes):
+    async def run():
+        async with AsyncArrClient(fakes["sonarr"], api_key="k") as sonarr:
+            status = await sonarr.get_json("/api/v3/system/status")
+            series = await sonarr.get_json("/api/v3/series")
+            missing = await sonarr.get_json("/api/v3/nope")
+            return status, series, missing, await sonarr.is_healthy()
+
+    status, series, missing, healthy = asyncio.run(run())
+    assert status["version"] == "4.0.0.0"
+    assert [s["id"] for s in series] == [1, 2, 3]
+    assert missing is None and healthy
+
+
+def test_sab_client(fakes):
+    async def run():
+        async with AsyncSabClient(fakes["sabnzbd"], api_key="k") as sab:
+            queue = await sab.call_json("mode=queue&output=json&start=1&limit=1")
+            bad = await sab.call_json("mode=bogus")
+            return queue, bad, await sab.is_healthy()
+
+    queue, bad, healthy = asyncio.run(run())
+    assert queue["queue"]["noofslots_total"] == 2
+    assert [s["index"] for s in queue["queue"]["slots"]] == [1]
+    assert bad is None and healthy
+
+
+def test_komga_client(fakes):
+    async def run():
+        async with AsyncKomgaClient(fakes["komga"], user="u", password="p") as komga:
+            books = await komga.get_json("/api/v1/series/S00001/books?size=2")
+            return books, await komga.is_healthy()
+
+    books, healthy = asyncio.run(run())
+    assert [b["id"] for b in books["content"]] == ["S00001-0", "S00001-1"]
+    assert not books["last"] and healthy
+
+
+def test_unreachable_service_is_unhealthy():
+    async def run():
+        # Nothing listens on port 9 of localhost
+        async with AsyncArrClient("http://127.0.0.1:9", api_key="k", timeout=2) as arr:
+            return await arr.get("/api/v3/system/status"), await arr.is_healthy()
+
+    (status, body), healthy = asyncio.run(run())
+    assert status is None and body.kind == RequestError.REFUSED
+    assert not healthy
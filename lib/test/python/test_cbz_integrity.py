@@ -0,0 +1,137 @@
+"""Unit tests for cbz_integrity.py: verdicts, the verdict cache and NDJSON output."""
+
+import json
+import os
+import sys
+import zipfile
+
+import pytest
+
+import cbz_integrity
+from cbz_integrity import VerdictCache, iter_archives, scan
+
+PAGE = b"page" * 64
+
+
+def good(path):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as z:
+        z.writestr("001.jpg", PAGE)
+    return str(path)
+
+
+def corrupt(path):
+    """A readable zip whose stored page fails its CRC check."""
+    good(path)
+    data = path.read_bytes()
+    at = data.index(PAGE)
+    path.write_bytes(data[:at] + b"X" + data[at + 1 :])
+    return str(path)
+
+
+def verdicts(paths, cache=None):
+    return {os.path.basename(v["path"]): v for v in scan(paths, jobs=1, cache=cache)}
+
+
+def test_scan_classifies_archives(tmp_path):
+    ok = good(tmp_path / "ok.cbz")
+    bad = corrupt(tmp_path / "bad.cbz")
+    junk = tmp_path / "junk.cbz"
+    junk.write_bytes(b"not a zip")
+
+    result = verdicts([ok, bad, str(junk), str(tmp_path / "gone.cbz")])
+    assert {name: v["status"] for name, v in result.items()} == {
+        "ok.cbz": "ok",
+        "bad.cbz": "bad",
+        "junk.cbz": "bad",
+        "gone.cbz": "missing",
+    }
+    assert result["bad.cbz"]["detail"] == "BAD:001.jpg"
+    assert result["junk.cbz"]["detail"].startswith("ERROR:")
+
+
+def test_cache_hit_for_unchanged_files_and_recheck_after_change(tmp_path):
+    ok = good(tmp_path / "ok.cbz")
+    bad = corrupt(tmp_path / "bad.cbz")
+    cache = VerdictCache(str(tmp_path / "verdicts.sqlite"))
+    try:
+        cold = verdicts([ok, bad], cache)
+        cache.flush()
+        warm = verdicts([ok, bad], cache)
+        assert not any(v["cached"] for v in cold.values())
+        assert all(v["cached"] for v in warm.values())
+        assert {n: v["status"] for n, v in warm.items()} == {"ok.cbz": "ok", "bad.cbz": "bad"}
+
+        # The bad archive is replaced by a good one: its old verdict must not be reused
+        good(tmp_path / "bad.cbz")
+        st = os.stat(bad)
+        os.utime(bad, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        changed = verdicts([ok, bad], cache)
+        assert changed["ok.cbz"]["cached"]
+        assert not changed["bad.cbz"]["cached"] and changed["bad.cbz"]["status"] == "ok"
+    finally:
+        cache.close()
+
+
+def test_missing_files_are_not_cached(tmp_path):
+    cache = VerdictCache(str(tmp_path / "verdicts.sqlite"))
+    list(scan([str(tmp_path / "gone.cbz")], jobs=1, cache=cache))
+    cache.flush()
+    assert cache._db.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0] == 0
+    cache.close()
+
+
+def test_iter_archives_walks_nested_directories(tmp_path):
+    good(tmp_path / "a.cbz")
+    (tmp_path / "Series" / "Vol").mkdir(parents=True)
+    good(tmp_path / "Series" / "Vol" / "b.ZIP")
+    (tmp_path / "Series" / "notes.txt").write_text("x")
+    found = sorted(os.path.relpath(p, tmp_path) for p in iter_archives(str(tmp_path)))
+    assert found == ["Series/Vol/b.ZIP", "a.cbz"]
+
+
+def run_main(monkeypatch, capsys, *argv):
+    monkeypatch.setattr(sys, "argv", ["cbz_integrity.py", *argv])
+    with pytest.raises(SystemExit) as exit_info:
+        cbz_integrity.main()
+    out = capsys.readouterr().out
+    return exit_info.value.code, [json.loads(line) for line in out.splitlines()]
+
+
+def test_main_writes_one_ndjson_record_per_archive_under_a_root(tmp_path, monkeypatch, capsys):
+    root = tmp_path / "Comics"
+    (root / "Series").mkdir(parents=True)
+    good(root / "Series" / "ok.cbz")
+    corrupt(root / "Series" / "bad.cbz")
+    cache = str(tmp_path / "verdicts.sqlite")
+
+    code, records = run_main(monkeypatch, capsys, "--jobs", "1", "--cache", cache, str(root))
+    assert code == 2
+    by_name = {os.path.basename(r["path"]): r for r in records}
+    assert by_name == {
+        "ok.cbz": {"path": str(root / "Series" / "ok.cbz"), "status": "ok", "detail": "", "cached": False},
+        "bad.cbz": {
+            "path": str(root / "Series" / "bad.cbz"),
+            "status": "bad",
+            "detail": "BAD:001.jpg",
+            "cached": False,
+        },
+    }
+
+    # The cache was flushed on exit; a single good file argument exits 0
+    code, records = run_main(monkeypatch, capsys, "--cache", cache, str(root / "Series" / "ok.cbz"))
+    assert code == 0
+    assert records == [dict(by_name["ok.cbz"], cached=True)]
+
+
+def test_main_quarantines_failures(tmp_path, monkeypatch, capsys):
+    root = tmp_path / "Comics"
+    root.mkdir()
+    good(root / "ok.cbz")
+    corrupt(root / "bad.cbz")
+    jail = tmp_path / "quarantine"
+
+    code, records = run_main(monkeypatch, capsys, "--jobs", "1", "--no-cache", "--quarantine", str(jail), str(root))
+    assert code == 2
+    [bad] = [r for r in records if r["status"] == "bad"]
+    assert bad["quarantined"] == str(jail / "bad.cbz")
+    assert os.listdir(root) == ["ok.cbz"] and os.listdir(jail) == ["bad.cbz"]
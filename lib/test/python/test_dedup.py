@@ -0,0 +1,166 @@
+"""Unit tests for dedup.py: staged hashing, hard links, multi-root runs and the hash cache."""
+
+import os
+
+import pytest
+
+from dedup import HashCache, find_duplicates, full_hash, parse_size, partial_hash
+from inventory import Inventory
+
+BLOCK = 16  # small block so "large" files stay tiny
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def scan(*roots):
+    """FileEntry list for roots sharing the INVENTORY_INDEX set by the test."""
+    entries = []
+    for root in roots:
+        with Inventory(str(root)) as inv:
+            inv.refresh()
+            entries.extend(inv.iter_files())
+    return entries
+
+
+@pytest.fixture(autouse=True)
+def shared_index(tmp_path, monkeypatch):
+    monkeypatch.setenv("INVENTORY_INDEX", str(tmp_path / "index.sqlite"))
+
+
+def test_stages_only_read_what_they_must(tmp_path):
+    root = tmp_path / "lib"
+    big = b"H" * BLOCK + b"middle" + b"T" * BLOCK
+    write(root / "unique.cbz", b"x" * 5)
+    # Same size, different head: settled by the partial hash
+    write(root / "head1.cbz", b"A" * 40)
+    write(root / "head2.cbz", b"B" * 40)
+    # Same head and tail, different middle: needs the full hash
+    write(root / "mid1.cbz", b"H" * BLOCK + b"middlX" + b"T" * BLOCK)
+    write(root / "mid2.cbz", big)
+    write(root / "mid3.cbz", big)
+    # Small enough that the partial hash covers the whole file
+    write(root / "small1.cbz", b"s" * 10)
+    write(root / "small2.cbz", b"s" * 10)
+
+    sets, stats = find_duplicates(scan(root), block=BLOCK)
+
+    assert [sorted(os.path.basename(p) for p in s.paths) for s in sets] == [
+        ["mid2.cbz", "mid3.cbz"],
+        ["small1.cbz", "small2.cbz"],
+    ]
+    assert stats["files"] == 8
+    assert stats["size_candidates"] == 7
+    assert stats["partial_hashed"] == 7
+    assert stats["full_hashed"] == 3
+    assert stats["reclaimable"] == len(big) + 10
+    assert sets[0].digest == full_hash(str(root / "mid2.cbz"))
+
+
+def test_hard_links_are_not_duplicates(tmp_path):
+    root = tmp_path / "lib"
+    original = write(root / "a.cbz", b"z" * 64)
+    os.link(original, root / "a-link.cbz")
+
+    sets, stats = find_duplicates(scan(root), block=BLOCK)
+    assert sets == [] and stats["hardlinks"] == 1
+
+    write(root / "copy.cbz", b"z" * 64)
+    sets, stats = find_duplicates(scan(root), block=BLOCK)
+    assert len(sets) == 1 and len(sets[0].paths) == 2
+    assert os.path.join(str(root), "copy.cbz") in sets[0].paths
+    assert sets[0].reclaimable == 64
+
+
+def test_duplicates_across_roots_with_a_shared_index(tmp_path):
+    pool, branch = tmp_path / "Books", tmp_path / "Books-archive"
+    data = b"q" * 100
+    a = write(pool / "Comics" / "series.cbz", data)
+    b = write(branch / "old" / "series.cbz", data)
+    os.link(b, branch / "old" / "series-link.cbz")
+    write(pool / "eBooks" / "other.epub", b"r" * 100)
+
+    sets, stats = find_duplicates(scan(pool, branch), block=BLOCK)
+    # One name per inode: either of the hard-linked names stands for the archive copy
+    [dup] = sets
+    assert len(dup.paths) == 2 and a in dup.paths
+    assert os.path.samefile([p for p in dup.paths if p != a][0], b)
+    assert stats["hardlinks"] == 1
+
+    # Both roots keep their rows in the shared index: nothing is relisted
+    with Inventory(str(pool)) as p, Inventory(str(branch)) as q:
+        assert p.refresh() == {"listed": 0, "reused": 3, "removed": 0}
+        assert q.refresh() == {"listed": 0, "reused": 2, "removed": 0}
+
+
+def test_filters(tmp_path):
+    root = tmp_path / "lib"
+    for name in ("a.cbz", "b.cbz", "a.epub", "b.epub"):
+        write(root / name, b"d" * 8)
+    write(root / "c.nfo", b"n")
+    write(root / "d.nfo", b"n")
+
+    sets, _ = find_duplicates(scan(root), extensions=[".CBZ"], block=BLOCK)
+    assert [sorted(os.path.basename(p) for p in s.paths) for s in sets] == [["a.cbz", "b.cbz"]]
+    sets, _ = find_duplicates(scan(root), min_size=2, block=BLOCK)
+    assert len(sets) == 1 and len(sets[0].paths) == 4
+
+
+def test_cache_skips_unchanged_files_and_rehashes_changed_ones(tmp_path):
+    root = tmp_path / "lib"
+    big = b"H" * BLOCK + b"middle" + b"T" * BLOCK
+    first = write(root / "one.cbz", big)
+    write(root / "two.cbz", big)
+
+    with HashCache(str(tmp_path / "hashes.sqlite")) as cache:
+        _, cold = find_duplicates(scan(root), cache=cache, block=BLOCK)
+        cache.flush()
+        sets, warm = find_duplicates(scan(root), cache=cache, block=BLOCK)
+        assert (cold["partial_hashed"], cold["full_hashed"]) == (2, 2)
+        assert (warm["partial_hashed"], warm["full_hashed"], warm["cache_hits"]) == (0, 0, 4)
+        assert len(sets) == 1
+
+        st = os.stat(first)
+        os.utime(first, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        cache.flush()
+        _, changed = find_duplicates(scan(root), cache=cache, block=BLOCK)
+        assert (changed["partial_hashed"], changed["full_hashed"], changed["cache_hits"]) == (1, 1, 2)
+
+
+def test_hash_cache_upsert_keeps_the_other_digest_only_for_unchanged_files(tmp_path):
+    with HashCache(str(tmp_path / "hashes.sqlite")) as cache:
+        cache.put("partial", "/f", 10, 100, "p1")
+        cache.put("full", "/f", 10, 100, "f1")
+        cache.flush()
+        assert cache.get("/f") == (10, 100, "p1", "f1")
+
+        # Same file re-hashed: the full digest survives
+        cache.put("partial", "/f", 10, 100, "p1b")
+        cache.flush()
+        assert cache.get("/f") == (10, 100, "p1b", "f1")
+
+        # File changed: the stale full digest is dropped
+        cache.put("partial", "/f", 10, 200, "p2")
+        cache.flush()
+        assert cache.get("/f") == (10, 200, "p2", None)
+
+        cache.put("full", "/f", 12, 300, "f3")
+        cache.flush()
+        assert cache.get("/f") == (12, 300, None, "f3")
+        assert cache.get("/missing") is None
+
+
+def test_partial_hash_reads_small_files_whole(tmp_path):
+    small = write(tmp_path / "small", b"x" * (2 * BLOCK))
+    assert partial_hash(small, 2 * BLOCK, BLOCK) == full_hash(small)
+    large = write(tmp_path / "large", b"x" * (2 * BLOCK + 1))
+    assert partial_hash(large, 2 * BLOCK + 1, BLOCK) != full_hash(large)
+
+
+@pytest.mark.parametrize("text, expected", [("512", 512), ("64K", 65536), ("1.5M", 1572864), ("2gb", 2 << 30)])
+def test_parse_size(text, expected):
+    assert parse_size(text) == expected
@@ -0,0 +1,104 @@
+"""Unit tests for scripts/generate_images.py: the manifest skip and per-image failures, with a fake backend."""
+
+import json
+import threading
+
+from generate_images import MANIFEST_NAME, UsenetImageGenerator, asset_key
+
+
+def save_raw(image_bytes, size, quality, output_path):
+    """Pillow-free stand-in for postprocess: writes the bytes as they are."""
+    with open(output_path, "wb") as f:
+        f.write(image_bytes)
+    return output_path
+
+
+class FakeBackend:
+    """In-memory backend: the image is the prompt; prompts in `fail` raise."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, size):
+        with self._lock:
+            self.prompts.append(prompt)
+        if prompt in self.fail:
+            raise RuntimeError("backend down")
+        return f"{prompt}@{size}".encode()
+
+
+IMAGES = [
+    {"filename": "a.jpg", "prompt": "first"},
+    {"filename": "b.jpg", "prompt": "second", "size": "1792x1024"},
+    {"filename": "c.jpg", "prompt": "third"},
+]
+
+
+def generator(tmp_path, backend):
+    return UsenetImageGenerator(backend=backend, images_dir=tmp_path, workers=1, postprocess=save_raw)
+
+
+def manifest(tmp_path):
+    return json.loads((tmp_path / MANIFEST_NAME).read_text())
+
+
+def test_second_run_skips_unchanged_images(tmp_path):
+    backend = FakeBackend()
+    results = generator(tmp_path, backend).generate_images(IMAGES)
+    assert sorted(backend.prompts) == ["first", "second", "third"]
+    assert results["b.jpg"] == tmp_path / "b.jpg"
+    assert (tmp_path / "b.jpg").read_bytes() == b"second@1792x1024"
+    assert manifest(tmp_path)["b.jpg"] == {"key": asset_key("second", "1792x1024", 80), "bytes": 16}
+
+    backend = FakeBackend()
+    results = generator(tmp_path, backend).generate_images(IMAGES)
+    assert backend.prompts == []
+    assert results == {name: tmp_path / name for name in ("a.jpg", "b.jpg", "c.jpg")}
+
+    # A deleted file is regenerated even though its manifest entry matches
+    (tmp_path / "c.jpg").unlink()
+    generator(tmp_path, backend).generate_images(IMAGES)
+    assert backend.prompts == ["third"]
+
+
+def test_changed_prompt_regenerates_only_that_image(tmp_path):
+    generator(tmp_path, FakeBackend()).generate_images(IMAGES)
+    before = manifest(tmp_path)
+
+    edited = [dict(IMAGES[0]), dict(IMAGES[1], prompt="second, edited"), dict(IMAGES[2])]
+    backend = FakeBackend()
+    generator(tmp_path, backend).generate_images(edited)
+    assert backend.prompts == ["second, edited"]
+    after = manifest(tmp_path)
+    assert after["a.jpg"] == before["a.jpg"] and after["c.jpg"] == before["c.jpg"]
+    assert after["b.jpg"]["key"] == asset_key("second, edited", "1792x1024", 80)
+
+    # force ignores the manifest
+    backend = FakeBackend()
+    generator(tmp_path, backend).generate_images(edited, force=True)
+    assert len(backend.prompts) == 3
+
+
+def test_backend_failure_leaves_that_image_out(tmp_path):
+    backend = FakeBackend(fail={"second"})
+    results = generator(tmp_path, backend).generate_images(IMAGES)
+    assert results["b.jpg"] is None
+    assert results["a.jpg"] == tmp_path / "a.jpg" and results["c.jpg"] == tmp_path / "c.jpg"
+    assert sorted(manifest(tmp_path)) == ["a.jpg", "c.jpg"]
+    assert not (tmp_path / "b.jpg").exists()
+
+    # The next run retries only the failed image
+    backend = FakeBackend()
+    results = generator(tmp_path, backend).generate_images(IMAGES)
+    assert backend.prompts == ["second"] and results["b.jpg"] == tmp_path / "b.jpg"
+
+
+def test_manifest_is_saved_as_each_image_lands(tmp_path):
+    gen = generator(tmp_path, FakeBackend())
+    saved = []
+    save_manifest = gen.save_manifest
+    gen.save_manifest = lambda m: (saved.append(sorted(m)), save_manifest(m))
+    gen.generate_images(IMAGES)
+    assert [len(names) for names in saved] == [1, 2, 3]
@@ -0,0 +1,74 @@
+"""Unit tests for ingest.py building blocks and the shared container path map."""
+
+import pytest
+
+from ingest import Debouncer, IngestHandler, TravelHandler, classify_file
+from service_registry import host_path
+
+
+def test_handler_without_process_fails_at_construction():
+    class Incomplete(IngestHandler):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete(["/tmp"])
+    with pytest.raises(TypeError):
+        IngestHandler(["/tmp"])
+
+
+def test_partial_downloads_are_not_accepted(tmp_path):
+    handler = TravelHandler(str(tmp_path / "downloads"), str(tmp_path / "books"))
+    assert handler.accepts("/dl/book.epub")
+    assert not handler.accepts("/dl/book.epub.part")
+    assert not handler.accepts("/dl/Book.EPUB.crdownload")
+
+
+@pytest.mark.parametrize(
+    "path, kind",
+    [
+        ("/dl/a.cbz", "comics"),
+        ("/dl/a.epub", "ebooks"),
+        ("/dl/a.m4b", "audiobooks"),
+        ("/dl/Manga Vol. 3.pdf", "comics"),
+        ("/dl/novel.pdf", "ebooks"),
+        ("/dl/Some Audiobook/01.mp3", "audiobooks"),
+        ("/dl/music/01.mp3", "unknown"),
+    ],
+)
+def test_classify_file(path, kind):
+    assert classify_file(path) == kind
+
+
+def test_debouncer_waits_for_stable_size(tmp_path):
+    path = tmp_path / "book.epub"
+    path.write_bytes(b"a")
+    debouncer = Debouncer(settle=5)
+    debouncer.touch(str(path), now=0)
+    assert debouncer.settled(now=0) == []
+    path.write_bytes(b"ab")
+    assert debouncer.settled(now=4) == []
+    # Stable since t=4
+    assert debouncer.settled(now=8) == []
+    assert debouncer.settled(now=9) == [str(path)]
+    assert len(debouncer) == 0
+
+
+def test_debouncer_forgets_vanished_files(tmp_path):
+    debouncer = Debouncer(settle=0)
+    debouncer.touch(str(tmp_path / "gone.cbz"), now=0)
+    assert debouncer.settled(now=1) == [] and len(debouncer) == 0
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("/pool/TV/Show", "/var/mnt/pool/TV/Show"),
+        ("/pool", "/var/mnt/pool"),
+        ("/poolside/x", "/poolside/x"),
+        ("/comics\\Series\\", "/srv/comics/Series"),
+        (None, None),
+    ],
+)
+def test_host_path(path, expected):
+    path_map = {"/pool": "/var/mnt/pool", "/comics/": "/srv/comics"}
+    assert host_path(path, path_map) == expected
@@ -0,0 +1,63 @@
+"""Unit tests for inventory.py: incremental refresh and shared index files."""
+
+import os
+
+from inventory import Inventory
+
+
+def make_tree(root, files):
+    for rel, data in files.items():
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+
+def paths(inv):
+    return sorted(entry.path for entry in inv.iter_files())
+
+
+def test_warm_refresh_reuses_unchanged_dirs(tmp_path):
+    root = tmp_path / "Books"
+    make_tree(root, {"eBooks/a.epub": b"a", "Comics/b.cbz": b"bb"})
+    with Inventory(str(root), str(tmp_path / "index.sqlite")) as inv:
+        assert inv.refresh() == {"listed": 3, "reused": 0, "removed": 0}
+        assert inv.refresh() == {"listed": 0, "reused": 3, "removed": 0}
+
+        make_tree(root, {"Comics/c.cbz": b"ccc"})
+        assert inv.refresh() == {"listed": 1, "reused": 2, "removed": 0}
+        assert paths(inv) == sorted(str(root / p) for p in ("eBooks/a.epub", "Comics/b.cbz", "Comics/c.cbz"))
+
+
+def test_removed_dirs_are_pruned(tmp_path):
+    root = tmp_path / "Books"
+    make_tree(root, {"eBooks/a.epub": b"a", "Old/x.pdf": b"x"})
+    with Inventory(str(root), str(tmp_path / "index.sqlite")) as inv:
+        inv.refresh()
+        os.remove(root / "Old" / "x.pdf")
+        os.rmdir(root / "Old")
+        stats = inv.refresh()
+        assert stats["removed"] == 1
+        assert paths(inv) == [str(root / "eBooks" / "a.epub")]
+
+
+def test_roots_sharing_an_index_keep_their_own_rows(tmp_path, monkeypatch):
+    monkeypatch.setenv("INVENTORY_INDEX", str(tmp_path / "shared.sqlite"))
+    # "Books" is a string prefix of "Books2"; neither may touch the other
+    books, books2 = tmp_path / "Books", tmp_path / "Books2"
+    make_tree(books, {"eBooks/a.epub": b"a"})
+    make_tree(books2, {"Comics/b.cbz": b"b"})
+
+    with Inventory(str(books)) as a, Inventory(str(books2)) as b:
+        assert a.index_path == b.index_path
+        assert a.refresh() == {"listed": 2, "reused": 0, "removed": 0}
+        assert b.refresh() == {"listed": 2, "reused": 0, "removed": 0}
+        assert a.refresh() == {"listed": 0, "reused": 2, "removed": 0}
+        assert b.refresh() == {"listed": 0, "reused": 2, "removed": 0}
+
+        assert paths(a) == [str(books / "eBooks" / "a.epub")]
+        assert paths(b) == [str(books2 / "Comics" / "b.cbz")]
+
+        b.refresh(full=True)
+        assert paths(a) == [str(books / "eBooks" / "a.epub")]
+        assert a.refresh() == {"listed": 0, "reused": 2, "removed": 0}
@@ -0,0 +1,195 @@
+"""Unit tests for naming_enforcer.py: planning, journaled renames, resume and rollback."""
+
+import json
+import os
+
+import pytest
+
+from naming_enforcer import (
+    FolderStats,
+    Journal,
+    Rename,
+    apply_plan,
+    plan_renames,
+    remove_stubs,
+    replay,
+    scan_library,
+    target_name,
+)
+
+PUBLISHERS = {"Kingdom": "Kodansha"}
+
+
+def folder(root, name, comics=1, other=0):
+    path = root / name
+    path.mkdir()
+    for i in range(comics):
+        (path / f"{i:03d}.cbz").write_bytes(b"c" * 10)
+    for i in range(other):
+        (path / f"{i}.xml").write_bytes(b"x")
+    return str(path)
+
+
+def stats(name, comics=1):
+    return FolderStats(name, f"/lib/{name}", comics, comics, 0)
+
+
+def ops(path):
+    """(op, basename) of every complete journal line."""
+    result = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            result.append((record["op"], os.path.basename(record["src"])))
+    return result
+
+
+def test_scan_library_counts_and_classifies(tmp_path):
+    folder(tmp_path, "Kingdom (Kodansha) [EN]", comics=2)
+    folder(tmp_path, "Kingdom (2006)", comics=0, other=1)
+    folder(tmp_path, "Parasyte (1988)", comics=3)
+    folder(tmp_path, "logs", comics=0)
+    folder(tmp_path, ".hidden", comics=0)
+
+    folders = {f.name: f for f in scan_library(str(tmp_path), workers=2)}
+    assert sorted(folders) == ["Kingdom (2006)", "Kingdom (Kodansha) [EN]", "Parasyte (1988)"]
+    assert folders["Kingdom (Kodansha) [EN]"].compliant
+    assert folders["Kingdom (2006)"].stub
+    parasyte = folders["Parasyte (1988)"]
+    assert (parasyte.files, parasyte.comics, parasyte.size) == (3, 3, 30)
+    assert not parasyte.compliant and not parasyte.stub
+
+
+def test_target_name():
+    assert target_name("Kingdom (2006)", PUBLISHERS) == "Kingdom (Kodansha) [EN]"
+    assert target_name("Obscure", PUBLISHERS) == "Obscure (UNKNOWN) [EN]"
+
+
+def test_plan_skips_compliant_and_stub_folders_and_flags_collisions():
+    folders = [
+        stats("Done (Viz) [EN]"),
+        stats("Stub (2001)", comics=0),
+        stats("Fine (2010)"),
+        # Case-insensitive clash with an existing folder
+        stats("Kingdom (2006)"),
+        stats("KINGDOM (Kodansha) [EN]"),
+        # Two folders that want the same name
+        stats("Twin"),
+        stats("Twin (1999)"),
+    ]
+    plan = plan_renames(folders, PUBLISHERS)
+    assert plan.renames == [Rename("/lib/Fine (2010)", "/lib/Fine (UNKNOWN) [EN]")]
+    reasons = {os.path.basename(r.src): reason for r, reason in plan.conflicts}
+    assert reasons == {
+        "Kingdom (2006)": "target exists",
+        "Twin": "2 folders map to this name",
+        "Twin (1999)": "2 folders map to this name",
+    }
+
+
+def test_plan_guards_against_names_outside_the_scan():
+    plan = plan_renames([stats("Fine (2010)")], existing=["Fine (2010)", "FINE (UNKNOWN) [EN]"])
+    assert plan.renames == [] and len(plan.conflicts) == 1
+
+
+def test_apply_journals_every_step_and_never_overwrites(tmp_path):
+    lib = tmp_path / "lib"
+    lib.mkdir()
+    a = folder(lib, "Alpha")
+    b = folder(lib, "Beta")
+    folder(lib, "Beta (UNKNOWN) [EN]")
+    plan = [Rename(a, a + " (UNKNOWN) [EN]"), Rename(b, b + " (UNKNOWN) [EN]")]
+
+    journal = Journal(str(tmp_path / "run.jsonl"))
+    for rename in plan:
+        journal.write("plan", *rename)
+    results = apply_plan(plan, journal, workers=2)
+    journal.close()
+
+    assert [outcome for _, outcome in results] == ["done", "conflict"]
+    assert sorted(os.listdir(lib)) == ["Alpha (UNKNOWN) [EN]", "Beta", "Beta (UNKNOWN) [EN]"]
+    planned, state = Journal.read(journal.path)
+    assert planned == plan
+    assert state == {plan[0]: "done", plan[1]: "conflict"}
+
+
+def test_resume_finishes_an_interrupted_run(tmp_path):
+    lib = tmp_path / "lib"
+    lib.mkdir()
+    names = ["A", "B", "C"]
+    plan = [Rename(folder(lib, n), str(lib / f"{n} (UNKNOWN) [EN]")) for n in names]
+    path = str(tmp_path / "run.jsonl")
+    journal = Journal(path)
+    for rename in plan:
+        journal.write("plan", *rename)
+    # A finished and was journaled; B was renamed but the crash hit before its line
+    os.rename(*plan[0])
+    journal.write("done", *plan[0])
+    os.rename(*plan[1])
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "done", "src": ')  # torn final line
+
+    assert replay(path, rollback=False, workers=2) == 0
+    assert sorted(os.listdir(lib)) == [f"{n} (UNKNOWN) [EN]" for n in names]
+    _, state = Journal.read(path)
+    assert all(state[r] == "done" for r in plan)
+    # Nothing left to do
+    assert replay(path, rollback=False, workers=2) == 0
+    assert ops(path).count(("done", "C")) == 1
+
+
+def test_rollback_restores_original_names(tmp_path):
+    lib = tmp_path / "lib"
+    lib.mkdir()
+    plan = [Rename(folder(lib, n), str(lib / f"{n} (UNKNOWN) [EN]")) for n in ("A", "B")]
+    path = str(tmp_path / "run.jsonl")
+    journal = Journal(path)
+    for rename in plan:
+        journal.write("plan", *rename)
+    apply_plan(plan, journal)
+    journal.close()
+
+    assert replay(path, rollback=True, workers=2) == 0
+    assert sorted(os.listdir(lib)) == ["A", "B"]
+    _, state = Journal.read(path)
+    assert all(state[r] == "undone" for r in plan)
+    # A second rollback has nothing left to undo
+    assert replay(path, rollback=True, workers=2) == 0
+    assert sorted(os.listdir(lib)) == ["A", "B"]
+
+
+def test_rollback_never_overwrites_a_reused_name(tmp_path):
+    lib = tmp_path / "lib"
+    lib.mkdir()
+    plan = [Rename(folder(lib, "A"), str(lib / "A (UNKNOWN) [EN]"))]
+    path = str(tmp_path / "run.jsonl")
+    journal = Journal(path)
+    journal.write("plan", *plan[0])
+    apply_plan(plan, journal)
+    journal.close()
+    folder(lib, "A", comics=0)  # the old name was taken again
+
+    assert replay(path, rollback=True, workers=1) == 1
+    assert sorted(os.listdir(lib)) == ["A", "A (UNKNOWN) [EN]"]
+    assert Journal.read(path)[1][plan[0]] == "conflict"
+
+
+def test_remove_stubs_journals_removals(tmp_path):
+    lib = tmp_path / "lib"
+    lib.mkdir()
+    stub = FolderStats("Stub (2001)", folder(lib, "Stub (2001)", comics=0, other=2), 2, 0, 2)
+    journal = Journal(str(tmp_path / "cleanup.jsonl"))
+    assert remove_stubs([stub], journal) == [("Stub (2001)", "removed")]
+    journal.close()
+    assert os.listdir(lib) == []
+    assert ops(journal.path) == [("removed", "Stub (2001)")]
+
+
+@pytest.fixture(autouse=True)
+def journal_dir(tmp_path, monkeypatch):
+    # Keep Journal.new_path() out of the real cache directory
+    monkeypatch.setattr("naming_enforcer.JOURNAL_DIR", str(tmp_path / "journals"))
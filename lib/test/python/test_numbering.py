@@ -0,0 +1,81 @@
+"""Unit tests for numbering.py: filename number extraction and gap ranges."""
+
+import pytest
+
+from bench_numbering import legacy_extract_numbers, make_library
+from numbering import count_missing, extract_numbers, extract_series_numbers, find_gap_ranges, format_ranges
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("Berserk v01.cbz", [1]),
+        ("Berserk vol 2.cbz", [2]),
+        ("Berserk Volume 03 (2019).cbz", [3]),
+        ("Chapter 12", [12]),
+        ("One Piece ch 10.5.cbz", [10.5]),
+        ("One Piece ch 10.0.cbz", [10]),
+        ("Naruto - 042 (Digital)", [42]),
+        # Volumes beat chapters, chapters beat bare numbers
+        ("Something v01 ch 05 - 300", [1]),
+        ("ch 3 v4", [4]),
+        ("Something ch 07 - 300", [7]),
+        # Keywords only count at a word boundary
+        ("Evolve 3", [3]),
+        ("abc v1ch2", [1]),
+        # Years, zero and implausible values are dropped
+        ("Series 2019", []),
+        ("Series 500", []),
+        ("vol 0", []),
+        ("v2001", []),
+        ("No numbers here", []),
+    ],
+)
+def test_extract_numbers(name, expected):
+    assert extract_numbers(name) == expected
+
+
+def test_decimals_only_after_a_chapter_keyword():
+    assert extract_numbers("Series 10.5") == [5, 10]
+    assert extract_numbers("Series v10.5") == [10]
+
+
+def test_series_scan_keeps_filenames_apart():
+    # Each filename applies its own volume/chapter/bare priority
+    names = ["Title v01", "Title ch 7", "Title 003 (2021)"]
+    assert extract_series_numbers(names) == [1, 3, 7]
+    # An embedded newline must not split one filename into two
+    assert extract_series_numbers(["Title v02\nv9"]) == [2, 9]
+    assert extract_series_numbers([]) == []
+
+
+def test_series_scan_matches_the_previous_per_filename_extractor():
+    for names in make_library(series=200, books=40, seed=11):
+        legacy = sorted({n for name in names for n in legacy_extract_numbers(name)})
+        assert [n for n in extract_series_numbers(names) if isinstance(n, int)] == legacy
+
+
+@pytest.mark.parametrize(
+    "nums, expected",
+    [
+        ([], []),
+        ([3], []),
+        ([1, 2, 3], []),
+        ([1, 2, 5, 9], [(3, 4), (6, 8)]),
+        ([1, 3], [(2, 2)]),
+        # Unsorted and duplicated input
+        ([9, 1, 1, 5, 2], [(3, 4), (6, 8)]),
+        # Decimals never open or fill a gap
+        ([1, 2.5, 4], [(2, 3)]),
+        ([4.5, 7, 1], [(2, 6)]),
+    ],
+)
+def test_find_gap_ranges(nums, expected):
+    assert find_gap_ranges(nums) == expected
+
+
+def test_count_and_format_ranges():
+    ranges = [(7, 7), (12, 40)]
+    assert count_missing(ranges) == 30
+    assert format_ranges(ranges) == "7, 12-40"
+    assert count_missing([]) == 0 and format_ranges([]) == ""
@@ -0,0 +1,155 @@
+"""Unit tests for reconcile.py: the join passes and the ARR/Komga loaders against fake services."""
+
+import json
+import os
+import sys
+
+import pytest
+
+import reconcile
+from api_client import ArrClient, KomgaClient
+from fake_services import arr_routes, komga_routes
+from reconcile import (
+    CatalogEntry,
+    disk_files,
+    disk_folders,
+    komga_series,
+    radarr_files,
+    sonarr_series,
+)
+from stub_server import StubServer
+
+
+def entry(title, year=None, path=None, source="sonarr", id=None):
+    return CatalogEntry(source, id or title, title, year, path, {})
+
+
+def folders(root, *names):
+    root.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        (root / name).mkdir()
+    return str(root)
+
+
+def titles(entries):
+    return sorted(e.title.strip() for e in entries)
+
+
+def test_title_and_year_match_when_paths_differ(tmp_path):
+    root = folders(tmp_path / "tv", "The Expanse (2015)", "Dune (2021)", "Dune (1984)", "Lost")
+    left = [
+        entry("Expanse", 2015, "/elsewhere/expanse"),
+        entry("Dune", 1984, "/elsewhere/dune"),
+        entry("Missing Show", 2001),
+    ]
+    result = reconcile.reconcile(left, disk_folders([root]))
+
+    by_title = {m.left.title: (m.right.path, m.method) for m in result.matched}
+    assert by_title == {
+        "Expanse": (str(tmp_path / "tv" / "The Expanse (2015)"), "title_year"),
+        "Dune": (str(tmp_path / "tv" / "Dune (1984)"), "title_year"),
+    }
+    assert titles(result.left_only) == ["Missing Show"]
+    assert titles(result.right_only) == ["Dune", "Lost"]
+
+
+def test_ambiguous_titles_are_reported_not_guessed(tmp_path):
+    root = folders(tmp_path / "tv", "Dune (2021)", "Dune (1984)")
+    result = reconcile.reconcile([entry("Dune")], disk_folders([root]))
+    assert result.matched == [] and result.left_only == [] and result.right_only == []
+    [(key, lefts, rights)] = result.ambiguous
+    assert key == "dune" and len(lefts) == 1 and len(rights) == 2
+
+
+def test_sonarr_series_match_folders_by_mapped_path(tmp_path):
+    # Folder names that share no title with Sonarr: only the path can match them
+    tv = tmp_path / "tv"
+    folders(tv, "Title 1", "Title 2", "Stray")
+    with StubServer(arr_routes("sonarr", 3, 0, 0, 0)) as srv:
+        series = sonarr_series(ArrClient(srv.url, "key"), path_map={"/media/sonarr": str(tv)})
+    result = reconcile.reconcile(series, disk_folders([str(tv)]))
+
+    assert sorted((m.left.id, m.method) for m in result.matched) == [(1, "path"), (2, "path")]
+    assert [e.path for e in result.left_only] == [str(tv / "Title 3")]
+    assert titles(result.right_only) == ["Stray"]
+    assert result.to_dict()["summary"]["matched_by"] == {"path": 2}
+
+
+def test_komga_series_with_no_folder(tmp_path):
+    root = folders(tmp_path / "comics", "Series 0", "Series 2 (2019)", "Unlisted")
+    with StubServer(komga_routes(4, 1, 0)) as srv:
+        series = list(komga_series(KomgaClient(srv.url, "user", "pass")))
+    result = reconcile.reconcile(series, disk_folders([root]))
+
+    assert sorted((m.left.id, m.method) for m in result.matched) == [("S00000", "title"), ("S00002", "title")]
+    assert [e.id for e in result.left_only] == ["S00001", "S00003"]
+    assert titles(result.right_only) == ["Unlisted"]
+
+
+def movie_routes(tmp_path):
+    movies = [
+        {"id": 1, "title": "Here", "year": 2001, "hasFile": True,
+         "movieFile": {"id": 11, "path": "/pool/Movies/Here (2001)/here.mkv", "size": 5}},
+        {"id": 2, "title": "Gone", "year": 2002, "hasFile": True,
+         "movieFile": {"id": 12, "path": "/pool/Movies/Gone (2002)/gone.mkv", "size": 5}},
+        {"id": 3, "title": "Wanted", "year": 2003, "hasFile": False},
+    ]
+    (tmp_path / "Movies" / "Here (2001)").mkdir(parents=True)
+    (tmp_path / "Movies" / "Here (2001)" / "here.mkv").write_bytes(b"movie")
+    return {"/api/v3/movie": movies}
+
+
+def test_radarr_files_missing_on_disk(tmp_path):
+    with StubServer(movie_routes(tmp_path)) as srv:
+        files = radarr_files(ArrClient(srv.url, "key"), path_map={"/pool": str(tmp_path)})
+    assert [e.id for e in files] == [11, 12]
+    on_disk = disk_files(e.path for e in files if e.path and os.path.exists(e.path))
+    result = reconcile.reconcile(files, on_disk, passes=["path"])
+    assert [m.left.id for m in result.matched] == [11]
+    assert [(e.id, e.extra["movieId"]) for e in result.left_only] == [(12, 2)]
+
+
+def episode_routes(tmp_path):
+    series = [
+        {"id": 1, "title": "Show", "path": f"{tmp_path}/Show", "statistics": {"episodeFileCount": 2}},
+        {"id": 2, "title": "Empty", "path": f"{tmp_path}/Empty", "statistics": {"episodeFileCount": 0}},
+    ]
+    files = {
+        "1": [
+            {"id": 101, "seriesId": 1, "path": f"{tmp_path}/Show/S01E01.mkv", "size": 3},
+            {"id": 102, "seriesId": 1, "path": f"{tmp_path}/Show/S01E02.mkv", "size": 3},
+        ],
+    }
+    requested = []
+
+    def episode_files(q):
+        requested.append(q["seriesId"])
+        return files.get(q["seriesId"], [])
+
+    (tmp_path / "Show").mkdir()
+    (tmp_path / "Show" / "S01E01.mkv").write_bytes(b"ep1")
+    return {"/api/v3/series": series, "/api/v3/episodefile": episode_files}, requested
+
+
+def run_main(monkeypatch, capsys, url, *argv):
+    monkeypatch.setattr("service_registry.ServiceRegistry.client", lambda self, name: ArrClient(url, "key"))
+    monkeypatch.setattr(sys, "argv", ["reconcile.py", *argv])
+    reconcile.main()
+    return json.loads(capsys.readouterr().out)
+
+
+def test_cli_sonarr_files_reports_episode_files_missing_on_disk(tmp_path, monkeypatch, capsys):
+    routes, requested = episode_routes(tmp_path)
+    with StubServer(routes) as srv:
+        report = run_main(monkeypatch, capsys, srv.url, "sonarr-files", "--json")
+    # Series without files are not asked for their episode files
+    assert requested == ["1"]
+    assert report["summary"]["matched"] == 1
+    assert [(e["id"], e["path"]) for e in report["left_only"]] == [(102, str(tmp_path / "Show" / "S01E02.mkv"))]
+
+
+def test_cli_disk_modes_need_a_root(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["reconcile.py", "sonarr-disk"])
+    with pytest.raises(SystemExit) as exit_info:
+        reconcile.main()
+    assert exit_info.value.code == 2
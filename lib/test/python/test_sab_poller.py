@@ -0,0 +1,144 @@
+"""Unit tests for sab_poller.py against a stub SABnzbd whose queue and history change between polls."""
+
+from api_client import SabClient
+from sab_poller import SabPoller
+from stub_server import StubServer
+
+
+def slot(i, **fields):
+    return {"nzo_id": f"nzo_{i}", "filename": f"Release.{i}", "status": "Queued", "percentage": "0", **fields}
+
+
+class FakeSab:
+    """Mutable SABnzbd /api: `queue` in queue order, `history` newest first."""
+
+    def __init__(self, queue, history=()):
+        self.queue = list(queue)
+        self.history = list(history)
+        self.requests = []
+
+    def __call__(self, query):
+        mode = query.get("mode")
+        start, limit = int(query.get("start", 0)), int(query.get("limit", 0))
+        self.requests.append((mode, start, limit))
+        window = slice(start, start + limit if limit else None)
+        if mode == "queue":
+            return {"queue": {"noofslots_total": len(self.queue), "slots": self.queue[window]}}
+        if mode == "history":
+            return {"history": {"noofslots": len(self.history), "slots": self.history[window]}}
+        return 400, {"status": False}
+
+    def finish(self, i, status="Completed"):
+        """Move queue slot i into history."""
+        self.queue = [s for s in self.queue if s["nzo_id"] != f"nzo_{i}"]
+        self.history.insert(0, {"nzo_id": f"nzo_{i}", "name": f"Release.{i}", "status": status})
+
+    def take_requests(self, mode):
+        taken = [r[1:] for r in self.requests if r[0] == mode]
+        self.requests = []
+        return taken
+
+
+def ids(slots):
+    return [s["nzo_id"] for s in slots]
+
+
+def poller_for(srv, **kwargs):
+    return SabPoller(SabClient(srv.url, "key"), **kwargs)
+
+
+def test_first_poll_pages_the_queue_and_primes_history():
+    sab = FakeSab([slot(i) for i in range(5)], [{"nzo_id": "old", "name": "Old", "status": "Completed"}])
+    completed = []
+    with StubServer({"/api": sab}) as srv:
+        poller = poller_for(srv, head_size=2, page_size=2, on_complete=completed.append)
+        delta = poller.poll()
+        # Head first, then a full sweep of start/limit pages
+        assert sab.take_requests("queue") == [(0, 2), (0, 2), (2, 2), (4, 2)]
+        assert ids(delta.added) == [f"nzo_{i}" for i in range(5)]
+        assert delta.totals["full_sweep"] and delta.totals["noofslots_total"] == 5
+        # Jobs finished before the poller started are not reported
+        assert delta.completed == [] and completed == []
+
+        # Nothing moved: one head request, nothing to report
+        sab.requests = []
+        delta = poller.poll()
+        assert not delta
+        assert sab.take_requests("queue") == [(0, 2)]
+        assert not delta.totals["full_sweep"]
+
+
+def test_updates_in_the_head_are_reported_without_a_sweep():
+    sab = FakeSab([slot(i) for i in range(5)])
+    with StubServer({"/api": sab}) as srv:
+        poller = poller_for(srv, head_size=2, page_size=2)
+        poller.poll()
+        sab.queue[0] = slot(0, status="Downloading", percentage="40", index=0, timeleft="0:01:00")
+        sab.queue[1] = dict(sab.queue[1], index=7, timeleft="1:00:00")  # not tracked fields
+        sab.requests = []
+        delta = poller.poll()
+        assert ids(delta.updated) == ["nzo_0"]
+        assert delta.added == [] and delta.removed == []
+        assert sab.take_requests("queue") == [(0, 2)]
+
+
+def test_moves_in_the_head_trigger_a_sweep_for_added_and_removed():
+    sab = FakeSab([slot(i) for i in range(5)])
+    completions, failures, changes = [], [], []
+    with StubServer({"/api": sab}) as srv:
+        poller = poller_for(
+            srv,
+            head_size=2,
+            page_size=2,
+            on_complete=completions.append,
+            on_failure=failures.append,
+            on_change=changes.append,
+        )
+        poller.poll()
+        changes.clear()
+
+        sab.finish(0)
+        sab.finish(3, status="Failed")
+        sab.queue.append(slot(5))
+        delta = poller.poll()
+        assert ids(delta.added) == ["nzo_5"]
+        assert sorted(delta.removed) == ["nzo_0", "nzo_3"]
+        assert delta.totals["full_sweep"]
+        assert ids(delta.completed) == ["nzo_0"] and ids(delta.failed) == ["nzo_3"]
+        assert ids(completions) == ["nzo_0"] and ids(failures) == ["nzo_3"]
+        assert changes == [delta]
+
+        # Each finished job fires its callback once
+        poller.poll()
+        assert len(completions) == 1 and len(failures) == 1
+
+
+def test_history_paging_stops_at_the_first_known_job():
+    sab = FakeSab([], [{"nzo_id": f"h{i}", "status": "Completed"} for i in range(10)])
+    with StubServer({"/api": sab}) as srv:
+        poller = poller_for(srv, history_page=3)
+        poller.poll()
+        assert sab.take_requests("history") == [(0, 3)]
+
+        for i in range(10, 15):
+            sab.history.insert(0, {"nzo_id": f"h{i}", "status": "Completed"})
+        delta = poller.poll()
+        # Five new jobs span two pages; the second page reaches a known job
+        assert sab.take_requests("history") == [(0, 3), (3, 3)]
+        assert ids(delta.completed) == [f"h{i}" for i in range(10, 15)]
+
+
+def test_state_is_bounded():
+    sab = FakeSab([slot(i) for i in range(8)], [{"nzo_id": f"h{i}", "status": "Completed"} for i in range(3)])
+    with StubServer({"/api": sab}) as srv:
+        poller = poller_for(srv, head_size=2, page_size=4, max_slots=5, max_history_ids=4)
+        delta = poller.poll()
+        assert ids(delta.added) == [f"nzo_{i}" for i in range(5)]
+        assert len(poller._slots) == 5
+
+        for i in range(3, 9):
+            sab.history.insert(0, {"nzo_id": f"h{i}", "status": "Completed"})
+        delta = poller.poll()
+        assert ids(delta.completed) == [f"h{i}" for i in range(3, 9)]
+        assert list(poller._seen_history) == ["h5", "h6", "h7", "h8"]
+        assert len(poller._slots) <= 5
@@ -2,139 +2,290 @@
 """
 AI Image Generation Service for Usenet Media Stack
 Uses OpenAI GPT Image model to generate relevant visual assets
+
+Images are requested concurrently (at most --jobs in flight) and resized
+and JPEG-optimized on a process pool. A manifest next to the images
+records a hash of each image's (prompt, size, quality) and is saved as
+each image lands; images whose inputs did not change and whose file
+still exists are skipped, so a re-run (even after an interrupted one)
+only pays for new or edited prompts (--force regenerates all).
+
+The backend is anything with generate(prompt, size) -> image bytes.
+--backend placeholder draws local solid-color images for offline docs
+builds, tests and benchmarks.
 """
 
+import argparse
 import base64
+import hashlib
+import json
+import multiprocessing
 import os
 import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from io import BytesIO
 from pathlib import Path
 
-try:
-    from openai import OpenAI
-    from PIL import Image
-except ImportError:
-    print("Required packages not installed. Run: pip install openai pillow")
-    sys.exit(1)
+MODEL = "gpt-image-1"
+MANIFEST_NAME = ".manifest.json"
+
+STACK_IMAGES = [
+    {
+        "filename": "hero-architecture.jpg",
+        "prompt": "Modern software architecture diagram showing a hot-swappable media server stack with Docker containers, storage drives, and network connections. Professional technical illustration with blue and green color scheme, clean minimalist design, showing distributed services and data flow.",
+        "size": "1792x1024"
+    },
+    {
+        "filename": "hardware-optimization.jpg",
+        "prompt": "High-performance computer hardware setup with GPU acceleration, multiple storage drives, and server equipment. Professional technical photography style with dramatic lighting, showing NVIDIA RTX graphics card, multiple hard drives, and modern server components.",
+        "size": "1024x1024"
+    },
+    {
+        "filename": "storage-management.jpg",
+        "prompt": "Professional visualization of hot-swappable storage system with multiple drives, JBOD arrays, and cloud storage connections. Technical diagram style showing drive discovery, mounting, and service integration with clean geometric design.",
+        "size": "1024x1024"
+    },
+    {
+        "filename": "media-automation.jpg",
+        "prompt": "Media automation workflow showing movies, TV shows, books, and music being automatically organized and transcoded. Modern interface design with media thumbnails, quality profiles, and automation indicators in a professional dashboard style.",
+        "size": "1024x1024"
+    },
+    {
+        "filename": "service-topology.jpg",
+        "prompt": "Network topology diagram showing 19+ microservices connected in a distributed system. Professional technical illustration with nodes, connections, and service dependencies visualized in a clean network graph style with modern color palette.",
+        "size": "1024x1024"
+    },
+    {
+        "filename": "cli-interface.jpg",
+        "prompt": "Modern command-line interface showing advanced terminal commands and system management. Professional developer workspace with dark theme terminal, colorful output, and multiple command windows displaying system status and configuration.",
+        "size": "1024x1024"
+    },
+    {
+        "filename": "performance-metrics.jpg",
+        "prompt": "Performance dashboard showing real-time system metrics, transcoding speeds, and hardware utilization. Professional monitoring interface with charts, graphs, and live data visualization in a modern dark theme.",
+        "size": "1024x1024"
+    },
+    {
+        "filename": "security-tunnel.jpg",
+        "prompt": "Secure network tunnel visualization showing encrypted connections through Cloudflare with SSL/TLS protection. Professional cybersecurity illustration with lock icons, encrypted data streams, and secure network pathways.",
+        "size": "1024x1024"
+    }
+]
+
+
+def _require(module):
+    """Import an optional dependency only when it is needed, so other backends run without it."""
+    try:
+        return __import__(module, fromlist=["_"])
+    except ImportError:
+        raise RuntimeError("Required packages not installed. Run: pip install openai pillow") from None
+
+
+def asset_key(prompt, size, quality):
+    """Manifest key: changes whenever anything that affects the output changes."""
+    payload = json.dumps([MODEL, prompt, size, quality])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def postprocess(image_bytes, size, quality, output_path):
+    """Resize and save as an optimized JPEG. Runs in a worker process."""
+    Image = _require("PIL.Image")
+    image = Image.open(BytesIO(image_bytes))
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    # Resize if needed (keep aspect ratio)
+    if size != "1024x1024":
+        width, height = map(int, size.split('x'))
+        image = image.resize((width, height), Image.LANCZOS)
+
+    tmp_path = f"{output_path}.tmp"
+    image.save(tmp_path, format="JPEG", quality=quality, optimize=True)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def _process_context():
+    """
+    Start method for the post-processing pool. Its workers start while
+    backend threads are mid-request, and a fork would copy their held
+    locks, so use forkserver where the platform has it.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class OpenAIBackend:
+    """Generates images with the OpenAI GPT Image model"""
 
-class UsenetImageGenerator:
     def __init__(self, api_key=None):
-        """Initialize with API key from environment"""
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key required. Set OPENAI_API_KEY environment variable.")
-        
-        self.client = OpenAI(api_key=self.api_key)
-        
+        self.client = _require("openai").OpenAI(api_key=self.api_key)
+
+    def generate(self, prompt, size):
+        result = self.client.images.generate(model=MODEL, prompt=prompt, size=size)
+        return base64.b64decode(result.data[0].b64_json)
+
+
+class PlaceholderBackend:
+    """Offline stand-in: a solid image whose color is derived from the prompt"""
+
+    def generate(self, prompt, size):
+        Image = _require("PIL.Image")
+        width, height = map(int, size.split('x'))
+        color = tuple(hashlib.sha256(prompt.encode("utf-8")).digest()[:3])
+        buf = BytesIO()
+        Image.new("RGB", (width, height), color).save(buf, format="PNG")
+        return buf.getvalue()
+
+
+class UsenetImageGenerator:
+    def __init__(
+        self, api_key=None, backend=None, images_dir=None, max_in_flight=3, workers=None, postprocess=postprocess
+    ):
+        """
+        Args:
+            backend: object with generate(prompt, size) -> bytes
+                (default: OpenAIBackend with api_key or OPENAI_API_KEY)
+            max_in_flight: concurrent backend requests
+            workers: post-processing processes (default: CPU count)
+            postprocess: module-level function (image_bytes, size, quality,
+                output_path) -> output_path run on the process pool
+                (default: resize and save as JPEG with Pillow)
+        """
+        self.backend = backend if backend is not None else OpenAIBackend(api_key)
+        self.max_in_flight = max_in_flight
+        self.workers = workers
+        self.postprocess = postprocess
+
         # Create images directory
-        self.images_dir = Path(__file__).parent.parent / "docs" / "public" / "images" / "generated"
+        self.images_dir = Path(images_dir) if images_dir else (
+            Path(__file__).parent.parent / "docs" / "public" / "images" / "generated"
+        )
         self.images_dir.mkdir(parents=True, exist_ok=True)
-    
-    def generate_image(self, prompt, filename, size="1024x1024", quality=80):
-        """Generate image using OpenAI GPT Image model"""
+        self.manifest_path = self.images_dir / MANIFEST_NAME
+
+    def load_manifest(self):
         try:
-            print(f"🎨 Generating image: {filename}")
-            print(f"📝 Prompt: {prompt}")
-            
-            # Generate the image
-            result = self.client.images.generate(
-                model="gpt-image-1",
-                prompt=prompt,
-                size=size
-            )
-            
-            # Get the base64 image data
-            image_base64 = result.data[0].b64_json
-            image_bytes = base64.b64decode(image_base64)
-            
-            # Open and resize for optimization
-            image = Image.open(BytesIO(image_bytes))
-            
-            # Resize if needed (keep aspect ratio)
-            if size != "1024x1024":
-                width, height = map(int, size.split('x'))
-                image = image.resize((width, height), Image.LANCZOS)
-            
-            # Save optimized image
-            output_path = self.images_dir / filename
-            image.save(output_path, format="JPEG", quality=quality, optimize=True)
-            
-            print(f"✅ Saved: {output_path}")
-            return output_path
-            
-        except Exception as e:
-            print(f"❌ Error generating {filename}: {e}")
-            return None
-    
-    def generate_usenet_stack_images(self):
+            return json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def save_manifest(self, manifest):
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+        os.replace(tmp_path, self.manifest_path)
+
+    def is_current(self, manifest, filename, key):
+        entry = manifest.get(filename)
+        return bool(entry) and entry.get("key") == key and (self.images_dir / filename).exists()
+
+    def generate_images(self, images, force=False):
+        """
+        Generate every image whose inputs changed since the last run.
+
+        Returns:
+            dict of filename -> output path, or None if generation failed
+        """
+        manifest = self.load_manifest()
+        results = {}
+        todo = []
+        for image in images:
+            size = image.get("size", "1024x1024")
+            quality = image.get("quality", 80)
+            key = asset_key(image["prompt"], size, quality)
+            if not force and self.is_current(manifest, image["filename"], key):
+                print(f"⏭️  Unchanged: {image['filename']}")
+                results[image["filename"]] = self.images_dir / image["filename"]
+            else:
+                todo.append((image, size, quality, key))
+
+        if not todo:
+            return results
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as requests, \
+                ProcessPoolExecutor(max_workers=self.workers, mp_context=_process_context()) as processes:
+            generating, saving = {}, {}
+            for image, size, quality, key in todo:
+                print(f"🎨 Generating image: {image['filename']}")
+                generating[requests.submit(self.backend.generate, image["prompt"], size)] = (image, size, quality, key)
+
+            # Post-process each image as soon as its bytes arrive, and record
+            # it in the manifest as soon as it is saved
+            pending = set(generating)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in generating:
+                        image, size, quality, key = generating.pop(future)
+                        try:
+                            image_bytes = future.result()
+                        except Exception as e:
+                            print(f"❌ Error generating {image['filename']}: {e}")
+                            results[image["filename"]] = None
+                            continue
+                        output_path = str(self.images_dir / image["filename"])
+                        saved = processes.submit(self.postprocess, image_bytes, size, quality, output_path)
+                        saving[saved] = (image, key)
+                        pending.add(saved)
+                        continue
+
+                    image, key = saving.pop(future)
+                    try:
+                        output_path = Path(future.result())
+                    except Exception as e:
+                        print(f"❌ Error saving {image['filename']}: {e}")
+                        results[image["filename"]] = None
+                        continue
+                    manifest[image["filename"]] = {"key": key, "bytes": output_path.stat().st_size}
+                    self.save_manifest(manifest)
+                    results[image["filename"]] = output_path
+                    print(f"✅ Saved: {output_path}")
+
+        return results
+
+    def generate_image(self, prompt, filename, size="1024x1024", quality=80):
+        """Generate a single image; returns its path or None"""
+        image = {"prompt": prompt, "filename": filename, "size": size, "quality": quality}
+        return self.generate_images([image], force=True)[filename]
+
+    def generate_usenet_stack_images(self, force=False, only=None):
         """Generate all relevant images for the Usenet Media Stack"""
-        
-        images_to_generate = [
-            {
-                "filename": "hero-architecture.jpg",
-                "prompt": "Modern software architecture diagram showing a hot-swappable media server stack with Docker containers, storage drives, and network connections. Professional technical illustration with blue and green color scheme, clean minimalist design, showing distributed services and data flow.",
-                "size": "1792x1024"
-            },
-            {
-                "filename": "hardware-optimization.jpg", 
-                "prompt": "High-performance computer hardware setup with GPU acceleration, multiple storage drives, and server equipment. Professional technical photography style with dramatic lighting, showing NVIDIA RTX graphics card, multiple hard drives, and modern server components.",
-                "size": "1024x1024"
-            },
-            {
-                "filename": "storage-management.jpg",
-                "prompt": "Professional visualization of hot-swappable storage system with multiple drives, JBOD arrays, and cloud storage connections. Technical diagram style showing drive discovery, mounting, and service integration with clean geometric design.",
-                "size": "1024x1024"
-            },
-            {
-                "filename": "media-automation.jpg",
-                "prompt": "Media automation workflow showing movies, TV shows, books, and music being automatically organized and transcoded. Modern interface design with media thumbnails, quality profiles, and automation indicators in a professional dashboard style.",
-                "size": "1024x1024"
-            },
-            {
-                "filename": "service-topology.jpg",
-                "prompt": "Network topology diagram showing 19+ microservices connected in a distributed system. Professional technical illustration with nodes, connections, and service dependencies visualized in a clean network graph style with modern color palette.",
-                "size": "1024x1024"
-            },
-            {
-                "filename": "cli-interface.jpg",
-                "prompt": "Modern command-line interface showing advanced terminal commands and system management. Professional developer workspace with dark theme terminal, colorful output, and multiple command windows displaying system status and configuration.",
-                "size": "1024x1024"
-            },
-            {
-                "filename": "performance-metrics.jpg",
-                "prompt": "Performance dashboard showing real-time system metrics, transcoding speeds, and hardware utilization. Professional monitoring interface with charts, graphs, and live data visualization in a modern dark theme.",
-                "size": "1024x1024"
-            },
-            {
-                "filename": "security-tunnel.jpg",
-                "prompt": "Secure network tunnel visualization showing encrypted connections through Cloudflare with SSL/TLS protection. Professional cybersecurity illustration with lock icons, encrypted data streams, and secure network pathways.",
-                "size": "1024x1024"
-            }
-        ]
-        
+        images = [i for i in STACK_IMAGES if not only or i["filename"] in only]
+
         print("🚀 Starting AI image generation for Usenet Media Stack...")
         print(f"📁 Output directory: {self.images_dir}")
-        
-        results = []
-        for image_config in images_to_generate:
-            result = self.generate_image(**image_config)
-            results.append(result)
-        
-        successful = len([r for r in results if r is not None])
+
+        results = self.generate_images(images, force=force)
+        successful = len([r for r in results.values() if r is not None])
         total = len(results)
-        
-        print(f"\n🎉 Generation complete: {successful}/{total} images created successfully")
-        return results
+
+        print(f"\n🎉 Generation complete: {successful}/{total} images up to date")
+        return [results[i["filename"]] for i in images]
+
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="Generate documentation images for the Usenet Media Stack")
+    parser.add_argument("--backend", choices=["openai", "placeholder"], default="openai")
+    parser.add_argument("--jobs", type=int, default=3, help="concurrent generation requests")
+    parser.add_argument("--force", action="store_true", help="regenerate images even if unchanged")
+    parser.add_argument("--only", nargs="*", metavar="FILENAME", help="only these images")
+    parser.add_argument("--output-dir", help="where to write images (default: docs/public/images/generated)")
+    args = parser.parse_args()
+
     try:
-        generator = UsenetImageGenerator()
-        generator.generate_usenet_stack_images()
+        backend = PlaceholderBackend() if args.backend == "placeholder" else None
+        generator = UsenetImageGenerator(backend=backend, images_dir=args.output_dir, max_in_flight=args.jobs)
+        results = generator.generate_usenet_stack_images(force=args.force, only=args.only)
     except Exception as e:
         print(f"❌ Error: {e}")
         print("💡 Make sure to set OPENAI_API_KEY environment variable")
         sys.exit(1)
+    if any(r is None for r in results):
+        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
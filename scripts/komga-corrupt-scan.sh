@@ -1,62 +1,36 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-LIST_FILE="${1:-docs/komga-corrupt-cbz.md}"
-ROOT_PREFIX="/comics/"
+# Verify CBZ archives and optionally quarantine the failures.
+#
+#   komga-corrupt-scan.sh [LIST_FILE|ROOT_DIR]
+#
+# Accepts the markdown list (default docs/komga-corrupt-cbz.md) or a
+# directory root. Verdicts stream as NDJSON from lib/python/cbz_integrity.py;
+# unchanged files are skipped via its (path, size, mtime) verdict cache.
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+TARGET="${1:-docs/komga-corrupt-cbz.md}"
 QUARANTINE_DIR="${QUARANTINE_DIR:-}"
 DO_QUARANTINE="${DO_QUARANTINE:-0}"
 
-if [[ ! -f "$LIST_FILE" ]]; then
-  echo "List file not found: $LIST_FILE" >&2
+args=()
+if [[ -d "$TARGET" ]]; then
+  args+=("$TARGET")
+elif [[ -f "$TARGET" ]]; then
+  args+=(--list "$TARGET")
+else
+  echo "List file or directory not found: $TARGET" >&2
   exit 1
 fi
 
-# Extract file paths from markdown list
-mapfile -t paths < <(awk '/^-[[:space:]]+\/comics\// {sub(/^- /, ""); print}' "$LIST_FILE")
-
-if [[ ${#paths[@]} -eq 0 ]]; then
-  echo "No /comics paths found in $LIST_FILE" >&2
-  exit 0
-fi
-
-python - <<'PY'
-import os, sys, zipfile
-paths = [line.strip() for line in sys.stdin if line.strip()]
-failed = []
-for p in paths:
-    if not os.path.exists(p):
-        failed.append((p, "MISSING"))
-        continue
-    try:
-        with zipfile.ZipFile(p, 'r') as z:
-            bad = z.testzip()
-            if bad:
-                failed.append((p, f"BAD:{bad}"))
-    except Exception as e:
-        failed.append((p, f"ERROR:{e}"))
-
-if failed:
-    print("\nCorrupt/missing files:")
-    for p, err in failed:
-        print(f"- {p} :: {err}")
-    sys.exit(2)
-else:
-    print("All listed files validated OK")
-PY
-<<EOF
-$(printf '%s\n' "${paths[@]}")
-EOF
-
 if [[ "$DO_QUARANTINE" == "1" ]]; then
   if [[ -z "$QUARANTINE_DIR" ]]; then
     echo "Set QUARANTINE_DIR to use quarantine mode" >&2
     exit 1
   fi
-  mkdir -p "$QUARANTINE_DIR"
-  for p in "${paths[@]}"; do
-    if [[ -f "$p" ]]; then
-      mv -n "$p" "$QUARANTINE_DIR/"
-    fi
-  done
-  echo "Moved listed files to $QUARANTINE_DIR"
+  # Failing files are moved as soon as their verdict is in
+  args+=(--quarantine "$QUARANTINE_DIR")
 fi
+
+exec python3 "$SCRIPT_DIR/../lib/python/cbz_integrity.py" "${args[@]}"
@@ -8,130 +8,159 @@ Usage:
   KOMGA_PASS=secret \
   scripts/komga-gap-report.py > /tmp/komga_gap_report.md
 
+  scripts/komga-gap-report.py --full    # ignore the snapshot cache and rebuild it
+
 Outputs a markdown report listing series with detected numeric gaps
 (volumes or chapters) based on filenames in Komga.
 
 Notes:
 - Read-only: no writes to Komga.
-- Only detects simple integer sequences like v01 / vol 1 / ch 12.
+- Detects integer sequences like v01 / vol 1 / ch 12; decimal chapters
+  (ch 10.5) count as present but never open or fill a gap. Missing numbers
+  are listed as compact ranges (e.g. 12-40).
 - Uses mirror/root currently configured in Komga; no filesystem access needed.
+- Book listings are paginated in full and fetched for KOMGA_WORKERS
+  series concurrently (default 8).
+- Extracted numbers are kept in a SQLite snapshot (KOMGA_GAP_CACHE,
+  default ~/.cache/usenet-media-stack/komga-gap.sqlite). Later runs only
+  fetch books for series whose lastModified/booksCount changed.
 """
 
+import argparse
+import json
 import os
-import re
+import sqlite3
 import sys
-import json
-import urllib.request
-import urllib.error
-import base64
-from typing import Dict, List
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Tuple
+
+# Add lib to path for imports
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "lib" / "python"))
+
+from api_client import ConnectionPool, KomgaClient, PageFetchError
+from numbering import Number, count_missing, extract_series_numbers, find_gap_ranges, format_ranges
 
 URL = os.environ.get("KOMGA_URL", "http://127.0.0.1:8081")
 USER = os.environ.get("KOMGA_USER")
 PWD = os.environ.get("KOMGA_PASS")
 PAGE_SIZE = 500
+WORKERS = int(os.environ.get("KOMGA_WORKERS", "8"))
+TIMEOUT = 60
+CACHE_PATH = os.environ.get(
+    "KOMGA_GAP_CACHE",
+    str(pathlib.Path.home() / ".cache" / "usenet-media-stack" / "komga-gap.sqlite"),
+)
+# Bump when number extraction changes so cached numbers are re-derived.
+CACHE_SCHEMA = 2
+MAX_RANGES_SHOWN = 200
 
-if not USER or not PWD:
-    sys.stderr.write("Error: KOMGA_USER and KOMGA_PASS must be set\n")
-    sys.exit(1)
-
-headers = {
-    "Authorization": "Basic " + base64.b64encode(f"{USER}:{PWD}".encode()).decode(),
-    "Accept": "application/json"
-}
 
+def fetch_all_series(client: KomgaClient):
+    return list(client.iter_records("/api/v1/series", PAGE_SIZE))
 
-def fetch(url: str):
-    req = urllib.request.Request(url, headers=headers)
-    with urllib.request.urlopen(req) as resp:
-        return json.loads(resp.read())
 
+def fetch_books(client: KomgaClient, series_id: str):
+    # Komga supports sorting; use default order
+    return client.iter_records(f"/api/v1/series/{series_id}/books", PAGE_SIZE)
 
-def fetch_all_series():
-    series = []
-    page = 0
-    while True:
-        data = fetch(f"{URL}/api/v1/series?page={page}&size={PAGE_SIZE}")
-        series.extend(data.get("content", []))
-        if data.get("last", True):
-            break
-        page += 1
-    return series
 
+def series_fingerprint(s: Dict[str, Any]) -> str:
+    """Value that changes whenever a series' books may have changed."""
+    return f"{s.get('lastModified', '')}|{s.get('booksCount', '')}"
 
-def fetch_books(series_id: str):
-    # Komga supports sorting; use default order
-    data = fetch(f"{URL}/api/v1/series/{series_id}/books?size={PAGE_SIZE}")
-    return data.get("content", [])
 
+def series_numbers(client: KomgaClient, series_id: str) -> List[Number]:
+    """Fetch one series' books and return its sorted, de-duplicated numbers."""
+    return extract_series_numbers(
+        b.get("name") or b.get("url", "") for b in fetch_books(client, series_id)
+    )
 
-# Heuristics to keep numbers sane: chapter/volume IDs rarely exceed a few hundred.
-VOL_CH_MAX = 2000
-FALLBACK_MAX = 400  # when no ch/vol keyword is present
-YEAR_LOWER, YEAR_UPPER = 1900, 2100
 
-vol_re = re.compile(r"(?:^|[^A-Za-z0-9])(v|vol|volume)\s*0*(\d+)", re.IGNORECASE)
-ch_re = re.compile(r"(?:^|[^A-Za-z0-9])(ch|chapter)\s*0*(\d+)", re.IGNORECASE)
-num_re = re.compile(r"(?:^|[^A-Za-z0-9])0*(\d+)(?![0-9])")
+def open_cache(path: str, full: bool) -> sqlite3.Connection:
+    """Open the snapshot cache, discarding it on --full or a schema change."""
+    pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path)
+    if full or db.execute("PRAGMA user_version").fetchone()[0] != CACHE_SCHEMA:
+        db.execute("DROP TABLE IF EXISTS series")
+    db.execute(
+        """CREATE TABLE IF NOT EXISTS series (
+               id TEXT PRIMARY KEY,
+               fingerprint TEXT NOT NULL,
+               numbers TEXT NOT NULL
+           )"""
+    )
+    db.execute(f"PRAGMA user_version = {CACHE_SCHEMA}")
+    return db
 
 
-def extract_numbers(name: str) -> List[int]:
+def refresh_cache(
+    client: KomgaClient, db: sqlite3.Connection, series_list: List[Dict[str, Any]]
+) -> Tuple[Dict[str, List[Number]], int]:
     """
-    Extract plausible volume/chapter numbers from a filename.
-    Priority: vol/volume -> ch/chapter -> generic numbers.
-    Filters out year-like numbers and absurdly large ranges.
+    Bring the snapshot up to date with the current series list.
+
+    Returns:
+        Tuple of (numbers by series id, count of series re-fetched)
     """
-    # Pass 1: explicit vol/ch
-    for rx, limit in ((vol_re, VOL_CH_MAX), (ch_re, VOL_CH_MAX)):
-        hits: List[int] = []
-        for m in rx.finditer(name):
-            try:
-                n = int(m.group(2))
-                if 0 < n <= limit:
-                    hits.append(n)
-            except Exception:
-                continue
-        if hits:
-            return sorted(set(hits))
-
-    # Pass 2: bare numbers, but avoid years and huge values
-    nums: List[int] = []
-    for m in num_re.finditer(name):
-        try:
-            n = int(m.group(1))
-        except Exception:
-            continue
-        if YEAR_LOWER <= n <= YEAR_UPPER:
-            continue
-        if 0 < n <= FALLBACK_MAX:
-            nums.append(n)
-    return sorted(set(nums))
-
-
-def find_gaps(nums: List[int]):
-    if len(nums) < 2:
-        return []
-    gaps = []
-    for a, b in zip(nums, nums[1:]):
-        if b - a > 1:
-            gaps.extend(range(a + 1, b))
-    return gaps
+    cached = {
+        sid: (fingerprint, json.loads(numbers))
+        for sid, fingerprint, numbers in db.execute("SELECT id, fingerprint, numbers FROM series")
+    }
+    numbers = {}
+    stale = []
+    for s in series_list:
+        hit = cached.get(s["id"])
+        if hit and hit[0] == series_fingerprint(s):
+            numbers[s["id"]] = hit[1]
+        else:
+            stale.append(s)
+
+    # Book listings are fetched for many series at once; map() keeps series order.
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        fetched = pool.map(partial(series_numbers, client), [s["id"] for s in stale])
+        for s, nums in zip(stale, fetched):
+            numbers[s["id"]] = nums
+
+    with db:
+        db.executemany(
+            "INSERT OR REPLACE INTO series (id, fingerprint, numbers) VALUES (?, ?, ?)",
+            [(s["id"], series_fingerprint(s), json.dumps(numbers[s["id"]])) for s in stale],
+        )
+        gone = set(cached) - set(numbers)
+        db.executemany("DELETE FROM series WHERE id = ?", [(sid,) for sid in gone])
+    return numbers, len(stale)
 
 
 def main():
-    series_list = fetch_all_series()
+    parser = argparse.ArgumentParser(description="Komga gap report (markdown on stdout)")
+    parser.add_argument("--full", action="store_true", help="ignore the snapshot cache and rebuild it")
+    parser.add_argument("--cache", default=CACHE_PATH, help=f"snapshot cache path (default: {CACHE_PATH})")
+    args = parser.parse_args()
+
+    if not USER or not PWD:
+        sys.stderr.write("Error: KOMGA_USER and KOMGA_PASS must be set\n")
+        sys.exit(1)
+
+    client = KomgaClient(URL, USER, PWD, timeout=TIMEOUT, pool=ConnectionPool(maxsize=WORKERS))
+    db = open_cache(args.cache, args.full)
+    try:
+        series_list = fetch_all_series(client)
+        numbers, refreshed = refresh_cache(client, db, series_list)
+    except PageFetchError as e:
+        sys.stderr.write(f"Error: {e}\n")
+        sys.exit(1)
+    finally:
+        db.close()
+    sys.stderr.write(f"Refreshed {refreshed} of {len(series_list)} series\n")
+
     report = []
     for s in series_list:
-        sid = s["id"]
-        name = s.get("metadata", {}).get("title") or s["name"]
-        books = fetch_books(sid)
-        nums = []
-        for b in books:
-            fname = b.get("name") or b.get("url", "")
-            nums.extend(extract_numbers(fname))
-        nums = sorted(set(nums))
-        gaps = find_gaps(nums)
+        nums = numbers[s["id"]]
+        gaps = find_gap_ranges(nums)
         if gaps:
+            name = s.get("metadata", {}).get("title") or s["name"]
             report.append({"series": name, "have": nums, "gaps": gaps})
 
     # Output markdown
@@ -140,11 +169,11 @@ def main():
     print(f"Series with gaps: {len(report)}\n")
     for item in report:
         gaps = item["gaps"]
-        missing_display = ", ".join(map(str, gaps[:200]))
-        if len(gaps) > 200:
-            missing_display += f", … (+{len(gaps)-200} more)"
+        missing_display = format_ranges(gaps[:MAX_RANGES_SHOWN])
+        if len(gaps) > MAX_RANGES_SHOWN:
+            missing_display += f", … (+{len(gaps) - MAX_RANGES_SHOWN} more ranges)"
         print(f"## {item['series']}")
-        print(f"Missing: {missing_display}\n")
+        print(f"Missing ({count_missing(gaps)}): {missing_display}\n")
 
 
 if __name__ == "__main__":
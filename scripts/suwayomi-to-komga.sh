@@ -18,6 +18,7 @@
 #   KOMGA_URL=http://localhost:8081
 #   KOMGA_USER=user@example.com
 #   KOMGA_PASS=password
+#   KOMGA_SCAN=0                  # skip the library scan (the watcher batches its own)
 #
 set -euo pipefail
 
@@ -28,7 +29,7 @@ KOMGA_URL="${KOMGA_URL:-http://localhost:8081}"
 KOMGA_USER="${KOMGA_USER:-}"
 KOMGA_PASS="${KOMGA_PASS:-}"
 DRY_RUN="${DRY_RUN:-0}"
-WATCH_INTERVAL="${WATCH_INTERVAL:-60}"  # seconds
+KOMGA_SCAN="${KOMGA_SCAN:-1}"
 
 # Colors (disabled if not tty)
 if [[ -t 1 ]]; then
@@ -319,7 +320,7 @@ process_all() {
     [[ "$folder_name" == .* ]] && continue
 
     process_series "$dir"
-    ((processed++))
+    ((processed++)) || true
   done
 
   log ""
@@ -328,31 +329,24 @@ process_all() {
   log "========================================"
   log "Processed: $processed series"
 
-  if [[ "$DRY_RUN" == "0" && $processed -gt 0 ]]; then
+  if [[ "$DRY_RUN" == "0" && "$KOMGA_SCAN" == "1" && $processed -gt 0 ]]; then
     trigger_komga_scan
   fi
 }
 
 #######################################
-# Watch mode - continuous monitoring
+# Watch mode - event-driven monitoring
+# lib/python/ingest.py runs process_all once per settled batch of new
+# files and triggers a single Komga scan per batch.
 #######################################
 watch_mode() {
-  log "Starting watch mode (interval: ${WATCH_INTERVAL}s)"
+  local script_dir args=(suwayomi)
+  script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+  [[ "$DRY_RUN" == "1" ]] && args+=(--dry-run)
+  log "Starting watch mode"
   log "Press Ctrl+C to stop"
-  log ""
-
-  while true; do
-    # Check for new content
-    local count
-    count=$(find "$SUWAYOMI_DOWNLOADS" -mindepth 1 -maxdepth 1 -type d 2>/dev/null | wc -l)
-
-    if [[ $count -gt 0 ]]; then
-      log "Found $count items to process"
-      process_all
-    fi
-
-    sleep "$WATCH_INTERVAL"
-  done
+  SUWAYOMI_DOWNLOADS="$SUWAYOMI_DOWNLOADS" COMICS_ROOT="$COMICS_ROOT" \
+    exec python3 "$script_dir/../lib/python/ingest.py" "${args[@]}"
 }
 
 #######################################
@@ -381,7 +375,7 @@ main() {
       echo "  KOMGA_URL           Komga server URL"
       echo "  KOMGA_USER          Komga username"
       echo "  KOMGA_PASS          Komga password"
-      echo "  WATCH_INTERVAL      Seconds between checks (watch mode)"
+      echo "  KOMGA_SCAN          Set to 0 to skip the Komga library scan"
       echo ""
       echo "Publisher Mappings:"
       echo "  Edit the PUBLISHER_MAP in this script to add known series->publisher"
@@ -248,26 +248,15 @@ process_transmission() {
 watch_downloads() {
     log_info "Starting watch mode (Ctrl+C to stop)..."
 
-    # Initial processing
-    process_downloads
-    process_sabnzbd
-    process_transmission
-
-    # Use inotifywait if available, otherwise poll
-    if command -v inotifywait &>/dev/null; then
-        log_info "Using inotify for efficient file watching"
-        while true; do
-            inotifywait -q -r -e close_write,moved_to "$DOWNLOADS_ROOT" 2>/dev/null || sleep 30
-            sleep 5  # Debounce
-            process_downloads
-        done
-    else
-        log_info "inotifywait not available, using polling (60s interval)"
-        while true; do
-            sleep 60
-            process_downloads
-        done
+    # lib/python/ingest.py reacts to inotify events (scandir fallback), waits
+    # for files to stop growing and moves them in batches; its startup pass
+    # covers downloads that arrived while nothing was watching.
+    local args=(travel --log-file "$LOG_FILE")
+    if $DRY_RUN; then
+        args+=(--dry-run)
     fi
+    DOWNLOADS_ROOT_PORTABLE="$DOWNLOADS_ROOT" BOOKS_ROOT="$BOOKS_ROOT" \
+        exec python3 "$STACK_ROOT/lib/python/ingest.py" "${args[@]}"
 }
 
 # =============================================================================
@@ -2,84 +2,218 @@
 """
 Lightweight health checker for local stack services.
 Reads API keys from existing configs (no secrets committed)
-and hits status endpoints on localhost.
+and hits status endpoints on localhost (override per service with
+SONARR_URL, RADARR_URL, SABNZBD_URL, ...).
+
+All services are probed concurrently in a single round, so a dead
+service costs at most one timeout. Each result carries its latency and
+the output ends with a summary of total wall time.
+
+With --daemon it instead keeps its clients (and their pooled
+connections) open, probes each service on its own interval and serves
+Prometheus metrics on http://127.0.0.1:9180/metrics.
 
 Uses the shared api_client library for consistent HTTP handling.
 """
+import argparse
 import json
 import os
 import pathlib
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
 
 # Add lib to path for imports
 sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "lib" / "python"))
 
 from api_client import (
     ArrClient,
+    CircuitBreaker,
+    ConnectionPool,
+    RequestScheduler,
     SabClient,
     HTTPClient,
-    read_api_key_xml,
-    read_sab_key,
-    get_config_root,
+    shared_scheduler,
+    with_query,
 )
+from health_exporter import HealthExporter, Probe
+from service_registry import ServiceRegistry
 
+# Overall budget per probe, retries included, so the sweep stays near one timeout
+DEADLINE = 10
 
-def main():
-    config_root = get_config_root()
-    results = {}
+# Base URLs; <NAME>_URL overrides one (e.g. SONARR_URL=http://nas:8989)
+SERVICE_URLS = {
+    name: os.environ.get(f"{name.upper()}_URL", default)
+    for name, default in (
+        ("traefik", "http://localhost:8082"),
+        ("prowlarr", "http://localhost:9696"),
+        ("sonarr", "http://localhost:8989"),
+        ("radarr", "http://localhost:7878"),
+        ("sabnzbd", "http://localhost:8080"),
+        ("transmission", "http://localhost:9091"),
+    )
+}
+
+
+def timed(probe: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """Run a probe and attach its latency in milliseconds."""
+    start = time.perf_counter()
+    result = probe()
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
 
-    # Read API keys
-    prowlarr_key = read_api_key_xml(config_root / "prowlarr" / "config.xml")
-    sonarr_key = read_api_key_xml(config_root / "sonarr" / "config.xml")
-    radarr_key = read_api_key_xml(config_root / "radarr" / "config.xml")
-    sab_key = read_sab_key(config_root / "sabnzbd" / "sabnzbd.ini")
 
+def probe_traefik() -> Dict[str, Any]:
     # Traefik dashboard (insecure for now) - tolerate 200/401/403
-    traefik = HTTPClient("http://localhost:8082")
-    status, body = traefik.get("/dashboard/")
-    results["traefik"] = {"status": status, "body": body[:200] if body else ""}
+    status, body = HTTPClient(SERVICE_URLS["traefik"], deadline=DEADLINE).get("/dashboard/", max_bytes=200)
+    return {"status": status, "body": body[:200] if body else ""}
 
+
+def probe_prowlarr(api_key: str) -> Dict[str, Any]:
     # Prowlarr - uses v1 API
-    if prowlarr_key:
-        prowlarr = ArrClient("http://localhost:9696", prowlarr_key)
-        status, body = prowlarr.get("/api/v1/system/status")
-        results["prowlarr"] = {"status": status, "body": body[:500] if body else ""}
-
-    # Sonarr
-    if sonarr_key:
-        sonarr = ArrClient("http://localhost:8989", sonarr_key)
-        results["sonarr"] = {
-            "healthy": sonarr.is_healthy(),
-            "status": 200 if sonarr.is_healthy() else None,
-        }
+    prowlarr = ArrClient(SERVICE_URLS["prowlarr"], api_key, deadline=DEADLINE)
+    status, body = prowlarr.get("/api/v1/system/status")
+    return {"status": status, "body": body[:500] if body else ""}
 
-    # Radarr
-    if radarr_key:
-        radarr = ArrClient("http://localhost:7878", radarr_key)
-        results["radarr"] = {
-            "healthy": radarr.is_healthy(),
-            "status": 200 if radarr.is_healthy() else None,
-        }
 
-    # SABnzbd
-    if sab_key:
-        sab = SabClient("http://localhost:8080", sab_key)
-        queue = sab.call_json("mode=queue&output=json")
-        results["sabnzbd"] = {
-            "healthy": sab.is_healthy(),
-            "queue": queue.get("queue", {}).get("slots", [])[:5] if queue else [],
-        }
+def probe_arr(base_url: str, api_key: str) -> Dict[str, Any]:
+    healthy = ArrClient(base_url, api_key, deadline=DEADLINE).is_healthy()
+    return {"healthy": healthy, "status": 200 if healthy else None}
 
-    # Transmission over VPN: expect 409 (missing session id) or 200
-    transmission = HTTPClient("http://localhost:9091")
-    t_status, t_body = transmission.get("/transmission/rpc")
-    results["transmission"] = {
-        "status": t_status,
-        "body": t_body[:200] if t_body else "",
+
+def probe_sabnzbd(api_key: str) -> Dict[str, Any]:
+    # A successful queue call already proves SABnzbd is up
+    sab = SabClient(SERVICE_URLS["sabnzbd"], api_key, deadline=DEADLINE)
+    # Only the first five slots are reported, so only ask for five
+    queue = sab.call_json("mode=queue&output=json&start=0&limit=5")
+    return {
+        "healthy": queue is not None,
+        "queue": queue.get("queue", {}).get("slots", [])[:5] if queue else [],
     }
 
+
+def probe_transmission() -> Dict[str, Any]:
+    # Transmission over VPN: expect 409 (missing session id) or 200
+    transmission = HTTPClient(SERVICE_URLS["transmission"], deadline=DEADLINE)
+    status, body = transmission.get("/transmission/rpc", max_bytes=200)
+    return {"status": status, "body": body[:200] if body else ""}
+
+
+def read_keys() -> Dict[str, Optional[str]]:
+    registry = ServiceRegistry()
+    return {name: registry.api_key(name) for name in ("prowlarr", "sonarr", "radarr", "sabnzbd")}
+
+
+def sweep(keys: Dict[str, Optional[str]]) -> None:
+    """One concurrent round over every service, printed as JSON."""
+    started = time.perf_counter()
+
+    probes: Dict[str, Callable[[], Dict[str, Any]]] = {"traefik": probe_traefik}
+    if keys["prowlarr"]:
+        probes["prowlarr"] = partial(probe_prowlarr, keys["prowlarr"])
+    if keys["sonarr"]:
+        probes["sonarr"] = partial(probe_arr, SERVICE_URLS["sonarr"], keys["sonarr"])
+    if keys["radarr"]:
+        probes["radarr"] = partial(probe_arr, SERVICE_URLS["radarr"], keys["radarr"])
+    if keys["sabnzbd"]:
+        probes["sabnzbd"] = partial(probe_sabnzbd, keys["sabnzbd"])
+    probes["transmission"] = probe_transmission
+
+    # Probe everything in one concurrent round: worst case is one timeout,
+    # not the sum of them.
+    with ThreadPoolExecutor(max_workers=len(probes)) as pool:
+        futures = {name: pool.submit(timed, probe) for name, probe in probes.items()}
+        results: Dict[str, Any] = {name: future.result() for name, future in futures.items()}
+
+    results["_summary"] = {
+        "services": len(probes),
+        "wall_time_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
     print(json.dumps(results, indent=2))
 
 
+def daemon_probes(keys: Dict[str, Optional[str]], interval: float) -> List[Probe]:
+    """Probes for daemon mode; clients are built once and share one connection pool."""
+    pool = ConnectionPool(maxsize=2)
+    probes = []
+
+    def opts() -> Dict[str, Any]:
+        # Own breaker per client: a down service is re-probed every interval,
+        # not only after the default 30s cool-down
+        return {
+            "timeout": 5,
+            "deadline": min(interval, DEADLINE),
+            "pool": pool,
+            "breaker": CircuitBreaker(failure_threshold=3, reset_timeout=interval),
+            # Probes jump the queue ahead of any ingest or bulk work in this process
+            "scheduler": shared_scheduler(),
+            "priority": RequestScheduler.INTERACTIVE,
+        }
+
+    def status_probe(client: HTTPClient, endpoint: str, ok: tuple):
+        return lambda: {} if client.get(endpoint)[0] in ok else None
+
+    # Traefik dashboard tolerates 401/403; Transmission answers 409 without a session id
+    probes.append(Probe("traefik", interval * 2, status_probe(
+        HTTPClient(SERVICE_URLS["traefik"], **opts()), "/dashboard/", (200, 401, 403))))
+    probes.append(Probe("transmission", interval * 2, status_probe(
+        HTTPClient(SERVICE_URLS["transmission"], **opts()), "/transmission/rpc", (200, 409))))
+    if keys["prowlarr"]:
+        prowlarr = ArrClient(SERVICE_URLS["prowlarr"], keys["prowlarr"], **opts())
+        probes.append(Probe("prowlarr", interval, status_probe(prowlarr, "/api/v1/system/status", (200,))))
+
+    def arr_check(client: ArrClient):
+        def check():
+            if not client.is_healthy():
+                return None
+            # pageSize=1: only totalRecords is needed, not the queue itself
+            queue = client.get_json(with_query("/api/v3/queue", page=1, pageSize=1))
+            return {"queue_records": queue.get("totalRecords", 0)} if queue else {}
+        return check
+
+    for name in ("sonarr", "radarr"):
+        if keys[name]:
+            client = ArrClient(SERVICE_URLS[name], keys[name], **opts())
+            probes.append(Probe(name, interval, arr_check(client)))
+
+    if keys["sabnzbd"]:
+        sab = SabClient(SERVICE_URLS["sabnzbd"], keys["sabnzbd"], **opts())
+
+        def sab_check():
+            # limit=1 keeps the payload small; totals are reported regardless
+            data = sab.call_json("mode=queue&output=json&start=0&limit=1")
+            if data is None:
+                return None
+            queue = data.get("queue", {})
+            return {
+                "sabnzbd_queue_slots": float(queue.get("noofslots_total", 0)),
+                "sabnzbd_speed_bytes_per_second": float(queue.get("kbpersec", 0) or 0) * 1024,
+                "sabnzbd_remaining_bytes": float(queue.get("mbleft", 0) or 0) * 1024 * 1024,
+                "sabnzbd_paused": 1.0 if queue.get("paused") else 0.0,
+            }
+
+        # Queue depth and speed change fast; poll SABnzbd more often
+        probes.append(Probe("sabnzbd", max(1.0, interval / 3), sab_check))
+    return probes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Health check for local stack services")
+    parser.add_argument("--daemon", action="store_true", help="keep probing and serve /metrics")
+    parser.add_argument("--bind", default=os.environ.get("HEALTH_EXPORTER_BIND", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("HEALTH_EXPORTER_PORT", "9180")))
+    parser.add_argument("--interval", type=float, default=15.0, help="base probe interval in seconds")
+    args = parser.parse_args()
+
+    keys = read_keys()
+    if not args.daemon:
+        sweep(keys)
+        return
+    HealthExporter(daemon_probes(keys, args.interval)).serve(args.bind, args.port)
+
+
 if __name__ == "__main__":
     main()